@@ -0,0 +1,116 @@
+"""Read-only JSON API for the public content: /api/v1
+
+For the mobile app and the lobby display, which would otherwise scrape
+the HTML pages. Handlers go through the same queries functions, content
+versions and page cache as the HTML routes:
+
+    GET /api/v1/home                    everything the homepage shows, in one response
+    GET /api/v1/{resource}              ?fields=id,title&limit=20&after=<cursor>
+    GET /api/v1/{resource}/{id}         ?fields=...   (all fields by default)
+
+Resources are queries.API_RESOURCES (sermons, visions, shorts, qts,
+news, pastoral, members). Lists are keyset-paged: `next_cursor` is passed
+back as `after`. Every response carries a weak ETag from the content
+versions of the tables it reads and answers If-None-Match with 304.
+"""
+import json
+import os
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import Response
+
+import queries
+from cache import page_cache
+from conditional import page_validators
+from db import ConnectionPool, get_db
+
+try:
+    import orjson
+except ImportError:  # standard library encoder
+    orjson = None
+
+API_PAGE_SIZE = int(os.getenv("API_PAGE_SIZE", "20"))
+API_MAX_PAGE_SIZE = int(os.getenv("API_MAX_PAGE_SIZE", "100"))
+
+router = APIRouter(prefix="/api/v1")
+
+
+def dumps(data) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class APIResponse(Response):
+    """JSON response encoded with orjson when it is installed"""
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return content if isinstance(content, bytes) else dumps(content)
+
+
+def _resource(resource: str) -> tuple:
+    spec = queries.API_RESOURCES.get(resource)
+    if spec is None:
+        raise HTTPException(status_code=404, detail="Unknown resource")
+    return spec
+
+
+def _fields(spec: tuple, fields: Optional[str], default: tuple) -> tuple:
+    """Requested field names, in the order given; 400 for one the resource doesn't have"""
+    if not fields:
+        return default
+    requested = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in requested if name not in spec[1]]
+    if unknown or not requested:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}" if unknown
+                            else "No fields requested")
+    return requested
+
+
+async def _validators(request: Request, db: ConnectionPool, tables: tuple):
+    versions = await db.run(queries.content_versions, tables)
+    return page_validators(request, versions)
+
+
+@router.get("/home")
+async def home(request: Request, db: ConnectionPool = Depends(get_db)):
+    """Visions, sermons, shorts, QTs, news and the church intro, as on the homepage"""
+    validators = await _validators(request, db, queries.HOME_TABLES)
+    if validators.is_fresh(request):
+        return validators.not_modified()
+    body = page_cache.get(("api", "home"), validators.etag)
+    if body is None:
+        body = dumps(await db.run(queries.home_data))
+        page_cache.set(("api", "home"), body, queries.HOME_TABLES, validators.etag)
+    return validators.apply(APIResponse(body))
+
+
+@router.get("/{resource}")
+async def resource_list(request: Request, resource: str, fields: Optional[str] = None,
+                        limit: int = API_PAGE_SIZE, after: Optional[str] = None,
+                        db: ConnectionPool = Depends(get_db)):
+    """One page of a resource, newest first (members in display order)"""
+    spec = _resource(resource)
+    selected = _fields(spec, fields, spec[2])
+    validators = await _validators(request, db, (spec[0],))
+    if validators.is_fresh(request):
+        return validators.not_modified()
+    limit = min(max(limit, 1), API_MAX_PAGE_SIZE)
+    return validators.apply(APIResponse(await db.run(queries.api_page, resource, selected, limit, after)))
+
+
+@router.get("/{resource}/{item_id}")
+async def resource_item(request: Request, resource: str, item_id: int, fields: Optional[str] = None,
+                        db: ConnectionPool = Depends(get_db)):
+    """One item with all its fields (or ?fields=); doesn't count as a view"""
+    spec = _resource(resource)
+    selected = _fields(spec, fields, spec[1])
+    validators = await _validators(request, db, (spec[0],))
+    if validators.is_fresh(request):
+        return validators.not_modified()
+    item = await db.run(queries.api_item, resource, item_id, selected)
+    if item is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    return validators.apply(APIResponse(item))
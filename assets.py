@@ -0,0 +1,105 @@
+"""Content-hashed static asset URLs: /static/css/style.<hash>.css, cached for a year
+
+Templates call asset_url('css/style.css') (Jinja global) instead of
+hand-bumping ?v= numbers. The URL carries the first ASSET_HASH_LENGTH hex
+digits of the file's SHA-256, so it changes exactly when the content does
+and the fingerprinted response can be cached as immutable. Hashes are
+computed at startup and recomputed when a file's mtime or size changes.
+
+Usage: python -m assets [directory]   (print the manifest as JSON)
+"""
+import hashlib
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Optional, Tuple
+
+from compression import SUFFIXES, PrecompressedStaticFiles
+
+ASSET_HASH_LENGTH = 10
+IMMUTABLE = f"public, max-age={365 * 24 * 3600}, immutable"
+
+_FINGERPRINT_RE = re.compile(rf"^(.+)\.([0-9a-f]{{{ASSET_HASH_LENGTH}}})(\.[^./]+)$")
+
+
+class AssetManifest:
+    """Fingerprinted name of each file under `directory`, keyed by relative path"""
+
+    def __init__(self, directory: str = "static", url_prefix: str = "/static/"):
+        self.directory = Path(directory)
+        self.url_prefix = url_prefix
+        self._entries = {}  # path -> (mtime_ns, size, fingerprinted path)
+
+    def fingerprinted(self, path: str) -> Optional[str]:
+        """`css/style.css` -> `css/style.<hash>.css` (None if there is no such file)"""
+        try:
+            stat = (self.directory / path).stat()
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        entry = self._entries.get(path)
+        if entry is None or entry[:2] != (stat.st_mtime_ns, stat.st_size):
+            digest = hashlib.sha256((self.directory / path).read_bytes()).hexdigest()[:ASSET_HASH_LENGTH]
+            stem, dot, suffix = path.rpartition(".")
+            name = f"{stem}.{digest}.{suffix}" if dot and "/" not in suffix else path  # no extension: as is
+            entry = self._entries[path] = (stat.st_mtime_ns, stat.st_size, name)
+        return entry[2]
+
+    def url(self, path: str) -> str:
+        """Fingerprinted URL of a static file (Jinja global `asset_url`).
+
+        Unknown paths get the plain URL, so a typo shows up as a 404
+        rather than a template error.
+        """
+        path = path.lstrip("/")
+        return self.url_prefix + (self.fingerprinted(path) or path)
+
+    def original(self, path: str) -> Tuple[Optional[str], bool]:
+        """(original path, whether the hash is current) for a fingerprinted request path.
+
+        (None, False) if the path carries no fingerprint.
+        """
+        match = _FINGERPRINT_RE.match(path)
+        if match is None or ".." in Path(path).parts:
+            return None, False
+        original = match.group(1) + match.group(3)
+        return original, self.fingerprinted(original) == path
+
+    def manifest(self) -> dict:
+        """Hash every file now (warms the cache at startup)"""
+        return {
+            path.relative_to(self.directory).as_posix(): self.fingerprinted(path.relative_to(self.directory).as_posix())
+            for path in sorted(self.directory.rglob("*"))
+            if path.is_file() and not path.name.startswith(".") and path.suffix not in SUFFIXES.values()
+        }
+
+
+class AssetStaticFiles(PrecompressedStaticFiles):
+    """/static mount that also resolves fingerprinted names.
+
+    A current fingerprint is served with an immutable, one-year
+    Cache-Control. An outdated or made-up one (a page rendered before a
+    deploy) still gets the current file, but as no-cache, so nothing keeps
+    today's content under that name. nginx proxies fingerprinted paths
+    here for the same reason.
+    """
+
+    def __init__(self, *, manifest: AssetManifest, **kwargs):
+        super().__init__(**kwargs)
+        self.manifest = manifest
+
+    async def get_response(self, path: str, scope):
+        original, current = self.manifest.original(path)
+        if original is None:
+            return await super().get_response(path, scope)
+        response = await super().get_response(original, scope)
+        if response.status_code in (200, 304):
+            response.headers["Cache-Control"] = IMMUTABLE if current else "no-cache"
+        return response
+
+
+asset_manifest = AssetManifest()
+
+
+if __name__ == "__main__":
+    print(json.dumps(AssetManifest(sys.argv[1] if len(sys.argv) > 1 else "static").manifest(), indent=2))
@@ -0,0 +1 @@
+"""Benchmarks for the church website (run from the repository root)"""
@@ -0,0 +1,97 @@
+"""Logins/sec and latency added to concurrent GET / while bcrypt runs
+
+Compares bcrypt inline on the event loop with the bounded PasswordHasher
+pool. 503 responses are logins shed by admission control.
+
+Usage: python -m bench.bench_bcrypt [--logins 40] [--concurrency 8] [--rounds 10]
+"""
+import argparse
+import asyncio
+import os
+import time
+from urllib.parse import urlencode
+
+from bench.common import load_app, report
+from bench.driver import ASGIDriver, summarize
+
+PROBE_INTERVAL = 0.01
+
+
+async def burst(driver, logins: int, concurrency: int) -> dict:
+    body = urlencode({"username": "bench", "password": "bench-password"}).encode()
+    headers = {"content-type": "application/x-www-form-urlencoded"}
+    remaining = iter(range(logins))
+    statuses = {}
+    login_latencies = []
+    probe_latencies = []
+    done = asyncio.Event()
+
+    async def login_client():
+        for _ in remaining:
+            started = time.perf_counter()
+            status, _, _ = await driver.request("POST", "/login", headers, body)
+            login_latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    async def probe():
+        scheduled = time.perf_counter()
+        while not done.is_set():
+            await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+            await driver.request("GET", "/")
+            probe_latencies.append(time.perf_counter() - scheduled)
+            scheduled = max(scheduled + PROBE_INTERVAL, time.perf_counter())
+
+    probe_task = asyncio.create_task(probe())
+    started = time.perf_counter()
+    await asyncio.gather(*(login_client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await probe_task
+    accepted = statuses.get(303, 0)
+    return {
+        "logins_per_s": round(accepted / elapsed, 2),
+        "logins": summarize(login_latencies, elapsed, statuses),
+        "get_home_during_burst": summarize(probe_latencies, elapsed),
+    }
+
+
+async def run(args):
+    os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    main = load_app()
+    import db
+
+    class InlineHasher:
+        """Pre-pool behaviour: bcrypt on the event loop thread"""
+
+        async def hash(self, password):
+            return main.hash_password(password)
+
+        async def verify(self, password, hashed):
+            return main.verify_password(password, hashed)
+
+    driver = ASGIDriver(main.app)
+    await driver.startup()
+    with db.pool.write() as conn:
+        conn.execute("INSERT INTO users (username, password, role, created_at) VALUES ('bench', ?, 'user', '')",
+                     (main.hash_password("bench-password"),))
+
+    idle = await driver.load("/", 200, 1)
+    results = {"bcrypt_rounds": args.rounds, "get_home_idle": idle}
+    pooled = main.password_hasher
+    for mode, hasher in (("inline", InlineHasher()), ("pool", pooled)):
+        main.password_hasher = hasher
+        results[mode] = await burst(driver, args.logins, args.concurrency)
+    await driver.shutdown()
+    report(results)
+
+
+def cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=10)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,103 @@
+"""Response sizes and latency with gzip/brotli negotiation vs. identity
+
+Fetches the main pages and the static assets with each Accept-Encoding,
+checks the negotiated Content-Encoding (and Vary) is what the
+middleware and the precompressed static handler should pick, and reports
+bytes on the wire and the saving against the uncompressed body. Range
+requests for the assets, single and multi-range, must come back as
+uncompressed 206 slices of the original file whatever the client
+accepts, and compressed bodies must not advertise Accept-Ranges. Exits 1
+on any mismatch. Run `python -m compression static` first to include the
+precompressed siblings; without them static files are compressed per
+request.
+
+Usage: python -m bench.bench_compression [--requests 300] [--concurrency 8]
+"""
+import argparse
+import asyncio
+
+from bench.common import load_app, report
+from bench.driver import ASGIDriver
+
+PAGES = ("/", "/en/", "/about", "/people", "/pastoral")
+ASSETS = ("/static/css/style.css", "/static/css/admin.css", "/static/js/script.js", "/static/js/admin.js")
+
+
+async def measure(driver: ASGIDriver, encodings, args) -> dict:
+    results = {"sizes": {}, "latency": {}}
+    mismatches = []
+    for url in PAGES + ASSETS:
+        sizes = {}
+        for accept in ("identity",) + encodings:
+            status, headers, body = await driver.request("GET", url, {"Accept-Encoding": accept})
+            expected = None if accept == "identity" else accept
+            if status != 200 or headers.get("content-encoding") != expected:
+                mismatches.append(f"{url} Accept-Encoding: {accept} -> {status} {headers.get('content-encoding')}")
+            if "accept-encoding" not in headers.get("vary", "").lower():
+                mismatches.append(f"{url} Accept-Encoding: {accept} -> no Vary: Accept-Encoding")
+            if headers.get("content-encoding") and "accept-ranges" in headers:
+                mismatches.append(f"{url} Accept-Encoding: {accept} -> Accept-Ranges on a compressed body")
+            sizes[accept] = len(body)
+        for encoding in encodings:
+            sizes[f"{encoding}_saved_pct"] = round(100 * (1 - sizes[encoding] / sizes["identity"]), 1)
+        results["sizes"][url] = sizes
+    for accept in ("identity",) + encodings:
+        results["latency"][f"/ {accept}"] = await driver.load(
+            "/", args.requests, args.concurrency, headers={"Accept-Encoding": accept})
+    results["ranges_checked"] = await check_ranges(driver, encodings, mismatches)
+    results["mismatches"] = mismatches
+    return results
+
+
+async def check_ranges(driver: ASGIDriver, encodings, mismatches: list) -> int:
+    """Range requests must get identity 206 slices of the file, whatever Accept-Encoding says"""
+    checked = 0
+    for url in ASSETS:
+        _, _, full = await driver.request("GET", url, {"Accept-Encoding": "identity"})
+        last = len(full) - 2  # all but the last byte: big enough to be worth compressing
+        for accept in ("identity",) + encodings:
+            status, headers, body = await driver.request("GET", url, {"Accept-Encoding": accept,
+                                                                      "Range": f"bytes=0-{last}"})
+            if (status, headers.get("content-encoding"), body) != (206, None, full[:-1]) \
+                    or headers.get("content-range") != f"bytes 0-{last}/{len(full)}":
+                mismatches.append(f"{url} Range: bytes=0-{last}, Accept-Encoding: {accept} -> "
+                                  f"{status} {headers.get('content-encoding')} {headers.get('content-range')}")
+            status, headers, body = await driver.request("GET", url, {"Accept-Encoding": accept,
+                                                                      "Range": "bytes=0-9,20-29"})
+            if status != 206 or headers.get("content-encoding") or full[:10] not in body or full[20:30] not in body:
+                mismatches.append(f"{url} Range: bytes=0-9,20-29, Accept-Encoding: {accept} -> "
+                                  f"{status} {headers.get('content-encoding')}")
+            checked += 2
+    return checked
+
+
+def run(args):
+    main = load_app()
+    import compression
+
+    # br is only negotiated when the brotli package is installed
+    encodings = tuple(reversed(compression.ENCODINGS))
+    driver = ASGIDriver(main.app)
+
+    async def go():
+        await driver.startup()
+        try:
+            return await measure(driver, encodings, args)
+        finally:
+            await driver.shutdown()
+
+    results = asyncio.run(go())
+    report(results)
+    if results["mismatches"]:
+        raise SystemExit(1)
+
+
+def cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=8)
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    cli()
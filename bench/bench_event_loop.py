@@ -0,0 +1,97 @@
+"""Probe-route latency while DB-bound requests run, inline vs. on the DB executor
+
+A probe client requests /login (no DB work) in a loop while N clients run
+a slow pastoral search. With DB work inline on the event loop the probe's
+p99 grows with N; on the executor it should stay flat.
+
+Usage: python -m bench.bench_event_loop [--posts 20000] [--duration 3]
+"""
+import argparse
+import asyncio
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+from bench.common import load_app, report
+from bench.driver import summarize
+
+PROBE_INTERVAL = 0.01
+
+
+def seed(path: str, posts: int):
+    conn = sqlite3.connect(path)
+    start = datetime(2000, 1, 1)
+    conn.executemany(
+        "INSERT INTO pastoral_posts (title, content, image_path, author, views, created_at) VALUES (?, ?, ?, ?, 0, ?)",
+        [(f"목양의 글 {i}", "<p>" + "하나님의 사랑과 은혜 " * 60 + "</p>", None, "admin",
+          (start + timedelta(hours=i)).strftime("%Y-%m-%d")) for i in range(posts)],
+    )
+    from search import fill_search_bodies
+    fill_search_bodies(conn.cursor())
+    conn.commit()
+    conn.close()
+
+
+async def measure(driver, concurrency: int, duration: float) -> dict:
+    stop = time.perf_counter() + duration
+    probe_latencies = []
+    slow_latencies = []
+
+    async def slow_client():
+        while time.perf_counter() < stop:
+            started = time.perf_counter()
+            await driver.request("GET", "/pastoral?q=nomatch")
+            slow_latencies.append(time.perf_counter() - started)
+
+    async def probe():
+        # Latency is measured from the scheduled send time, so time spent
+        # waiting for a blocked event loop counts against the probe.
+        scheduled = time.perf_counter()
+        while scheduled < stop:
+            await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+            await driver.request("GET", "/login")
+            probe_latencies.append(time.perf_counter() - scheduled)
+            scheduled = max(scheduled + PROBE_INTERVAL, time.perf_counter())
+
+    started = time.perf_counter()
+    await asyncio.gather(probe(), *(slow_client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {"probe": summarize(probe_latencies, elapsed), "db_bound": summarize(slow_latencies, elapsed)}
+
+
+async def run(args):
+    main = load_app()
+    import db
+    from bench.driver import ASGIDriver
+
+    class InlinePool(db.ConnectionPool):
+        """Pre-executor behaviour: DB calls block the event loop"""
+
+        async def run(self, fn, *args):
+            return fn(self, *args)
+
+    driver = ASGIDriver(main.app)
+    await driver.startup()
+    seed(db.DB_PATH, args.posts)
+
+    results = {}
+    for mode, pool_cls in (("inline", InlinePool), ("executor", db.ConnectionPool)):
+        db.pool.close()
+        db.pool = pool_cls(db.DB_PATH)
+        results[mode] = {}
+        for concurrency in args.levels:
+            results[mode][concurrency] = await measure(driver, concurrency, args.duration)
+    await driver.shutdown()
+    report(results)
+
+
+def cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=20000)
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 4, 16, 32])
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,87 @@
+"""Bytes saved by responsive image variants
+
+Generates variants for the site logo and a few synthetic camera photos,
+then compares the original against the file a browser would pick for
+each display slot (at 2x density) in AVIF, WebP and the JPEG/PNG
+fallback.
+
+Usage: python -m bench.bench_images [--photos 5]
+"""
+import argparse
+import io
+import os
+import random
+import shutil
+import tempfile
+
+from bench.common import ROOT, report
+
+# Where each image is shown, in CSS pixels (see the templates' sizes=)
+SLOTS = {"logo": 36, "thumbnail": 60, "member photo": 150, "detail": 800}
+
+
+def synthetic_photo(rng: random.Random, width: int = 3000, height: int = 2000) -> bytes:
+    """Noisy gradient JPEG with EXIF, roughly the weight of a phone photo"""
+    from PIL import Image
+
+    base = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+    noise = Image.effect_noise((width, height), rng.randint(20, 60)).convert("RGB")
+    image = Image.blend(base, noise, 0.5)
+    exif = Image.Exif()
+    exif[0x010F] = "Synthetic Camera"
+    out = io.BytesIO()
+    image.save(out, "JPEG", quality=92, exif=exif)
+    return out.getvalue()
+
+
+def pick(variants: list, fmt: str, slot: int):
+    """Smallest variant of fmt at least 2x the slot width (else the largest)"""
+    candidates = sorted((row for row in variants if row[1] == fmt), key=lambda row: row[0])
+    for row in candidates:
+        if row[0] >= slot * 2:
+            return row
+    return candidates[-1] if candidates else None
+
+
+def run(args):
+    upload_dir = tempfile.mkdtemp(prefix="church-images-")
+    os.environ["UPLOAD_DIR"] = upload_dir
+    os.chdir(ROOT)
+    import images
+
+    rng = random.Random(3)
+    sources = {"/static/images/logo.png": ["logo"]}
+    for i in range(args.photos):
+        name = f"photo{i}.jpg"
+        with open(os.path.join(upload_dir, name), "wb") as f:
+            f.write(synthetic_photo(rng))
+        sources[f"/uploads/{name}"] = ["thumbnail", "member photo", "detail"]
+
+    results = {}
+    totals = {}
+    for url, slots in sources.items():
+        original = images.source_path(url).stat().st_size
+        variants = images.generate_variants(url)
+        for slot in slots:
+            row = {"original_bytes": original}
+            for fmt in ("avif", "webp", "png", "jpeg"):
+                chosen = pick(variants, fmt, SLOTS[slot])
+                if chosen:
+                    row[f"{fmt}_bytes"] = chosen[3]
+                    totals.setdefault(fmt, [0, 0])
+                    totals[fmt][0] += original
+                    totals[fmt][1] += chosen[3]
+            results.setdefault(url, {})[slot] = row
+    results["saved_pct"] = {fmt: round(100 * (1 - sent / original), 1) for fmt, (original, sent) in totals.items()}
+    shutil.rmtree(upload_dir)
+    report(results)
+
+
+def cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--photos", type=int, default=5)
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    cli()
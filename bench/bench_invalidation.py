@@ -0,0 +1,140 @@
+"""Cross-worker cache invalidation: no worker serves a stale page after an admin edit
+
+Starts --workers uvicorn processes on one database (like `uvicorn
+--workers N`, but each on its own port so every one can be asked
+directly), warms the homepage and /about in each, then creates a sermon
+through the first worker. Every worker's homepage must show the new
+sermon on the first request after the write (the page cache is keyed
+by ETag), /about, which doesn't read sermons, must still be served from
+the page cache, and each worker's change watcher must have dropped its
+homepage entry within one poll. Exits 1 if any of that fails.
+
+Usage: python -m bench.bench_invalidation [--workers 4] [--interval 0.5]
+"""
+import argparse
+import http.client
+import json
+import os
+import secrets
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlencode
+
+from bench.common import ROOT, load_app, report
+
+ADMIN_PASSWORD = "bench-password"
+FORM = {"Content-Type": "application/x-www-form-urlencoded"}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def request(port: int, method: str, path: str, headers: dict = None, body: bytes = None) -> tuple:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    try:
+        conn.request(method, path, body=body, headers=headers or {})
+        response = conn.getresponse()
+        return response.status, dict(response.getheaders()), response.read()
+    finally:
+        conn.close()
+
+
+def wait_ready(port: int, process: subprocess.Popen, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"worker on port {port} exited with {process.returncode}")
+        try:
+            if request(port, "GET", "/login")[0] == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"worker on port {port} did not start")
+
+
+def cache_stats(port: int, cookie: str) -> dict:
+    status, _, body = request(port, "GET", "/admin/cache/stats", {"Cookie": cookie})
+    if status != 200:
+        raise RuntimeError(f"cache stats on port {port}: {status}")
+    return json.loads(body)
+
+
+def run(args):
+    db_path = os.path.join(tempfile.mkdtemp(prefix="church-invalidation-"), "church.db")
+    os.environ["ADMIN_PASSWORD"] = ADMIN_PASSWORD
+    load_app(db_path).init_db()  # migrate once, before the workers race to
+    env = {**os.environ, "DB_PATH": db_path, "INVALIDATION_INTERVAL": str(args.interval),
+           "PAGE_CACHE_TTL": "3600", "METRICS_DIR": os.path.dirname(db_path)}
+    ports = [free_port() for _ in range(args.workers)]
+    workers = [subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+                                cwd=ROOT, env=env) for port in ports]
+    try:
+        for port, process in zip(ports, workers):
+            wait_ready(port, process)
+        status, headers, _ = request(ports[0], "POST", "/login", FORM,
+                                     urlencode({"username": "admin", "password": ADMIN_PASSWORD}).encode())
+        if status != 303:
+            raise RuntimeError(f"admin login failed: {status}")
+        cookie = headers["set-cookie"].split(";", 1)[0]
+
+        for port in ports:
+            for path in ("/", "/about"):
+                request(port, "GET", path)
+        before = [cache_stats(port, cookie) for port in ports]
+
+        title = f"무효화 확인 {secrets.token_hex(4)}"
+        status, _, _ = request(ports[0], "POST", "/admin/sermon/create", {**FORM, "Cookie": cookie},
+                               urlencode({"title": title, "pastor": "담임목사", "description": "말씀"}).encode())
+        written = time.perf_counter()
+        if status != 303:
+            raise RuntimeError(f"sermon create failed: {status}")
+
+        fresh = {port: title.encode() in request(port, "GET", "/")[2] for port in ports}
+        fresh_ms = round((time.perf_counter() - written) * 1000, 1)
+        time.sleep(args.interval + 0.5)  # one poll for every watcher
+
+        results = []
+        for i, port in enumerate(ports):
+            request(port, "GET", "/about")
+            after = cache_stats(port, cookie)
+            results.append({
+                "worker": i,
+                "fresh_after_write": fresh[port],
+                "pages_dropped": after["invalidations"] - before[i]["invalidations"],
+                "about_still_cached": after["hits"] > before[i]["hits"],
+            })
+        summary = {
+            "workers": args.workers,
+            "interval_s": args.interval,
+            "fresh_checked_ms": fresh_ms,
+            "results": results,
+            "all_fresh": all(r["fresh_after_write"] for r in results),
+            "all_dropped": all(r["pages_dropped"] >= 1 for r in results),
+            "only_affected_dropped": all(r["about_still_cached"] for r in results),
+        }
+        report(summary)
+        if not (summary["all_fresh"] and summary["all_dropped"] and summary["only_affected_dropped"]):
+            raise SystemExit(1)
+    finally:
+        for process in workers:
+            process.terminate()
+        for process in workers:
+            process.wait(timeout=10)
+
+
+def cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--interval", type=float, default=0.5, help="INVALIDATION_INTERVAL for the workers")
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    cli()
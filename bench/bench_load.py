@@ -0,0 +1,221 @@
+"""Load-test scenarios against a synthetic congregation-scale database
+
+Runs the app in process (bench.driver, no sockets) against a copy of a
+bench.dataset database and reports throughput, p50/p95/p99 latency,
+status codes and peak RSS per scenario as JSON, tagged with the current
+commit so two runs can be compared:
+
+  sunday_home    anonymous homepage spike (some revalidations, /api/v1/home)
+  search_storm   pastoral board searches for common, rare and missing terms
+  comment_burst  logged-in members commenting on and reading the hottest threads
+  admin_edits    an admin updating posts and sermons while visitors read
+
+Peak RSS is the process high-water mark, so it only grows from one
+scenario to the next; use --scenarios to measure one on its own.
+
+Usage: python -m bench.bench_load [--dataset bench/data/church.db | --scale 0.1] [--scenarios ...]
+                                  [--requests 2000] [--output run.json] [--compare baseline.json]
+"""
+import argparse
+import asyncio
+import json
+import random
+import resource
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import quote, urlencode
+
+from bench import dataset
+from bench.common import ROOT, load_app, report
+from bench.driver import ASGIDriver
+
+FORM = {"Content-Type": "application/x-www-form-urlencoded"}
+BROWSER = {"Accept-Encoding": "gzip, deflate, br"}
+SEARCH_TERMS = ("공동체", "하나님의 사랑", "사랑", "기도", "은혜 말씀", "없는검색어")
+SESSION_USERS = 8
+HOT_THREADS = 5
+
+
+def peak_rss_mb() -> float:
+    """Process high-water RSS (ru_maxrss is KiB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def login(driver: ASGIDriver, username: str) -> dict:
+    """Headers carrying a session cookie for `username`"""
+    from sessions import SESSION_COOKIE
+
+    status, headers, _ = await driver.request(
+        "POST", "/login", FORM, urlencode({"username": username, "password": dataset.BENCH_PASSWORD}).encode())
+    cookie = headers.get("set-cookie", "")
+    if status != 303 or not cookie.startswith(f"{SESSION_COOKIE}="):
+        raise RuntimeError(f"login as {username} failed: {status}")
+    return {**BROWSER, "Cookie": cookie.split(";", 1)[0]}
+
+
+async def sunday_home(driver, ctx, args):
+    _, headers, _ = await driver.request("GET", "/", BROWSER)
+    revalidate = {**BROWSER, "If-None-Match": headers["etag"]}
+
+    def next_request(i):
+        roll = ctx["rng"].random()
+        if roll < 0.75:
+            return "GET", "/", BROWSER, b""
+        if roll < 0.85:
+            return "GET", "/", revalidate, b""
+        if roll < 0.95:
+            return "GET", "/en/", BROWSER, b""
+        return "GET", "/api/v1/home", BROWSER, b""
+
+    return await driver.mix(next_request, args.requests, args.concurrency * 2)
+
+
+async def search_storm(driver, ctx, args):
+    def next_request(i):
+        term = ctx["rng"].choice(SEARCH_TERMS + (ctx["rare"],))
+        page = 1 if ctx["rng"].random() < 0.8 else ctx["rng"].randint(2, 5)
+        return "GET", f"/pastoral?q={quote(term)}&page={page}", BROWSER, b""
+
+    return await driver.mix(next_request, args.requests // 4, args.concurrency)
+
+
+async def comment_burst(driver, ctx, args):
+    sessions = [await login(driver, f"member{i}") for i in range(SESSION_USERS)]
+    sessions = [{**headers, **FORM} for headers in sessions]
+
+    def next_request(i):
+        post_id = ctx["rng"].choice(ctx["hot_posts"])
+        headers = sessions[i % len(sessions)]
+        if ctx["rng"].random() < 0.3:
+            return "POST", f"/pastoral/{post_id}/comment", headers, urlencode({"content": f"아멘 {i}"}).encode()
+        return "GET", f"/pastoral/{post_id}", headers, b""
+
+    return await driver.mix(next_request, args.requests // 2, args.concurrency)
+
+
+async def admin_edits(driver, ctx, args):
+    admin = {**await login(driver, "admin"), **FORM}
+
+    def next_request(i):
+        roll = ctx["rng"].random()
+        if roll < 0.1:
+            post_id = ctx["rng"].randint(1, ctx["rows"]["pastoral_posts"])
+            body = {"title": f"수정된 목양의 글 {i}", "content": f"<p>수정 {i} 하나님의 사랑</p>"}
+            return "POST", f"/admin/pastoral/update/{post_id}", admin, urlencode(body).encode()
+        if roll < 0.15:
+            sermon_id = ctx["rng"].randint(1, ctx["rows"]["sermons"])
+            body = {"title": f"수정된 설교 {i}", "pastor": "담임목사", "date": "2025-12-28", "description": "말씀"}
+            return "POST", f"/admin/sermon/update/{sermon_id}", admin, urlencode(body).encode()
+        if roll < 0.25:
+            return "GET", "/admin/api/pastoral", admin, b""
+        if roll < 0.6:
+            return "GET", "/", BROWSER, b""
+        return "GET", "/pastoral", BROWSER, b""
+
+    return await driver.mix(next_request, args.requests // 2, args.concurrency)
+
+
+SCENARIOS = {
+    "sunday_home": sunday_home,
+    "search_storm": search_storm,
+    "comment_burst": comment_burst,
+    "admin_edits": admin_edits,
+}
+
+
+def compare(current: dict, baseline: dict) -> dict:
+    """Per-scenario change against a previous run, in percent (positive rps / negative latency is better)"""
+    deltas = {}
+    for name, result in current["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        deltas[name] = {
+            metric: round(100 * (result[metric] - before[metric]) / before[metric], 1) if before[metric] else None
+            for metric in ("rps", "p50_ms", "p95_ms", "p99_ms", "peak_rss_mb")
+        }
+    return {"baseline": baseline.get("commit"), "change_pct": deltas}
+
+
+def prepare(args) -> tuple:
+    """Copy (or generate) the dataset into a scratch database and import the app against it"""
+    path = Path(tempfile.mkdtemp(prefix="church-load-")) / "church.db"
+    if args.dataset:
+        source = sqlite3.connect(args.dataset)
+        target = sqlite3.connect(path)
+        source.backup(target)
+        source.close()
+        target.close()
+        info = {"db": args.dataset}
+    else:
+        info = dataset.generate(path, dataset.volumes(args), args.years, args.seed)
+    main = load_app(str(path))
+    main.init_db()  # applies migrations the dataset predates
+    conn = sqlite3.connect(path)
+    rows = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("sermons", "news", "pastoral_posts", "users", "comments")}
+    hot_posts = [row[0] for row in conn.execute(
+        "SELECT id FROM pastoral_posts ORDER BY comment_count DESC LIMIT ?", (HOT_THREADS,))]
+    conn.close()
+    return main, path, {**info, "rows": rows}, hot_posts
+
+
+def run(args):
+    main, path, data, hot_posts = prepare(args)
+    from bench.bench_search import vocabulary
+
+    ctx = {"rng": random.Random(args.seed), "rows": data["rows"], "hot_posts": hot_posts,
+           "rare": vocabulary(random.Random(args.seed))[0]}
+    driver = ASGIDriver(main.app)
+
+    async def go():
+        results = {}
+        await driver.startup()
+        try:
+            for name in args.scenarios:
+                started = time.perf_counter()
+                results[name] = await SCENARIOS[name](driver, ctx, args)
+                results[name]["wall_s"] = round(time.perf_counter() - started, 2)
+                results[name]["peak_rss_mb"] = peak_rss_mb()
+        finally:
+            await driver.shutdown()
+        return results
+
+    results = {"commit": commit(), "python": sys.version.split()[0], "dataset": data,
+               "requests": args.requests, "concurrency": args.concurrency, "scenarios": asyncio.run(go())}
+    if args.compare:
+        results["compare"] = compare(results, json.loads(Path(args.compare).read_text()))
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2, ensure_ascii=False))
+    report(results)
+    shutil.rmtree(path.parent, ignore_errors=True)
+
+
+def cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dataset", help="database from `python -m bench.dataset` (copied, never modified)")
+    dataset.add_arguments(parser, scale=0.1)  # used when no --dataset is given
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--output", help="also write the JSON report here")
+    parser.add_argument("--compare", help="a previous --output to diff against")
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,106 @@
+"""Pastoral list page cost vs. post body size: SELECT * + strip_html vs. stored excerpts
+
+Fills the board with posts of a given body size and times one list page
+built the old way (every column, excerpt cut from the HTML body at render
+time) against queries.pastoral_page, which reads only the list columns
+and the stored excerpt. The new timings should stay flat as bodies grow.
+
+Usage: python -m bench.bench_pastoral_list [--posts 2000] [--body-kb 1 20 200] [--repeat 20]
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from jinja2 import Environment
+
+from bench.common import load_app, report
+
+PER_PAGE = 20
+PARAGRAPH = "<p>하나님의 사랑과 은혜가 우리 공동체 가운데 충만하기를 기도합니다. 말씀 안에서 소망을 품고 믿음으로 걸어갑시다.</p>"
+
+# Compiled in run(), once excerpts.strip_html can be imported
+OLD_ITEM = (
+    "{% for post in posts %}<h4>{{ post.title }}</h4>"
+    "<div class=\"post-excerpt\">{{ post.content|strip_html|truncate(80, True, '...') }}</div>{% endfor %}")
+NEW_ITEM = Environment().from_string(
+    "{% for post in posts %}<h4>{{ post.title }}</h4>"
+    "<div class=\"post-excerpt\">{{ post.excerpt or '' }}</div>{% endfor %}")
+
+
+def fill(conn, posts: int, body_kb: int):
+    from excerpts import text_fields
+
+    content = PARAGRAPH * max(1, body_kb * 1024 // len(PARAGRAPH.encode()))
+    fields = text_fields(content)
+    start = datetime(2000, 1, 1)
+    conn.executemany(
+        "INSERT INTO pastoral_posts (title, content, image_path, author, views, created_at, excerpt, text_length, "
+        "reading_minutes) VALUES (?, ?, NULL, 'admin', 0, ?, ?, ?, ?)",
+        [(f"목양의 글 {i}", content, (start + timedelta(hours=i)).strftime("%Y-%m-%d %H:%M:%S"), *fields)
+         for i in range(posts)])
+    conn.commit()
+
+
+def old_page(conn, old_item):
+    cursor = conn.execute("SELECT * FROM pastoral_posts ORDER BY created_at DESC, id DESC LIMIT ?", (PER_PAGE + 1,))
+    posts = [{"id": r[0], "title": r[1], "content": r[2]} for r in cursor.fetchall()[:PER_PAGE]]
+    return old_item.render(posts=posts)
+
+
+def new_page(pool, queries):
+    return NEW_ITEM.render(posts=queries.pastoral_page(pool, 1, PER_PAGE)["posts"])
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return round(best * 1000, 3)
+
+
+def run(args):
+    load_app()
+    import db
+    import main
+    import queries
+    from excerpts import strip_html
+
+    env = Environment()
+    env.filters["strip_html"] = strip_html
+    old_item = env.from_string(OLD_ITEM)
+    results = {}
+    for body_kb in args.body_kb:
+        path = os.path.join(tempfile.mkdtemp(prefix="church-list-"), "church.db")
+        db.pool.close()
+        db.pool = db.ConnectionPool(path)
+        main.pool = db.pool
+        main.init_db()
+        conn = db.pool.connect()
+        fill(conn, args.posts, body_kb)
+        queries.row_counts.invalidate("pastoral_posts")
+        old_html, new_html = old_page(conn, old_item), new_page(db.pool, queries)
+        results[f"{body_kb}KB"] = {
+            "old_ms": timed(lambda: old_page(conn, old_item), args.repeat),
+            "new_ms": timed(lambda: new_page(db.pool, queries), args.repeat),
+            "same_html": old_html == new_html,
+        }
+        conn.close()
+    report(results)
+    if not all(result["same_html"] for result in results.values()):
+        raise SystemExit(1)
+
+
+def cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=2000)
+    parser.add_argument("--body-kb", type=int, nargs="+", default=[1, 20, 200])
+    parser.add_argument("--repeat", type=int, default=20)
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    cli()
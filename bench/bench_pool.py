@@ -0,0 +1,81 @@
+"""Compare requests/sec on / and /pastoral with and without the connection pool
+
+Usage: python -m bench.bench_pool [--requests 2000] [--concurrency 16]
+"""
+import argparse
+import asyncio
+import sqlite3
+from datetime import datetime, timedelta
+
+from bench.common import load_app, report
+from bench.driver import ASGIDriver
+
+
+class UnpooledConnectionPool:
+    """The pre-pool behaviour: a fresh default-pragma connection per request"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def reader(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path)
+
+    def write(self):
+        raise NotImplementedError("benchmark only exercises read routes")
+
+
+def seed(path: str, posts: int):
+    conn = sqlite3.connect(path)
+    start = datetime(2020, 1, 1)
+    conn.executemany(
+        "INSERT INTO pastoral_posts (title, content, image_path, author, views, created_at) VALUES (?, ?, ?, ?, 0, ?)",
+        [(f"목양의 글 {i}", "<p>" + "하나님의 사랑 " * 40 + "</p>", "/static/images/logo.png", "admin",
+          (start + timedelta(days=i)).strftime("%Y-%m-%d")) for i in range(posts)],
+    )
+    from search import fill_search_bodies
+    fill_search_bodies(conn.cursor())
+    conn.commit()
+    conn.close()
+
+
+async def run(args):
+    main = load_app()
+    import db
+
+    driver = ASGIDriver(main.app)
+    await driver.startup()
+    seed(db.DB_PATH, args.posts)
+
+    results = {}
+    for mode in ("before", "after"):
+        if mode == "before":
+            conn = sqlite3.connect(db.DB_PATH)
+            conn.execute("PRAGMA journal_mode=DELETE")
+            conn.close()
+            db.pool.close()
+            db.pool = UnpooledConnectionPool(db.DB_PATH)
+        else:
+            db.pool = db.ConnectionPool(db.DB_PATH)
+        results[mode] = {}
+        for url in ("/", "/pastoral"):
+            await driver.load(url, 50, args.concurrency)
+            results[mode][url] = await driver.load(url, args.requests, args.concurrency)
+
+    results["speedup"] = {
+        url: round(results["after"][url]["rps"] / results["before"][url]["rps"], 2)
+        for url in ("/", "/pastoral")
+    }
+    await driver.shutdown()
+    report(results)
+
+
+def cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--posts", type=int, default=500)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    cli()
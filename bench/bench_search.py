@@ -0,0 +1,104 @@
+"""Pastoral search: LIKE over HTML content vs. the FTS5 trigram index
+
+Builds a synthetic archive of Korean posts and times the old LIKE query
+against queries.pastoral_page for a few representative search terms.
+
+Usage: python -m bench.bench_search [--posts 10000 100000] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from bench.common import load_app, report
+
+COMMON = ("하나님의", "사랑", "은혜", "말씀", "기도", "예배", "공동체", "복음", "소망", "믿음")
+SYLLABLES = "가나다라마바사아자차카타파하고노도로모보소오조초코토포호구누두루무부수우주"
+# A common word, a rare word, two-character words (grams), a phrase, a one-character term (LIKE), a miss
+QUERIES = ("공동체", "{rare}", "사랑", "은혜 기도", "하나님의 사랑", "나", "없는검색어")
+PER_PAGE = 20
+
+
+def vocabulary(rng: random.Random, size: int = 5000):
+    return ["".join(rng.choice(SYLLABLES) for _ in range(rng.randint(3, 4))) for _ in range(size)]
+
+
+def fill(conn: sqlite3.Connection, posts: int, seed: int = 7):
+    words = vocabulary(random.Random(seed))
+    rng = random.Random(seed + 1)
+    start = datetime(2000, 1, 1)
+    rows = []
+    for i in range(posts):
+        paragraphs = "".join(
+            "<p>" + " ".join(rng.choice(COMMON) if rng.random() < 0.2 else rng.choice(words)
+                           for _ in range(40)) + "</p>" for _ in range(5)
+        )
+        rows.append((f"목양의 글 {i} {rng.choice(words)}", paragraphs + '<img src="/uploads/x.png">',
+                     None, "admin", (start + timedelta(hours=i)).strftime("%Y-%m-%d")))
+    conn.executemany(
+        "INSERT INTO pastoral_posts (title, content, image_path, author, views, created_at) VALUES (?, ?, ?, ?, 0, ?)",
+        rows)
+    from search import fill_search_bodies
+    fill_search_bodies(conn.cursor())
+    conn.commit()
+
+
+def like_search(conn: sqlite3.Connection, q: str):
+    search = f"%{q}%"
+    total = conn.execute("SELECT COUNT(*) FROM pastoral_posts WHERE title LIKE ? OR content LIKE ?",
+                         (search, search)).fetchone()[0]
+    conn.execute("SELECT * FROM pastoral_posts WHERE title LIKE ? OR content LIKE ? ORDER BY created_at DESC LIMIT ? OFFSET 0",
+                 (search, search, PER_PAGE)).fetchall()
+    return total
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return round(best * 1000, 3)
+
+
+def run(args):
+    load_app()
+    import db
+    import main
+    import queries
+
+    results = {}
+    for posts in args.posts:
+        path = os.path.join(tempfile.mkdtemp(prefix="church-search-"), "church.db")
+        db.pool.close()
+        db.pool = db.ConnectionPool(path)
+        main.pool = db.pool
+        main.init_db()
+        conn = db.pool.connect()
+        started = time.perf_counter()
+        fill(conn, posts)
+        results[posts] = {"insert_s_with_triggers": round(time.perf_counter() - started, 2)}
+        rare = vocabulary(random.Random(7))[0]
+        for q in (q.format(rare=rare) for q in QUERIES):
+            results[posts][q] = {
+                "like_ms": timed(lambda: like_search(conn, q), args.repeat),
+                "fts_ms": timed(lambda: queries.pastoral_page(db.pool, 1, PER_PAGE, q), args.repeat),
+                "fts_total": queries.pastoral_page(db.pool, 1, PER_PAGE, q)["total"],
+                "like_total": like_search(conn, q),
+            }
+        conn.close()
+    report(results)
+
+
+def cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,143 @@
+"""Homepage and admin data with stored YouTube ids vs. regex parsing per row
+
+"before" re-creates the old read path: SELECT * and up to five
+uncompiled regexes per row on every request. "after" is queries.home_data
+/ admin_dashboard_data reading the youtube_id and thumbnail columns.
+
+Usage: python -m bench.bench_youtube [--rows 200] [--repeat 200]
+"""
+import argparse
+import re
+import time
+
+from bench.common import load_app, report
+
+URLS = (
+    "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+    "https://youtu.be/p1H6GPhqE-U?si=YzYgySlrIRbgCFDz",
+    "https://youtube.com/shorts/pwBEmlFKc2g?si=dVuAYcN2oMgGlXVH",
+    "https://www.youtube.com/live/2yjRBwmC28I?si=HVsv8BXBVOyy9XIJ",
+)
+
+
+def old_extract_youtube_id(url):
+    """The extractor as it was: pattern strings compiled (or cache-looked-up) on every call"""
+    patterns = [
+        r'(?:https?:\/\/)?(?:www\.)?youtube\.com\/watch\?v=([a-zA-Z0-9_-]{11})',
+        r'(?:https?:\/\/)?(?:www\.)?youtu\.be\/([a-zA-Z0-9_-]{11})',
+        r'(?:https?:\/\/)?(?:www\.)?youtube\.com\/embed\/([a-zA-Z0-9_-]{11})',
+        r'(?:https?:\/\/)?(?:www\.)?youtube\.com\/shorts\/([a-zA-Z0-9_-]+)',
+        r'(?:https?:\/\/)?(?:www\.)?youtube\.com\/live\/([a-zA-Z0-9_-]{11})'
+    ]
+    for pattern in patterns:
+        match = re.search(pattern, url)
+        if match:
+            return match.group(1)
+    return None
+
+
+def old_videos(cursor, table, limit=None):
+    cursor.execute(f"SELECT * FROM {table} ORDER BY date DESC" + (f" LIMIT {limit}" if limit else ""))
+    rows = []
+    for row in cursor.fetchall():
+        url = row[5] if table == "sermons" else row[2]
+        video_id = old_extract_youtube_id(url) if url else None
+        rows.append({"id": row[0], "title": row[1], "youtube_url": url, "youtube_id": video_id,
+                     "thumbnail": f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg" if video_id else None})
+    return rows
+
+
+def old_home_videos(db):
+    cursor = db.reader().cursor()
+    return [old_videos(cursor, "visions", 5), old_videos(cursor, "sermons", 5),
+            old_videos(cursor, "shorts", 10), old_videos(cursor, "qtys", 10)]
+
+
+def old_admin_videos(db):
+    cursor = db.reader().cursor()
+    return [old_videos(cursor, table) for table in ("visions", "sermons", "shorts", "qtys")]
+
+
+def new_admin_videos(db):
+    from queries import SERMON_COLUMNS, VIDEO_COLUMNS, _sermon, _video
+
+    cursor = db.reader().cursor()
+    return [[_video(row) for row in cursor.execute(f"SELECT {VIDEO_COLUMNS} FROM {table} ORDER BY date DESC")]
+            for table in ("visions", "shorts", "qtys")] + \
+        [[_sermon(row) for row in cursor.execute(f"SELECT {SERMON_COLUMNS} FROM sermons ORDER BY date DESC")]]
+
+
+def seed(db, rows: int):
+    from youtube import youtube_fields
+
+    with db.write() as conn:
+        for table in ("visions", "shorts", "qtys"):
+            conn.executemany(
+                f"INSERT INTO {table} (title, youtube_url, youtube_id, thumbnail, date, author) VALUES (?, ?, ?, ?, ?, 'admin')",
+                [(f"영상 {i}", URLS[i % len(URLS)], *youtube_fields(URLS[i % len(URLS)]), f"2025-{i % 12 + 1:02d}-01")
+                 for i in range(rows)])
+        conn.executemany(
+            "INSERT INTO sermons (title, pastor, date, description, youtube_url, youtube_id, thumbnail) VALUES (?, '목사', ?, '', ?, ?, ?)",
+            [(f"설교 {i}", f"2025-{i % 12 + 1:02d}-01", URLS[i % len(URLS)], *youtube_fields(URLS[i % len(URLS)]))
+             for i in range(rows)])
+
+
+def timed(fn, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return round((time.perf_counter() - started) / repeat * 1000, 4)
+
+
+def run(args):
+    main = load_app()
+    import db
+    import queries
+    from youtube import extract_youtube_id
+
+    main.init_db()
+    seed(db.pool, args.rows)
+    template = main.templates.get_template("index.html")
+    t = main.get_t("ko")
+
+    def render_after():
+        template.render(t=t, lp="", user=None, request=None, **queries.home_data(db.pool))
+
+    # Everything home_data reads besides the four video lists, unchanged
+    # by this work, so "before" pays only for its own video path
+    def other_home_data():
+        cursor = db.pool.reader().cursor()
+        intro = cursor.execute("SELECT content FROM church_info WHERE id=1").fetchone()
+        news = cursor.execute("SELECT * FROM news ORDER BY date DESC LIMIT 5").fetchall()
+        return {"church_intro": intro[0], "news_list": [
+            {"id": r[0], "title": r[1], "content": r[2], "date": r[3], "views": r[4], "author": r[5], "image_path": r[6]}
+            for r in news]}
+
+    def render_before():
+        data = other_home_data()
+        data["visions"], data["sermons"], data["shorts"], data["qtys"] = old_home_videos(db.pool)
+        template.render(t=t, lp="", user=None, request=None, **data)
+
+    results = {
+        "extract_us": {
+            "before": round(timed(lambda: [old_extract_youtube_id(u) for u in URLS], args.repeat * 50) * 1000 / len(URLS), 3),
+            "after": round(timed(lambda: [extract_youtube_id(u) for u in URLS], args.repeat * 50) * 1000 / len(URLS), 3),
+        },
+        "home_render_ms": {"before": timed(render_before, args.repeat), "after": timed(render_after, args.repeat)},
+        f"admin_video_lists_ms ({args.rows} rows x 4 tables)": {
+            "before": timed(lambda: old_admin_videos(db.pool), max(1, args.repeat // 10)),
+            "after": timed(lambda: new_admin_videos(db.pool), max(1, args.repeat // 10)),
+        },
+    }
+    report(results)
+
+
+def cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=200)
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,25 @@
+"""Shared setup for benchmark scripts"""
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def load_app(db_path: str = None):
+    """Import main against a throwaway database and return the module"""
+    if db_path is None:
+        db_path = os.path.join(tempfile.mkdtemp(prefix="church-bench-"), "church.db")
+    os.environ["DB_PATH"] = db_path
+    os.chdir(ROOT)
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+    import main
+    return main
+
+
+def report(results: dict):
+    """Print benchmark results as JSON"""
+    print(json.dumps(results, indent=2, ensure_ascii=False))
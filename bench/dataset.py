@@ -0,0 +1,169 @@
+"""Synthetic congregation-scale database for benchmarks and load tests
+
+Fills a fresh church.db (schema from main.init_db) with deterministic
+data: `--years` of weekly sermons, monthly vision videos, shorts and
+daily QTs, weekly news, pastoral posts with Korean HTML bodies, members,
+users and comments. Comments are skewed towards recent posts, so the
+newest threads have thousands of entries like a popular post would.
+Derived columns (excerpts, search text, YouTube ids, comment counts) are
+filled the way the write paths fill them.
+
+Every account, admin included, gets the password BENCH_PASSWORD.
+
+Usage: python -m bench.dataset [--db bench/data/church.db] [--scale 1.0] [--posts 50000] [--comments 1000000]
+"""
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from bench.bench_search import COMMON, vocabulary
+from bench.common import ROOT, load_app, report
+
+BENCH_PASSWORD = "bench-password"
+DEFAULT_DB = ROOT / "bench" / "data" / "church.db"
+# Newest content is dated the day before this, so runs are reproducible
+END = datetime(2026, 1, 1)
+BATCH = 50000
+
+
+def _youtube_url(rng: random.Random) -> str:
+    alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+    return "https://www.youtube.com/watch?v=" + "".join(rng.choice(alphabet) for _ in range(11))
+
+
+def _sentence(rng: random.Random, words: list, length: int) -> str:
+    return " ".join(rng.choice(COMMON) if rng.random() < 0.2 else rng.choice(words) for _ in range(length))
+
+
+def _dates(count: int, years: int, fmt: str = "%Y-%m-%d") -> list:
+    """`count` dates spread evenly over the last `years` years, oldest first"""
+    span = timedelta(days=365 * years).total_seconds()
+    start = END - timedelta(seconds=span)
+    return [(start + timedelta(seconds=span * (i + 1) / (count + 1))).strftime(fmt) for i in range(count)]
+
+
+def volumes(args) -> dict:
+    scaled = lambda n: max(1, int(n * args.scale))
+    return {
+        "sermons": scaled(52 * args.years),
+        "visions": scaled(12 * args.years),
+        "shorts": scaled(150 * args.years),
+        "qtys": scaled(365 * args.years),
+        "news": scaled(52 * args.years),
+        "pastoral_posts": scaled(args.posts),
+        "members": args.members,
+        "users": scaled(args.users),
+        "comments": scaled(args.comments),
+    }
+
+
+def fill(conn, counts: dict, years: int, seed: int):
+    from excerpts import text_fields
+    from main import hash_password
+    from search import fill_search_bodies
+    from youtube import fill_youtube_columns
+
+    rng = random.Random(seed)
+    words = vocabulary(random.Random(seed))
+
+    sermon_dates = _dates(counts["sermons"], years)
+    conn.executemany("INSERT INTO sermons (title, pastor, date, description, youtube_url) VALUES (?, ?, ?, ?, ?)",
+                     [(f"주일 설교 {i}: {_sentence(rng, words, 3)}", "담임목사", date,
+                       _sentence(rng, words, 120), _youtube_url(rng)) for i, date in enumerate(sermon_dates)])
+    for table, label in (("visions", "비전"), ("shorts", "쇼츠"), ("qtys", "오늘의 큐티")):
+        conn.executemany(f"INSERT INTO {table} (title, youtube_url, date, author) VALUES (?, ?, ?, 'admin')",
+                         [(f"{label} {i}", _youtube_url(rng), date)
+                          for i, date in enumerate(_dates(counts[table], years))])
+    fill_youtube_columns(conn.cursor())
+
+    conn.executemany("INSERT INTO news (title, content, date, views, author) VALUES (?, ?, ?, ?, 'admin')",
+                     [(f"교회 소식 {i}", f"<p>{_sentence(rng, words, 80)}</p>", date, rng.randint(0, 500))
+                      for i, date in enumerate(_dates(counts["news"], years))])
+
+    post_dates = _dates(counts["pastoral_posts"], years, "%Y-%m-%d %H:%M:%S")
+    for offset in range(0, len(post_dates), BATCH):
+        rows = []
+        for i, created_at in enumerate(post_dates[offset:offset + BATCH], offset):
+            content = "".join(f"<p>{_sentence(rng, words, 40)}</p>" for _ in range(rng.randint(2, 8)))
+            rows.append((f"목양의 글 {i} {rng.choice(words)}", content, "담임목사", rng.randint(0, 2000), created_at,
+                         *text_fields(content)))
+        conn.executemany("""
+            INSERT INTO pastoral_posts (title, content, author, views, created_at, excerpt, text_length, reading_minutes)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+
+    conn.executemany("INSERT INTO members (name, role, bio, display_order) VALUES (?, ?, ?, ?)",
+                     [(f"섬김이 {i}", rng.choice(("장로", "권사", "집사", "교사")), _sentence(rng, words, 10), i)
+                      for i in range(counts["members"])])
+
+    password = hash_password(BENCH_PASSWORD)
+    conn.execute("UPDATE users SET password=? WHERE role='admin'", (password,))
+    joined = _dates(counts["users"], years, "%Y-%m-%dT%H:%M:%S")
+    conn.executemany("INSERT INTO users (username, password, role, created_at, name, email) VALUES (?, ?, 'user', ?, ?, ?)",
+                     [(f"member{i}", password, created_at, f"성도 {i}", f"member{i}@example.com")
+                      for i, created_at in enumerate(joined)])
+    user_ids = [row[0] for row in conn.execute("SELECT id FROM users")]
+
+    # 80% on pastoral posts, the rest on news; cubing the uniform draw piles comments onto recent posts
+    threads = [("pastoral", [row for row in conn.execute("SELECT id, created_at FROM pastoral_posts ORDER BY id")]),
+               ("news", [row for row in conn.execute("SELECT id, date FROM news ORDER BY id")])]
+    for offset in range(0, counts["comments"], BATCH):
+        rows = []
+        for _ in range(min(BATCH, counts["comments"] - offset)):
+            post_type, posts = threads[0] if rng.random() < 0.8 else threads[1]
+            post_id, posted = posts[len(posts) - 1 - int(len(posts) * rng.random() ** 3)]
+            created_at = datetime.fromisoformat(posted) + timedelta(minutes=rng.randint(1, 60 * 24 * 30))
+            rows.append((post_type, post_id, rng.choice(user_ids), _sentence(rng, words, rng.randint(3, 25)),
+                         created_at.isoformat()))
+        conn.executemany("INSERT INTO comments (post_type, post_id, user_id, content, created_at) VALUES (?, ?, ?, ?, ?)",
+                         rows)
+    for table, post_type in (("news", "news"), ("pastoral_posts", "pastoral")):
+        conn.execute(f"""
+            UPDATE {table} SET comment_count = (
+                SELECT COUNT(*) FROM comments WHERE post_type = '{post_type}' AND post_id = {table}.id)
+        """)
+    fill_search_bodies(conn.cursor())
+    conn.commit()
+
+
+def generate(path, counts: dict, years: int, seed: int = 7) -> dict:
+    """Create `path` from scratch and fill it; returns the row counts and timing"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{path}{suffix}").unlink(missing_ok=True)
+    main = load_app(str(path))
+    main.init_db()
+    conn = main.pool.connect()
+    conn.execute("PRAGMA synchronous = OFF")
+    started = time.perf_counter()
+    fill(conn, counts, years, seed)
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+    return {"db": str(path), "rows": counts, "fill_s": round(time.perf_counter() - started, 1),
+            "size_mb": round(os.path.getsize(path) / 1024 / 1024, 1)}
+
+
+def add_arguments(parser: argparse.ArgumentParser, scale: float = 1.0):
+    parser.add_argument("--scale", type=float, default=scale, help="multiplier for every volume below but --members")
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--posts", type=int, default=50000)
+    parser.add_argument("--comments", type=int, default=1000000)
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--members", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=7)
+
+
+def cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=str(DEFAULT_DB))
+    add_arguments(parser)
+    args = parser.parse_args()
+    report(generate(args.db, volumes(args), args.years, args.seed))
+
+
+if __name__ == "__main__":
+    cli()
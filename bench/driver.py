@@ -0,0 +1,127 @@
+"""In-process ASGI load driver (no sockets, no extra dependencies)"""
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+
+class ASGIDriver:
+    """Send requests straight into an ASGI app and collect latencies"""
+
+    def __init__(self, app):
+        self.app = app
+        self._lifespan_task = None
+        self._lifespan_queue = None
+
+    async def startup(self):
+        """Run the app's lifespan startup handlers"""
+        self._lifespan_queue = asyncio.Queue()
+        started = asyncio.Event()
+
+        async def receive():
+            return await self._lifespan_queue.get()
+
+        async def send(message):
+            if message["type"] in ("lifespan.startup.complete", "lifespan.startup.failed"):
+                started.set()
+
+        scope = {"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}
+        self._lifespan_task = asyncio.create_task(self.app(scope, receive, send))
+        await self._lifespan_queue.put({"type": "lifespan.startup"})
+        await started.wait()
+
+    async def shutdown(self):
+        """Run the app's lifespan shutdown handlers"""
+        if self._lifespan_task is None:
+            return
+        await self._lifespan_queue.put({"type": "lifespan.shutdown"})
+        await self._lifespan_task
+        self._lifespan_task = None
+
+    async def request(self, method: str, url: str, headers=None, body: bytes = b""):
+        """Issue one request and return (status, headers, body)"""
+        parts = urlsplit(url)
+        raw_headers = [(b"host", b"bench")]
+        for name, value in (headers or {}).items():
+            raw_headers.append((name.lower().encode("latin-1"), value.encode("latin-1")))
+        if body:
+            raw_headers.append((b"content-length", str(len(body)).encode()))
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": parts.path,
+            "raw_path": parts.path.encode(),
+            "query_string": parts.query.encode(),
+            "root_path": "",
+            "headers": raw_headers,
+            "client": ("127.0.0.1", 50000),
+            "server": ("bench", 80),
+        }
+        sent = False
+        status = 0
+        response_headers = []
+        chunks = []
+
+        async def receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await asyncio.Event().wait()
+
+        async def send(message):
+            nonlocal status, response_headers
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_headers = message.get("headers", [])
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, send)
+        decoded = {k.decode("latin-1"): v.decode("latin-1") for k, v in response_headers}
+        return status, decoded, b"".join(chunks)
+
+    async def load(self, url: str, requests: int, concurrency: int, method: str = "GET", headers=None):
+        """Fire `requests` requests with `concurrency` in flight and return stats"""
+        return await self.mix(lambda _: (method, url, headers, b""), requests, concurrency)
+
+    async def mix(self, next_request, requests: int, concurrency: int):
+        """Like load(), with next_request(i) -> (method, url, headers, body) picking the i-th request"""
+        latencies = []
+        statuses = {}
+        remaining = iter(range(requests))
+
+        async def worker():
+            for i in remaining:
+                method, url, headers, body = next_request(i)
+                started = time.perf_counter()
+                status, _, _ = await self.request(method, url, headers, body)
+                latencies.append(time.perf_counter() - started)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        return summarize(latencies, elapsed, statuses)
+
+
+def percentile(sorted_values, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(latencies, elapsed: float, statuses=None) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "elapsed_s": round(elapsed, 4),
+        "rps": round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+        "statuses": statuses or {},
+    }
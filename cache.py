@@ -0,0 +1,95 @@
+"""In-process cache of rendered HTML, invalidated by the tables a page reads"""
+import os
+import threading
+import time
+from typing import Callable, Iterable, Optional
+
+PAGE_CACHE_TTL = float(os.getenv("PAGE_CACHE_TTL", "300"))
+
+
+class PageCache:
+    """Rendered page bodies keyed by (route, lang).
+
+    Each entry remembers which tables it was built from, so a write to one
+    table only drops the pages that show it. Entries also expire after
+    `ttl` seconds to bound staleness of things nobody invalidates (view
+    counts). Only touched from the event loop thread, so no locking.
+
+    Each entry is also stored with the `version` (the page's ETag) that
+    was current before its data was read, and get() only returns it for
+    the same version. A page can then never go out under a newer ETag
+    than its content: not after another worker's write this worker
+    hasn't invalidated yet, and not when a write commits while the page
+    renders.
+    """
+
+    def __init__(self, ttl: float = PAGE_CACHE_TTL):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries = {}
+
+    def get(self, key, version: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic() or entry[3] != version:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key, body: bytes, tables: Iterable[str], version: str):
+        if self.ttl > 0:
+            self._entries[key] = (time.monotonic() + self.ttl, body, frozenset(tables), version)
+
+    def invalidate(self, *tables: str):
+        """Drop every entry built from any of the given tables"""
+        stale = [key for key, entry in self._entries.items() if entry[2].intersection(tables)]
+        for key in stale:
+            del self._entries[key]
+        self.invalidations += len(stale)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "ttl": self.ttl,
+        }
+
+
+class RowCounts:
+    """Cached `SELECT COUNT(*)` per table.
+
+    Loaded on first use and then adjusted by the handlers that insert or
+    delete rows, so list pages don't re-count the table on every request.
+    Read from db executor threads, hence the lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def get(self, table: str, load: Callable[[], int]) -> int:
+        with self._lock:
+            if table not in self._counts:
+                self._counts[table] = load()
+            return self._counts[table]
+
+    def adjust(self, table: str, delta: int):
+        with self._lock:
+            if table in self._counts:
+                self._counts[table] = max(0, self._counts[table] + delta)
+
+    def invalidate(self, *tables: str):
+        with self._lock:
+            for table in tables:
+                self._counts.pop(table, None)
+
+
+page_cache = PageCache()
+row_counts = RowCounts()
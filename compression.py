@@ -0,0 +1,254 @@
+"""Response compression: gzip/brotli for dynamic responses, precompressed siblings for static files
+
+CompressionMiddleware compresses HTML/JSON/CSS/JS responses for clients
+that accept it, preferring brotli (when the brotli package is installed)
+over gzip. Responses under COMPRESS_MIN_SIZE bytes, already-encoded
+responses, partial (206) responses and non-text types pass through
+unchanged: a byte range is a slice of the identity body, so it can't be
+compressed after the fact. Compressed responses drop Accept-Ranges.
+
+PrecompressedStaticFiles serves `style.css.br` or `style.css.gz` in place
+of `style.css` when the client accepts it, so static assets are
+compressed once at build time at the highest level instead of per
+request. The siblings are written by the build step:
+
+Usage: python -m compression [directory ...]   (default: static)
+"""
+import gzip
+import os
+import re
+import sys
+import zlib
+from collections import OrderedDict
+from mimetypes import guess_type
+from pathlib import Path
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "5"))
+# Recently compressed bodies kept for reuse (page cache hits send identical bytes)
+COMPRESS_MEMO_SIZE = int(os.getenv("COMPRESS_MEMO_SIZE", "32"))
+
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "application/xml", "image/svg+xml")
+# Build-step input: what a text type above maps to on disk
+COMPRESSIBLE_SUFFIXES = (".css", ".js", ".html", ".json", ".svg", ".txt", ".xml", ".map")
+
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+_TOKEN_RE = re.compile(r"\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*")
+
+
+def negotiate(accept_encoding: str, available=ENCODINGS):
+    """Best of `available` (in preference order) the Accept-Encoding header allows, or None"""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        match = _TOKEN_RE.fullmatch(part)
+        if match:
+            try:
+                accepted[match.group(1)] = float(match.group(2) or 1)
+            except ValueError:
+                continue
+    for encoding in available:
+        if accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return None
+
+
+def compress(data: bytes, encoding: str, level: int = None) -> bytes:
+    """One-shot compression (`level` defaults to the configured one)"""
+    if encoding == "br":
+        return brotli.compress(data, quality=COMPRESS_BROTLI_QUALITY if level is None else level)
+    return gzip.compress(data, compresslevel=COMPRESS_GZIP_LEVEL if level is None else level, mtime=0)
+
+
+class _Memo:
+    """Small LRU of (encoding, body) -> compressed body, touched only from the event loop"""
+
+    def __init__(self, size: int = COMPRESS_MEMO_SIZE):
+        self.size = size
+        self._entries = OrderedDict()
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        key = (encoding, body)
+        compressed = self._entries.get(key)
+        if compressed is None:
+            compressed = compress(body, encoding)
+            if self.size > 0:
+                self._entries[key] = compressed
+                if len(self._entries) > self.size:
+                    self._entries.popitem(last=False)
+        else:
+            self._entries.move_to_end(key)
+        return compressed
+
+
+def _compressor(encoding: str):
+    if encoding == "br":
+        return brotli.Compressor(quality=COMPRESS_BROTLI_QUALITY)
+    # wbits 16 + MAX_WBITS writes a gzip header and trailer
+    return zlib.compressobj(COMPRESS_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+
+def _add_vary(headers: MutableHeaders):
+    vary = headers.get("vary")
+    if not vary:
+        headers["Vary"] = "Accept-Encoding"
+    elif "accept-encoding" not in vary.lower():
+        headers["Vary"] = f"{vary}, Accept-Encoding"
+
+
+def _compressible(status: int, headers: MutableHeaders) -> bool:
+    if status in (204, 206, 304) or "content-range" in headers or "content-encoding" in headers:
+        return False
+    return headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing text responses for clients that accept it.
+
+    Single-message bodies are compressed in one go (reusing the result
+    for a repeat of the same body) and keep a Content-Length; streamed
+    bodies are compressed chunk by chunk.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESS_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.memo = _Memo()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        await self.app(scope, receive, _CompressingSend(send, encoding, self.minimum_size, self.memo))
+
+
+class _CompressingSend:
+    """The `send` of one response: holds the start message until the first body chunk decides"""
+
+    def __init__(self, send, encoding: Optional[str], minimum_size: int, memo: _Memo):
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.memo = memo
+        self.start = None
+        self.compressor = None
+        self.passthrough = False
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.compressor is None:
+            headers = MutableHeaders(scope=self.start)
+            if not _compressible(self.start["status"], headers):
+                self.passthrough = True
+            else:
+                # Set even when not compressing, so a shared cache keeps the variants apart
+                _add_vary(headers)
+                if self.encoding is None or (not more_body and len(body) < self.minimum_size):
+                    self.passthrough = True
+            if self.passthrough:
+                await self.send(self.start)
+                await self.send(message)
+                return
+            headers["Content-Encoding"] = self.encoding
+            # Ranges would index the identity bytes, not the ones sent
+            del headers["Accept-Ranges"]
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = "W/" + etag  # the encoded bytes differ from the original
+            if not more_body:
+                body = self.memo.compress(body, self.encoding)
+                headers["Content-Length"] = str(len(body))
+                await self.send(self.start)
+                await self.send({"type": "http.response.body", "body": body})
+                self.passthrough = True
+                return
+            del headers["Content-Length"]
+            self.compressor = _compressor(self.encoding)
+            await self.send(self.start)
+        if self.encoding == "br":
+            chunk = self.compressor.process(body) + (b"" if more_body else self.compressor.finish())
+        else:
+            chunk = self.compressor.compress(body) + (self.compressor.flush() if not more_body else b"")
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that answers with a `.br`/`.gz` sibling when one exists and the client accepts it.
+
+    Range requests always get the original file, so resumed downloads
+    and range reads see the same bytes whatever was negotiated before.
+    """
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        encoding = negotiate(request_headers.get("accept-encoding", ""))
+        if encoding is None or "range" in request_headers or not str(full_path).endswith(COMPRESSIBLE_SUFFIXES):
+            return super().file_response(full_path, stat_result, scope, status_code)
+        sibling = f"{full_path}{SUFFIXES[encoding]}"
+        try:
+            sibling_stat = os.stat(sibling)
+        except FileNotFoundError:
+            return super().file_response(full_path, stat_result, scope, status_code)
+        if sibling_stat.st_mtime < stat_result.st_mtime:  # stale: the original changed after the build
+            return super().file_response(full_path, stat_result, scope, status_code)
+        response = FileResponse(sibling, status_code=status_code, stat_result=sibling_stat,
+                                media_type=guess_type(str(full_path))[0] or "text/plain",
+                                headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"})
+        del response.headers["accept-ranges"]
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+def precompress(directory: Path) -> dict:
+    """Write max-level .gz (and .br) siblings for every text asset whose sibling is missing or stale.
+
+    A sibling that isn't smaller than the original is not kept.
+    """
+    stats = {"files": 0, "bytes": 0, **{encoding: 0 for encoding in ENCODINGS}}
+    for path in sorted(directory.rglob("*")):
+        if not path.is_file() or path.suffix not in COMPRESSIBLE_SUFFIXES:
+            continue
+        data = path.read_bytes()
+        stats["files"] += 1
+        stats["bytes"] += len(data)
+        for encoding in ENCODINGS:
+            sibling = path.with_name(path.name + SUFFIXES[encoding])
+            if sibling.exists() and sibling.stat().st_mtime >= path.stat().st_mtime:
+                stats[encoding] += sibling.stat().st_size
+                continue
+            compressed = compress(data, encoding, level=11 if encoding == "br" else 9)
+            if len(compressed) >= len(data):
+                sibling.unlink(missing_ok=True)
+                stats[encoding] += len(data)
+                continue
+            tmp = sibling.with_name(f".{sibling.name}.{os.getpid()}.tmp")
+            tmp.write_bytes(compressed)
+            os.replace(tmp, sibling)
+            stats[encoding] += len(compressed)
+    return stats
+
+
+if __name__ == "__main__":
+    for directory in sys.argv[1:] or ["static"]:
+        print(directory, precompress(Path(directory)))
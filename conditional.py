@@ -0,0 +1,126 @@
+"""Conditional GET for rendered pages: weak ETags and Last-Modified from content versions
+
+Every content table has a row in content_versions that triggers bump on
+insert, update and delete, so a page's version is the versions of the
+tables it is built from. Reading them is one indexed query; a
+revalidation that still matches is answered 304 before the page queries
+run or the template renders.
+
+The validators also cover the templates and static assets (a digest in
+the ETag, their newest mtime as a floor for Last-Modified), so a deploy
+that changes markup or an asset_url() fingerprint doesn't leave browsers
+revalidating into old HTML.
+
+View-count flushes don't bump versions, so a browser may keep showing a
+slightly old count until the content itself changes (the page cache
+already allows the same staleness).
+"""
+import functools
+import hashlib
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Iterable, Optional
+
+from fastapi import Request, Response
+
+from assets import asset_manifest
+from counters import COUNTED_TABLES
+
+TEMPLATE_DIR = Path("templates")
+
+# Tables public pages are rendered from
+CONTENT_TABLES = ("church_info", "church_about", "visions", "sermons", "shorts", "qtys",
+                  "news", "pastoral_posts", "members", "comments")
+
+_BUMP = "UPDATE content_versions SET version = version + 1, updated_at = CAST(strftime('%s', 'now') AS INTEGER) WHERE name = '{table}';"
+
+
+def version_triggers(table: str) -> str:
+    """Triggers bumping a table's content version (view-count updates excluded)"""
+    bump = _BUMP.format(table=table)
+    only_content = " WHEN old.views IS new.views" if table in COUNTED_TABLES else ""
+    return f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_version_ai AFTER INSERT ON {table} BEGIN {bump} END;
+        CREATE TRIGGER IF NOT EXISTS {table}_version_au AFTER UPDATE ON {table}{only_content} BEGIN {bump} END;
+        CREATE TRIGGER IF NOT EXISTS {table}_version_ad AFTER DELETE ON {table} BEGIN {bump} END;
+    """
+
+
+@functools.lru_cache(maxsize=None)
+def release() -> tuple:
+    """(digest, newest mtime) of the templates and static assets this process renders with"""
+    digest = hashlib.sha1()
+    newest = 0
+    for path in sorted(TEMPLATE_DIR.rglob("*.html")):
+        digest.update(path.read_bytes())
+        newest = max(newest, int(path.stat().st_mtime))
+    for original, name in asset_manifest.manifest().items():
+        digest.update(name.encode())
+        newest = max(newest, int((asset_manifest.directory / original).stat().st_mtime))
+    return digest.hexdigest(), newest
+
+
+class PageValidators:
+    """ETag and Last-Modified of one page, and the 304 that goes with them.
+
+    Pages that render the logged-in user (`personalized`) fold the user
+    into the ETag and send Vary: Cookie, so a copy cached before logging
+    in or out never validates afterwards. They get no Last-Modified,
+    whose one-second date can't tell two users' pages apart.
+    """
+
+    def __init__(self, etag: str, last_modified: Optional[int], personalized: bool):
+        self.etag = etag
+        self.last_modified = last_modified if not personalized else None
+        self.personalized = personalized
+
+    def headers(self) -> dict:
+        headers = {"ETag": self.etag, "Cache-Control": "private, no-cache" if self.personalized else "no-cache"}
+        if self.personalized:
+            headers["Vary"] = "Cookie"
+        if self.last_modified is not None:
+            headers["Last-Modified"] = formatdate(self.last_modified, usegmt=True)
+        return headers
+
+    def is_fresh(self, request: Request) -> bool:
+        """Whether the client's cached copy is still current (If-None-Match wins over If-Modified-Since)"""
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            # Weak comparison: a W/ prefix on either side is ignored
+            return "*" in tags or self.etag.removeprefix("W/") in {tag.removeprefix("W/") for tag in tags}
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since is None or self.last_modified is None:
+            return False
+        try:
+            return self.last_modified <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+
+    def not_modified(self) -> Response:
+        return Response(status_code=304, headers=self.headers())
+
+    def apply(self, response: Response) -> Response:
+        response.headers.update(self.headers())
+        return response
+
+
+def page_validators(request: Request, versions: Iterable[tuple], user: Optional[dict] = None,
+                    personalized: bool = False) -> PageValidators:
+    """Validators for the page at request.url built from `versions` (content_versions rows).
+
+    The URL (path and query string) is part of the ETag, so each page of
+    a list and each language gets its own.
+    """
+    versions = sorted(versions)
+    release_digest, released_at = release()
+    digest = hashlib.sha1(release_digest.encode())
+    digest.update(request.url.path.encode())
+    digest.update(request.url.query.encode())
+    for name, version, _ in versions:
+        digest.update(f"|{name}:{version}".encode())
+    if personalized and user:
+        digest.update(f"|user:{user['id']}:{user['role']}".encode())
+    last_modified = max((updated_at for _, _, updated_at in versions), default=released_at)
+    last_modified = max(last_modified, released_at)
+    return PageValidators(f'W/"{digest.hexdigest()[:20]}"', last_modified, personalized)
@@ -0,0 +1,61 @@
+"""Buffered view counters: page views are batched in memory instead of UPDATE-per-GET"""
+import os
+import threading
+from collections import defaultdict
+
+from db import ConnectionPool
+
+VIEW_FLUSH_INTERVAL = float(os.getenv("VIEW_FLUSH_INTERVAL", "10"))
+VIEW_FLUSH_THRESHOLD = int(os.getenv("VIEW_FLUSH_THRESHOLD", "200"))
+
+# Tables with a `views` column that the counter may update
+COUNTED_TABLES = ("news", "pastoral_posts")
+
+
+class ViewCounter:
+    """Pending view increments per (table, row id), flushed as one write.
+
+    `lock` must be held while reading a row's stored views and adding the
+    pending count, so a concurrent flush can never be seen half-applied:
+    flush holds the same lock across its UPDATE, commit and reset.
+    """
+
+    def __init__(self, flush_threshold: int = VIEW_FLUSH_THRESHOLD):
+        self.flush_threshold = flush_threshold
+        self.lock = threading.Lock()
+        self._pending = defaultdict(int)
+        self._events = 0
+
+    def add(self, table: str, row_id: int) -> int:
+        """Count one view and return the row's pending total (lock held)"""
+        self._pending[(table, row_id)] += 1
+        self._events += 1
+        return self._pending[(table, row_id)]
+
+    def pending(self, table: str, row_id: int) -> int:
+        """Views not yet written for a row (for list pages; may briefly lag a flush)"""
+        return self._pending.get((table, row_id), 0)
+
+    def flush_if_due(self, db: ConnectionPool):
+        if self._events >= self.flush_threshold:
+            self.flush(db)
+
+    def flush(self, db: ConnectionPool) -> int:
+        """Write all pending increments in one transaction; returns views flushed"""
+        with self.lock:
+            if not self._pending:
+                return 0
+            by_table = defaultdict(list)
+            for (table, row_id), count in self._pending.items():
+                by_table[table].append((count, row_id))
+            with db.write() as conn:
+                for table, rows in by_table.items():
+                    assert table in COUNTED_TABLES
+                    conn.executemany(f"UPDATE {table} SET views = views + ? WHERE id=?", rows)
+            flushed = self._events
+            self._pending.clear()
+            self._events = 0
+            return flushed
+
+
+view_counter = ViewCounter()
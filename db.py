@@ -0,0 +1,134 @@
+"""SQLite connection pool shared by all request handlers"""
+import asyncio
+import contextvars
+import functools
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import profiling
+from metrics import db_calls
+from excerpts import strip_html
+from sqlstats import SQL_INSTRUMENT, InstrumentedConnection
+
+DB_PATH = os.getenv("DB_PATH", "church.db")
+
+# Upper bound on blocking DB calls running at once; further calls queue
+# in the executor instead of stalling the event loop.
+DB_MAX_WORKERS = int(os.getenv("DB_MAX_WORKERS", "8"))
+
+# Applied to every connection the pool opens. WAL lets readers and the single
+# writer run concurrently; synchronous=NORMAL is durable under WAL except for
+# the last transaction on power loss, which is acceptable for this site.
+PRAGMAS = (
+    ("journal_mode", "WAL"),
+    ("synchronous", os.getenv("DB_SYNCHRONOUS", "NORMAL")),
+    ("cache_size", int(os.getenv("DB_CACHE_SIZE_KB", "16384")) * -1),
+    ("mmap_size", int(os.getenv("DB_MMAP_SIZE", str(64 * 1024 * 1024)))),
+    ("temp_store", "MEMORY"),
+    ("busy_timeout", int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))),
+)
+
+
+class ConnectionPool:
+    """Per-thread read connections plus one serialized writer connection"""
+
+    def __init__(self, path: str, max_workers: int = DB_MAX_WORKERS):
+        self.path = path
+        self.max_workers = max_workers
+        self._executor = None
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._writer = None
+        self._connections = []
+        self._connections_lock = threading.Lock()
+
+    def connect(self) -> sqlite3.Connection:
+        """Open a new connection with the pool's pragmas applied"""
+        conn = sqlite3.connect(self.path, check_same_thread=False,
+                               factory=InstrumentedConnection if SQL_INSTRUMENT else sqlite3.Connection)
+        # Only used by migration 3 on a fresh database (the search triggers as first shipped)
+        conn.create_function("strip_html", 1, strip_html, deterministic=True)
+        for name, value in PRAGMAS:
+            conn.execute(f"PRAGMA {name}={value}")
+        return conn
+
+    def _open(self) -> sqlite3.Connection:
+        conn = self.connect()
+        with self._connections_lock:
+            self._connections.append(conn)
+        return conn
+
+    def reader(self) -> sqlite3.Connection:
+        """Return this thread's read connection, opening it on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._open()
+        return conn
+
+    @contextmanager
+    def write(self):
+        """Yield the writer connection, committing on success"""
+        with self._write_lock:
+            if self._writer is None:
+                self._writer = self._open()
+            try:
+                yield self._writer
+                self._writer.commit()
+            except BaseException:
+                self._writer.rollback()
+                raise
+
+    async def run(self, fn, *args):
+        """Run fn(pool, *args) on the DB executor and await its result.
+
+        fn sees the caller's context variables (the request's SQL stats),
+        and a profiled request's sampler follows it onto the DB thread.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="db")
+        loop = asyncio.get_running_loop()
+        call = functools.partial(contextvars.copy_context().run, fn, self, *args)
+        profile = profiling.current()
+        if profile is not None:
+            call = profile.on_thread(call)
+        started = time.perf_counter()
+        try:
+            return await loop.run_in_executor(self._executor, call)
+        finally:
+            db_calls.observe((getattr(fn, "__name__", "call"),), time.perf_counter() - started)
+
+    async def execute(self, sql: str, params=()):
+        """Run a single write statement on the DB executor"""
+        return await self.run(_execute_write, sql, params)
+
+    def stats(self) -> dict:
+        return {"connections": len(self._connections)}
+
+    def close(self):
+        """Close every connection opened by the pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._writer = None
+        self._local = threading.local()
+
+
+def _execute_write(db: ConnectionPool, sql: str, params):
+    with db.write() as conn:
+        return conn.execute(sql, params).lastrowid
+
+
+pool = ConnectionPool(DB_PATH)
+
+
+def get_db() -> ConnectionPool:
+    """FastAPI dependency returning the shared connection pool"""
+    return pool
@@ -0,0 +1,249 @@
+"""Responsive image derivatives: resized AVIF/WebP variants plus a JPEG/PNG fallback
+
+Variants are generated in the background after an upload (or in bulk by
+the backfill CLI), written to UPLOAD_DIR/variants and recorded in the
+image_variants table. Templates call picture() to emit a <picture>
+element with a srcset per format. Images without variants, including
+external URLs, fall back to a plain <img>.
+
+Every page renders picture(), so image_variants has a content version
+(VARIANTS_VERSION) that pages add to their ETag, and a worker reloads
+its index before rendering whenever it is older than that version.
+Whichever worker renders a page, its markup matches its ETag.
+
+Usage: python -m images [--force]   (backfill variants for existing images)
+"""
+import argparse
+import asyncio
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+from markupsafe import Markup, escape
+
+from db import ConnectionPool, get_db
+from uploads import UPLOAD_DIR, UPLOAD_URL_PREFIX
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # variants are skipped and pages use the originals
+    Image = None
+
+IMAGE_WIDTHS = tuple(int(w) for w in os.getenv("IMAGE_WIDTHS", "120,320,640,1280").split(","))
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "1"))
+IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", "80"))
+
+VARIANT_DIR = UPLOAD_DIR / "variants"
+VARIANT_URL_PREFIX = UPLOAD_URL_PREFIX + "variants/"
+STATIC_URL_PREFIX = "/static/"
+
+# Animated GIFs would lose their animation, so they are served as uploaded
+SOURCE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+MIME_TYPES = {"avif": "image/avif", "webp": "image/webp", "jpeg": "image/jpeg", "png": "image/png"}
+EXTENSIONS = {"avif": "avif", "webp": "webp", "jpeg": "jpg", "png": "png"}
+
+# content_versions row bumped by the image_variants triggers (migration 17)
+VARIANTS_VERSION = "image_variants"
+
+logger = logging.getLogger(__name__)
+
+
+def source_path(url: str) -> Optional[Path]:
+    """Local file behind an /uploads or /static URL (None for anything else)"""
+    if not url or Path(url).suffix.lower() not in SOURCE_EXTENSIONS:
+        return None
+    if url.startswith(VARIANT_URL_PREFIX):
+        return None
+    if url.startswith(UPLOAD_URL_PREFIX):
+        path = UPLOAD_DIR / url[len(UPLOAD_URL_PREFIX):]
+    elif url.startswith(STATIC_URL_PREFIX):
+        path = Path("static") / url[len(STATIC_URL_PREFIX):]
+    else:
+        return None
+    return path if ".." not in path.parts else None
+
+
+def variant_prefix(url: str, path: Path) -> str:
+    """Name prefix for url's variants; the URL hash keeps same-named images in different folders apart"""
+    return f"{path.stem}-{hashlib.sha256(url.encode()).hexdigest()[:8]}"
+
+
+def _formats(has_alpha: bool) -> tuple:
+    modern = ("avif", "webp") if features.check("avif") else ("webp",)
+    return modern + ("png" if has_alpha else "jpeg",)
+
+
+def _save(image, path: Path, fmt: str):
+    # No exif= argument: EXIF (camera, GPS) is dropped from every variant
+    if fmt == "jpeg":
+        image.convert("RGB").save(path, "JPEG", quality=IMAGE_QUALITY, optimize=True, progressive=True)
+    elif fmt == "png":
+        image.save(path, "PNG", optimize=True)
+    elif fmt == "webp":
+        image.save(path, "WEBP", quality=IMAGE_QUALITY)
+    else:
+        image.save(path, "AVIF", quality=IMAGE_QUALITY - 20)
+
+
+def generate_variants(url: str, widths=IMAGE_WIDTHS) -> list:
+    """Write the variants of one image; returns (width, format, url, bytes) rows"""
+    path = source_path(url)
+    if Image is None or path is None or not path.exists():
+        return []
+    VARIANT_DIR.mkdir(parents=True, exist_ok=True)
+    prefix = variant_prefix(url, path)
+    rows = []
+    with Image.open(path) as original:
+        image = ImageOps.exif_transpose(original)
+        has_alpha = image.mode in ("RGBA", "LA") or "transparency" in image.info
+        image = image.convert("RGBA" if has_alpha else "RGB")
+        targets = [w for w in widths if w < image.width] or [image.width]
+        for width in targets:
+            resized = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+            for fmt in _formats(has_alpha):
+                name = f"{prefix}-{width}w.{EXTENSIONS[fmt]}"
+                tmp = VARIANT_DIR / f".{name}.{os.getpid()}.tmp"
+                _save(resized, tmp, fmt)
+                os.replace(tmp, VARIANT_DIR / name)
+                rows.append((width, fmt, VARIANT_URL_PREFIX + name, (VARIANT_DIR / name).stat().st_size))
+    return rows
+
+
+def record_variants(db: ConnectionPool, url: str, rows: list):
+    with db.write() as conn:
+        conn.execute("DELETE FROM image_variants WHERE source = ?", (url,))
+        conn.executemany("INSERT INTO image_variants (source, width, format, path, bytes) VALUES (?, ?, ?, ?, ?)",
+                         [(url, *row) for row in rows])
+
+
+class ImageProcessor:
+    """Background variant generation plus the in-memory index templates read.
+
+    The index is loaded from image_variants at startup, and again by
+    sync() when a page is about to be rendered under a newer
+    VARIANTS_VERSION, for instance after another worker finished an image.
+    """
+
+    def __init__(self, max_workers: int = IMAGE_WORKERS):
+        self.max_workers = max_workers
+        self._executor = None
+        self._variants = {}
+        self._version = None  # VARIANTS_VERSION the index was loaded at
+        self._pending = set()  # claimed: don't queue the same image twice
+        self._loading = None
+        self._tasks = set()
+
+    def load(self, db: ConnectionPool):
+        conn = db.reader()
+        # Version first: rows read after it are at least that new, never older
+        row = conn.execute("SELECT version FROM content_versions WHERE name = ?", (VARIANTS_VERSION,)).fetchone()
+        variants = {}
+        for source, width, fmt, path in conn.execute(
+                "SELECT source, width, format, path FROM image_variants ORDER BY source, width"):
+            variants.setdefault(source, []).append((width, fmt, path))
+        self._variants = variants
+        self._version = row[0] if row else None
+
+    async def sync(self, db: ConnectionPool, versions: list):
+        """Reload the index unless it is at the VARIANTS_VERSION among `versions` (a page's ETag input)"""
+        version = next((v for name, v, _ in versions if name == VARIANTS_VERSION), None)
+        if version is None or version == self._version:
+            return
+        if self._loading is None:  # one reload for all the requests that notice
+            self._loading = asyncio.ensure_future(db.run(self.load))
+            self._loading.add_done_callback(lambda _: setattr(self, "_loading", None))
+        await asyncio.shield(self._loading)
+
+    def schedule(self, url: Optional[str]):
+        """Generate variants for url in the background unless it has them already"""
+        if Image is None or url in self._variants or url in self._pending or source_path(url) is None:
+            return
+        self._pending.add(url)
+        task = asyncio.create_task(self._process(url))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _process(self, url: str):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="images")
+        try:
+            rows = await asyncio.get_running_loop().run_in_executor(self._executor, generate_variants, url)
+            await get_db().run(record_variants, url, rows)
+        except Exception:
+            logger.exception("image variants failed for %s", url)
+            return
+        finally:
+            self._pending.discard(url)
+        self._variants[url] = [(width, fmt, path) for width, fmt, path, _ in rows]
+
+    async def close(self):
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def picture(self, url: Optional[str], alt: str = "", sizes: str = "100vw", **attrs) -> Markup:
+        """<picture> with AVIF/WebP/fallback srcsets for url (Jinja global).
+
+        Extra keyword arguments become <img> attributes; use class_ for class.
+        """
+        img_attrs = "".join(f' {escape(k.rstrip("_"))}="{escape(v)}"' for k, v in attrs.items())
+        variants = self._variants.get(url)
+        if not variants:
+            return Markup(f'<img src="{escape(url or "")}" alt="{escape(alt)}"{img_attrs}>')
+        by_format = {}
+        for width, fmt, path in variants:
+            by_format.setdefault(fmt, []).append(f"{path} {width}w")
+        fallback = "png" if "png" in by_format else "jpeg"
+        sources = "".join(
+            f'<source type="{MIME_TYPES[fmt]}" srcset="{escape(", ".join(by_format[fmt]))}" sizes="{escape(sizes)}">'
+            for fmt in ("avif", "webp") if fmt in by_format)
+        fallback_set = ", ".join(by_format.get(fallback, []))
+        # display: contents keeps the <img> laid out as if <picture> weren't there
+        return Markup(
+            f'<picture style="display: contents">{sources}'
+            f'<img src="{escape(url)}" srcset="{escape(fallback_set)}" sizes="{escape(sizes)}" alt="{escape(alt)}"{img_attrs}>'
+            f'</picture>')
+
+
+image_processor = ImageProcessor()
+
+
+def backfill(db: ConnectionPool, force: bool = False) -> dict:
+    """Generate variants for every upload and static image that lacks them"""
+    done = {row[0] for row in db.reader().execute("SELECT DISTINCT source FROM image_variants")}
+    urls = [UPLOAD_URL_PREFIX + p.name for p in sorted(UPLOAD_DIR.iterdir()) if p.is_file()]
+    urls += [STATIC_URL_PREFIX + p.relative_to("static").as_posix() for p in sorted(Path("static").rglob("*"))]
+    stats = {"processed": 0, "skipped": 0, "source_bytes": 0, "variant_bytes": 0}
+    for url in urls:
+        if source_path(url) is None or (url in done and not force):
+            stats["skipped"] += 1
+            continue
+        rows = generate_variants(url)
+        record_variants(db, url, rows)
+        stats["processed"] += 1
+        stats["source_bytes"] += source_path(url).stat().st_size
+        stats["variant_bytes"] += sum(row[3] for row in rows)
+        print(f"{url}: {len(rows)} variants")
+    return stats
+
+
+if __name__ == "__main__":
+    from db import pool
+    from migrations import migrate
+
+    parser = argparse.ArgumentParser(description="Backfill responsive image variants")
+    parser.add_argument("--force", action="store_true", help="regenerate images that already have variants")
+    args = parser.parse_args()
+    if Image is None:
+        raise SystemExit("Pillow is not installed")
+    conn = pool.connect()
+    migrate(conn)
+    conn.close()
+    print(backfill(pool, args.force))
+    pool.close()
@@ -0,0 +1,56 @@
+"""Cross-worker cache invalidation from the content_versions change log
+
+Each uvicorn worker has its own page cache and row counts, and a write
+handler only invalidates those of the worker that ran it. Cached pages
+can't go stale anyway: they are keyed by the ETag built from
+content_versions, so another worker's write turns them into misses.
+What this adds is the rest. Stale pages are freed instead of sitting
+until their TTL, and row counts (which have no version) are reloaded.
+
+Every content write already bumps its table's row in content_versions
+(conditional.py triggers), so the database itself is the bus: each
+worker polls `PRAGMA data_version` on a connection of its own every
+INVALIDATION_INTERVAL seconds. That value only moves when another
+connection has committed, so an idle site costs one pragma per poll.
+When it moves, the worker reads content_versions and drops the cached
+pages and counts of exactly the tables whose version changed.
+"""
+import os
+import sqlite3
+from typing import Optional
+
+from db import ConnectionPool
+
+INVALIDATION_INTERVAL = float(os.getenv("INVALIDATION_INTERVAL", "1"))
+
+
+class ChangeWatcher:
+    """Tables whose content version moved since the last poll, for any writer in any process"""
+
+    def __init__(self):
+        self._conn: Optional[sqlite3.Connection] = None
+        self._data_version = None
+        self._versions = {}
+
+    def poll(self, db: ConnectionPool) -> set:
+        """Run on the DB executor, one poll at a time; the first poll only takes the baseline"""
+        if self._conn is None:
+            # data_version is per connection, and the pool's readers change with the executor thread
+            self._conn = db.connect()
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            return set()
+        self._data_version = data_version
+        versions = dict(self._conn.execute("SELECT name, version FROM content_versions"))
+        changed = {name for name, version in versions.items()
+                   if name in self._versions and self._versions[name] != version}
+        self._versions = versions
+        return changed
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+change_watcher = ChangeWatcher()
@@ -1,19 +1,28 @@
 from fastapi import FastAPI, Request, Depends, HTTPException, Form, UploadFile, File, status
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, FileResponse, PlainTextResponse
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 import sqlite3
 from datetime import datetime
-from pathlib import Path
 import hashlib
+import asyncio
+import logging
 import bcrypt
-import secrets
-import shutil
 import re
 from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+
+from api import router as api_router
+from assets import AssetStaticFiles, asset_manifest
+from compression import CompressionMiddleware
+import metrics
+from metrics import METRICS_WRITE_INTERVAL, MetricsMiddleware
+from profiling import FORMATS as PROFILE_FORMATS, ProfilerMiddleware, download as profile_download, profile_store
+from sqlstats import SQL_INSTRUMENT, SQLTimingMiddleware
 
 app = FastAPI(title="더하는 교회")
+logger = logging.getLogger(__name__)
 
 # ─── i18n translations ───────────────────────────────────────────────
 TRANSLATIONS = {
@@ -124,6 +133,7 @@ TRANSLATIONS = {
         "pastoral_date_label": "&#128197; 작성일:",
         "pastoral_views_label": "&#128065; 조회수:",
         "pastoral_default_author": "관리자",
+        "pastoral_reading_time": "{n}분 분량",
         # Comments
         "comments_title": "댓글",
         "no_comments": "아직 댓글이 없습니다.",
@@ -134,6 +144,8 @@ TRANSLATIONS = {
         "comment_login_suffix": "해 주세요.",
         "comment_delete": "삭제",
         "comment_delete_confirm": "댓글을 삭제하시겠습니까?",
+        "comments_more": "댓글 더 보기",
+        "comments_first": "처음 댓글부터 보기",
         # News detail
         "news_author_label": "작성자:",
         "news_date_label": "작성일:",
@@ -278,6 +290,7 @@ TRANSLATIONS = {
         "pastoral_date_label": "&#128197; Date:",
         "pastoral_views_label": "&#128065; Views:",
         "pastoral_default_author": "Admin",
+        "pastoral_reading_time": "{n} min read",
         # Comments
         "comments_title": "Comments",
         "no_comments": "No comments yet.",
@@ -288,6 +301,8 @@ TRANSLATIONS = {
         "comment_login_suffix": "to write a comment.",
         "comment_delete": "Delete",
         "comment_delete_confirm": "Are you sure you want to delete this comment?",
+        "comments_more": "More comments",
+        "comments_first": "Back to the first comments",
         # News detail
         "news_author_label": "Author:",
         "news_date_label": "Date:",
@@ -335,23 +350,46 @@ def get_lang_prefix(lang: str) -> str:
     """Get URL prefix for language"""
     return "/en" if lang == "en" else ""
 
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.add_middleware(CompressionMiddleware)
+if SQL_INSTRUMENT:
+    # is_admin is defined with the other auth helpers below
+    app.add_middleware(SQLTimingMiddleware, authorize=lambda request: is_admin(request))
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(ProfilerMiddleware, authorize=lambda request: is_admin(request))
+app.mount("/static", AssetStaticFiles(directory="static", manifest=asset_manifest), name="static")
 app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+app.include_router(api_router)
 templates = Jinja2Templates(directory="templates")
 
 import os
-DB_PATH = os.getenv("DB_PATH", "church.db")
-UPLOAD_DIR = Path("uploads")
-UPLOAD_DIR.mkdir(exist_ok=True)
+from db import DB_PATH, ConnectionPool, get_db, pool
+import queries
+from migrations import migrate
+from youtube import fill_youtube_columns, youtube_fields
+from excerpts import text_fields
+from search import fill_search_bodies, search_columns
+from cache import page_cache, row_counts
+from conditional import page_validators
+from counters import view_counter, VIEW_FLUSH_INTERVAL
+from uploads import UploadRejected, upload_store
+from images import VARIANTS_VERSION, image_processor
+from invalidation import INVALIDATION_INTERVAL, change_watcher
+from thumbs import THUMB_IS_WEBP, thumbnail_cache
+from sessions import SESSION_COOKIE, SESSION_SWEEP_INTERVAL, SESSION_TTL, session_store
+
+templates.env.globals["picture"] = image_processor.picture
+templates.env.globals["asset_url"] = asset_manifest.url
 
 security = HTTPBasic()
 
-# Session storage (in production, use Redis or database)
-sessions = {}
+# bcrypt work factor and the pool that runs it off the event loop
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", "2"))
+BCRYPT_MAX_PENDING = int(os.getenv("BCRYPT_MAX_PENDING", "8"))
 
 def hash_password(password: str) -> str:
     """Hash password using bcrypt"""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(BCRYPT_ROUNDS)).decode('utf-8')
 
 def verify_password(password: str, hashed: str) -> bool:
     """Verify password against bcrypt hash"""
@@ -368,180 +406,46 @@ def verify_sha256(password: str, hashed: str) -> bool:
     """Verify password against legacy SHA-256 hash"""
     return hashlib.sha256(password.encode()).hexdigest() == hashed
 
-def extract_youtube_id(url: str) -> Optional[str]:
-    """Extract YouTube video ID from URL (including Shorts and Live)"""
-    import re
-    patterns = [
-        r'(?:https?:\/\/)?(?:www\.)?youtube\.com\/watch\?v=([a-zA-Z0-9_-]{11})',
-        r'(?:https?:\/\/)?(?:www\.)?youtu\.be\/([a-zA-Z0-9_-]{11})',
-        r'(?:https?:\/\/)?(?:www\.)?youtube\.com\/embed\/([a-zA-Z0-9_-]{11})',
-        r'(?:https?:\/\/)?(?:www\.)?youtube\.com\/shorts\/([a-zA-Z0-9_-]+)',  # Shorts support
-        r'(?:https?:\/\/)?(?:www\.)?youtube\.com\/live\/([a-zA-Z0-9_-]{11})'  # Live support
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, url)
-        if match:
-            return match.group(1)
-    return None
+class PasswordHasherBusy(Exception):
+    """Raised when the password hashing queue is full"""
+
+class PasswordHasher:
+    """Runs bcrypt on a small thread pool with a bounded queue.
+
+    bcrypt releases the GIL, so worker threads hash in parallel with the
+    event loop. Once max_pending calls are in flight, new ones fail fast
+    with PasswordHasherBusy instead of queueing without limit.
+    """
+
+    def __init__(self, workers: int = BCRYPT_WORKERS, max_pending: int = BCRYPT_MAX_PENDING):
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="bcrypt")
+
+    async def _run(self, fn, *args):
+        # Only touched from the event loop thread, so no lock is needed
+        if self.pending >= self.max_pending:
+            raise PasswordHasherBusy()
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._run(verify_password, password, hashed)
+
+password_hasher = PasswordHasher()
 
 def init_db():
-    """Initialize the database with sample data"""
-    conn = sqlite3.connect(DB_PATH)
+    """Apply schema migrations, then seed sample data into an empty database"""
+    conn = pool.connect()
+    migrate(conn)
     cursor = conn.cursor()
 
-    # Users table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            role TEXT NOT NULL DEFAULT 'user',
-            created_at TEXT NOT NULL
-        )
-    """)
-
-    # Church info table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS church_info (
-            id INTEGER PRIMARY KEY,
-            content TEXT NOT NULL,
-            updated_at TEXT NOT NULL
-        )
-    """)
-
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS sermons (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            pastor TEXT NOT NULL,
-            date TEXT NOT NULL,
-            description TEXT,
-            youtube_url TEXT
-        )
-    """)
-
-    # Migration: Add youtube_url column if it doesn't exist
-    cursor.execute("PRAGMA table_info(sermons)")
-    columns = [column[1] for column in cursor.fetchall()]
-    if 'youtube_url' not in columns:
-        cursor.execute("ALTER TABLE sermons ADD COLUMN youtube_url TEXT")
-
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS news (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            content TEXT NOT NULL,
-            date TEXT NOT NULL,
-            views INTEGER DEFAULT 0,
-            author TEXT,
-            image_path TEXT
-        )
-    """)
-
-    # Vision table for YouTube videos
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS visions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            youtube_url TEXT NOT NULL,
-            date TEXT NOT NULL,
-            author TEXT
-        )
-    """)
-
-    # Shorts table for YouTube Shorts
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS shorts (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            youtube_url TEXT NOT NULL,
-            date TEXT NOT NULL,
-            author TEXT
-        )
-    """)
-
-    # QTY (오늘의 큐티) table for YouTube videos
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS qtys (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            youtube_url TEXT NOT NULL,
-            date TEXT NOT NULL,
-            author TEXT
-        )
-    """)
-
-    # 목양의 窓 (Pastoral Window) board
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS pastoral_posts (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            content TEXT NOT NULL,
-            image_path TEXT,
-            author TEXT,
-            views INTEGER DEFAULT 0,
-            created_at TEXT NOT NULL
-        )
-    """)
-
-    # Church About table for vision and missions
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS church_about (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            vision_title TEXT NOT NULL,
-            vision_content TEXT NOT NULL,
-            mission_content TEXT NOT NULL,
-            pastoral_direction TEXT NOT NULL DEFAULT '',
-            serving_people TEXT NOT NULL DEFAULT '',
-            updated_at TEXT NOT NULL
-        )
-    """)
-    
-    # Add new columns if they don't exist
-    try:
-        cursor.execute("ALTER TABLE church_about ADD COLUMN pastoral_direction TEXT NOT NULL DEFAULT ''")
-    except sqlite3.OperationalError:
-        pass
-    
-    try:
-        cursor.execute("ALTER TABLE church_about ADD COLUMN serving_people TEXT NOT NULL DEFAULT ''")
-    except sqlite3.OperationalError:
-        pass
-
-    # Members table (섬기는 분들)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS members (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            role TEXT NOT NULL,
-            bio TEXT NOT NULL DEFAULT '',
-            photo_path TEXT,
-            display_order INTEGER DEFAULT 0
-        )
-    """)
-
-    # Comments table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS comments (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            post_type TEXT NOT NULL,
-            post_id INTEGER NOT NULL,
-            user_id INTEGER NOT NULL,
-            content TEXT NOT NULL,
-            created_at TEXT NOT NULL
-        )
-    """)
-
-    # Migration: Add name and email columns to users table
-    try:
-        cursor.execute("ALTER TABLE users ADD COLUMN name TEXT NOT NULL DEFAULT ''")
-    except sqlite3.OperationalError:
-        pass
-    try:
-        cursor.execute("ALTER TABLE users ADD COLUMN email TEXT DEFAULT ''")
-    except sqlite3.OperationalError:
-        pass
-
     # Check if admin exists
     cursor.execute("SELECT COUNT(*) FROM users WHERE role='admin'")
     if cursor.fetchone()[0] == 0:
@@ -626,241 +530,287 @@ def init_db():
             VALUES
             ('요엘', 'https://youtube.com/shorts/pwBEmlFKc2g?si=dVuAYcN2oMgGlXVH', '2026-02-16', 'admin')
         """)
+        fill_youtube_columns(cursor)
+        fill_search_bodies(cursor)
 
     conn.commit()
     conn.close()
 
-def get_current_user(request: Request) -> Optional[dict]:
-    """Get current logged in user from session"""
-    session_token = request.cookies.get("session_token")
-    if session_token and session_token in sessions:
-        return sessions[session_token]
-    return None
+async def get_current_user(request: Request) -> Optional[dict]:
+    """Get current logged in user from session (looked up once per request)"""
+    if not hasattr(request.state, "user"):
+        session_token = request.cookies.get(SESSION_COOKIE)
+        request.state.user = await session_store.get(session_token) if session_token else None
+    return request.state.user
 
-def require_admin(request: Request):
+async def require_admin(request: Request):
     """Require admin role"""
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user or user['role'] != 'admin':
         raise HTTPException(status_code=403, detail="Admin access required")
     return user
 
+async def is_admin(request: Request) -> bool:
+    """require_admin as a yes/no, for the ?_profile= switch and SQL in Server-Timing"""
+    try:
+        await require_admin(request)
+    except HTTPException:
+        return False
+    return True
+
+@app.exception_handler(UploadRejected)
+async def upload_rejected_handler(request: Request, exc: UploadRejected):
+    return HTMLResponse(exc.message, status_code=exc.status_code)
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    """Too many logins/registrations in flight: ask the client to retry shortly"""
+    return HTMLResponse("잠시 후 다시 시도해 주세요. / Please try again in a moment.",
+                        status_code=503, headers={"Retry-After": "2"})
+
+async def flush_views_periodically():
+    """Write buffered view counts every VIEW_FLUSH_INTERVAL seconds"""
+    while True:
+        await asyncio.sleep(VIEW_FLUSH_INTERVAL)
+        try:
+            await pool.run(view_counter.flush)
+        except sqlite3.Error:
+            logger.exception("view counter flush failed")
+
+async def sweep_sessions_periodically():
+    """Delete expired sessions every SESSION_SWEEP_INTERVAL seconds"""
+    while True:
+        await asyncio.sleep(SESSION_SWEEP_INTERVAL)
+        try:
+            await session_store.sweep()
+        except Exception:
+            logger.exception("session sweep failed")
+
+async def watch_changes_periodically():
+    """Drop cached pages and row counts that other workers' writes made stale"""
+    while True:
+        await asyncio.sleep(INVALIDATION_INTERVAL)
+        try:
+            changed = await pool.run(change_watcher.poll)
+            if changed:
+                page_cache.invalidate(*changed)
+                row_counts.invalidate(*changed)
+            if VARIANTS_VERSION in changed:  # pages without an ETag pick up new variants too
+                await pool.run(image_processor.load)
+        except Exception:
+            logger.exception("change watch failed")
+
+async def write_metrics_periodically():
+    """Publish this worker's metrics for /metrics on the other workers"""
+    while True:
+        await asyncio.sleep(METRICS_WRITE_INTERVAL)
+        try:
+            await asyncio.to_thread(metrics.registry.write, metrics.registry.snapshot())
+        except OSError:
+            logger.exception("metrics write failed")
+
+def collect_metrics():
+    """Mirror cache and pool state into the metrics before each snapshot"""
+    cache_stats = page_cache.stats()
+    metrics.page_cache_lookups.set(("hit",), cache_stats["hits"])
+    metrics.page_cache_lookups.set(("miss",), cache_stats["misses"])
+    metrics.page_cache_entries.set((), cache_stats["entries"])
+    metrics.thumbnail_cache_bytes.set((), thumbnail_cache.stats()["bytes"])
+    metrics.db_connections.set((), pool.stats()["connections"])
+
+metrics.registry.on_collect(collect_metrics)
+
+background_tasks = set()
+
 @app.on_event("startup")
 async def startup_event():
     init_db()
-
-async def _home(request: Request, lang: str = "ko"):
+    asset_manifest.manifest()
+    await pool.run(image_processor.load)
+    image_processor.schedule("/static/images/logo.png")
+    background_tasks.add(asyncio.create_task(flush_views_periodically()))
+    background_tasks.add(asyncio.create_task(sweep_sessions_periodically()))
+    await pool.run(change_watcher.poll)
+    background_tasks.add(asyncio.create_task(watch_changes_periodically()))
+    background_tasks.add(asyncio.create_task(write_metrics_periodically()))
+    await asyncio.to_thread(metrics.registry.remove_stale)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    for task in background_tasks:
+        task.cancel()
+    background_tasks.clear()
+    await image_processor.close()
+    await thumbnail_cache.close()
+    view_counter.flush(pool)
+    pool.close()
+    change_watcher.close()
+    upload_store.close()
+
+async def _validators(request: Request, db: ConnectionPool, tables: tuple, user: Optional[dict] = None,
+                      personalized: bool = False):
+    """ETag/Last-Modified for a page built from `tables` (checked before rendering)
+
+    Every page renders picture(), so image variants are part of each ETag,
+    and this worker's variant index is brought up to that version first.
+    """
+    versions = await db.run(queries.content_versions, tables + (VARIANTS_VERSION,))
+    await image_processor.sync(db, versions)
+    return page_validators(request, versions, user, personalized)
+
+async def _home(request: Request, db: ConnectionPool, lang: str = "ko"):
     """Main homepage (shared logic)"""
     t = get_t(lang)
     lp = get_lang_prefix(lang)
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    cursor.execute("SELECT content FROM church_info WHERE id=1")
-    result = cursor.fetchone()
-    church_intro = result[0] if result else "더하는 교회는 하나님의 사랑과 예수 그리스도의 복음을 전하는 믿음의 공동체입니다."
-
-    cursor.execute("SELECT * FROM visions ORDER BY date DESC LIMIT 5")
-    visions = []
-    for row in cursor.fetchall():
-        video_id = extract_youtube_id(row[2])
-        visions.append({
-            "id": row[0], "title": row[1], "youtube_url": row[2], "youtube_id": video_id,
-            "thumbnail": f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg" if video_id else None,
-            "date": row[3], "author": row[4] if len(row) > 4 else None
-        })
-
-    cursor.execute("SELECT * FROM sermons ORDER BY date DESC LIMIT 5")
-    sermons = []
-    for row in cursor.fetchall():
-        video_id = extract_youtube_id(row[5]) if len(row) > 5 and row[5] else None
-        sermons.append({
-            "id": row[0], "title": row[1], "pastor": row[2], "date": row[3],
-            "description": row[4], "youtube_url": row[5] if len(row) > 5 else None,
-            "youtube_id": video_id,
-            "thumbnail": f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg" if video_id else None
-        })
-
-    cursor.execute("SELECT * FROM shorts ORDER BY date DESC LIMIT 10")
-    shorts = []
-    for row in cursor.fetchall():
-        video_id = extract_youtube_id(row[2])
-        shorts.append({
-            "id": row[0], "title": row[1], "youtube_url": row[2], "youtube_id": video_id,
-            "thumbnail": f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg" if video_id else None,
-            "date": row[3], "author": row[4] if len(row) > 4 else None
-        })
-
-    cursor.execute("SELECT * FROM qtys ORDER BY date DESC LIMIT 10")
-    qtys = []
-    for row in cursor.fetchall():
-        video_id = extract_youtube_id(row[2])
-        qtys.append({
-            "id": row[0], "title": row[1], "youtube_url": row[2], "youtube_id": video_id,
-            "thumbnail": f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg" if video_id else None,
-            "date": row[3], "author": row[4] if len(row) > 4 else None
-        })
-
-    cursor.execute("SELECT * FROM news ORDER BY date DESC LIMIT 5")
-    news_list = [{"id": row[0], "title": row[1], "content": row[2], "date": row[3], "views": row[4], "author": row[5], "image_path": row[6]}
-                for row in cursor.fetchall()]
-
-    conn.close()
-    user = get_current_user(request)
-
-    return templates.TemplateResponse("index.html", {
-        "request": request, "t": t, "lp": lp,
-        "visions": visions, "sermons": sermons, "shorts": shorts,
-        "qtys": qtys, "news_list": news_list,
-        "church_intro": church_intro, "user": user
+    user = await get_current_user(request)
+    validators = await _validators(request, db, queries.HOME_TABLES, user, personalized=True)
+    if validators.is_fresh(request):
+        return validators.not_modified()
+    # Only anonymous visitors share a cached page; the nav differs when logged in
+    if user is None:
+        body = page_cache.get(("home", lang), validators.etag)
+        if body is not None:
+            return validators.apply(HTMLResponse(body))
+    data = await db.run(queries.home_data)
+
+    response = templates.TemplateResponse("index.html", {
+        "request": request, "t": t, "lp": lp, "user": user, **data
     })
+    if user is None:
+        page_cache.set(("home", lang), response.body, queries.HOME_TABLES, validators.etag)
+    return validators.apply(response)
 
 @app.get("/", response_class=HTMLResponse)
-async def home(request: Request):
-    return await _home(request, "ko")
+async def home(request: Request, db: ConnectionPool = Depends(get_db)):
+    return await _home(request, db, "ko")
 
 @app.get("/en/", response_class=HTMLResponse)
-async def home_en(request: Request):
-    return await _home(request, "en")
+async def home_en(request: Request, db: ConnectionPool = Depends(get_db)):
+    return await _home(request, db, "en")
 
-async def _about_page(request: Request, lang: str = "ko"):
+async def _about_page(request: Request, db: ConnectionPool, lang: str = "ko"):
     t = get_t(lang)
     lp = get_lang_prefix(lang)
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT vision_title, vision_content, mission_content, pastoral_direction, serving_people FROM church_about WHERE id=1")
-    row = cursor.fetchone()
-    conn.close()
-    about = {
-        "vision_title": row[0] if row else "더하는교회의 비전",
-        "vision_content": row[1] if row else "",
-        "mission_content": row[2] if row else "",
-        "pastoral_direction": row[3] if row else "",
-        "serving_people": row[4] if row else ""
-    }
-    return templates.TemplateResponse("about.html", {"request": request, "about": about, "t": t, "lp": lp})
+    validators = await _validators(request, db, ("church_about",))
+    if validators.is_fresh(request):
+        return validators.not_modified()
+    body = page_cache.get(("about", lang), validators.etag)
+    if body is not None:
+        return validators.apply(HTMLResponse(body))
+    about = await db.run(queries.about_data)
+    response = templates.TemplateResponse("about.html", {"request": request, "about": about, "t": t, "lp": lp})
+    page_cache.set(("about", lang), response.body, ("church_about",), validators.etag)
+    return validators.apply(response)
 
 @app.get("/about", response_class=HTMLResponse)
-async def about_page(request: Request):
-    return await _about_page(request, "ko")
+async def about_page(request: Request, db: ConnectionPool = Depends(get_db)):
+    return await _about_page(request, db, "ko")
 
 @app.get("/en/about", response_class=HTMLResponse)
-async def about_page_en(request: Request):
-    return await _about_page(request, "en")
+async def about_page_en(request: Request, db: ConnectionPool = Depends(get_db)):
+    return await _about_page(request, db, "en")
 
-async def _direction_page(request: Request, lang: str = "ko"):
+async def _direction_page(request: Request, db: ConnectionPool, lang: str = "ko"):
     t = get_t(lang)
     lp = get_lang_prefix(lang)
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT pastoral_direction FROM church_about WHERE id=1")
-    row = cursor.fetchone()
-    conn.close()
-    content = row[0] if row and row[0] else t["direction_preparing"]
-    return templates.TemplateResponse("direction.html", {"request": request, "content": content, "t": t, "lp": lp})
+    validators = await _validators(request, db, ("church_about",))
+    if validators.is_fresh(request):
+        return validators.not_modified()
+    body = page_cache.get(("direction", lang), validators.etag)
+    if body is not None:
+        return validators.apply(HTMLResponse(body))
+    content = await db.run(queries.pastoral_direction) or t["direction_preparing"]
+    response = templates.TemplateResponse("direction.html", {"request": request, "content": content, "t": t, "lp": lp})
+    page_cache.set(("direction", lang), response.body, ("church_about",), validators.etag)
+    return validators.apply(response)
 
 @app.get("/direction", response_class=HTMLResponse)
-async def direction_page(request: Request):
-    return await _direction_page(request, "ko")
+async def direction_page(request: Request, db: ConnectionPool = Depends(get_db)):
+    return await _direction_page(request, db, "ko")
 
 @app.get("/en/direction", response_class=HTMLResponse)
-async def direction_page_en(request: Request):
-    return await _direction_page(request, "en")
+async def direction_page_en(request: Request, db: ConnectionPool = Depends(get_db)):
+    return await _direction_page(request, db, "en")
 
-async def _people_page(request: Request, lang: str = "ko"):
+async def _people_page(request: Request, db: ConnectionPool, lang: str = "ko"):
     t = get_t(lang)
     lp = get_lang_prefix(lang)
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM members ORDER BY display_order ASC, id ASC")
-    members = [{"id": row[0], "name": row[1], "role": row[2], "bio": row[3],
-                "photo_path": row[4], "display_order": row[5]}
-               for row in cursor.fetchall()]
-    cursor.execute("SELECT serving_people FROM church_about WHERE id=1")
-    row = cursor.fetchone()
-    intro = row[0] if row and row[0] else ""
-    conn.close()
-    return templates.TemplateResponse("people.html", {"request": request, "members": members, "intro": intro, "t": t, "lp": lp})
+    validators = await _validators(request, db, ("members", "church_about"))
+    if validators.is_fresh(request):
+        return validators.not_modified()
+    body = page_cache.get(("people", lang), validators.etag)
+    if body is not None:
+        return validators.apply(HTMLResponse(body))
+    data = await db.run(queries.people_data)
+    response = templates.TemplateResponse("people.html", {"request": request, "t": t, "lp": lp, **data})
+    page_cache.set(("people", lang), response.body, ("members", "church_about"), validators.etag)
+    return validators.apply(response)
 
 @app.get("/people", response_class=HTMLResponse)
-async def people_page(request: Request):
-    return await _people_page(request, "ko")
+async def people_page(request: Request, db: ConnectionPool = Depends(get_db)):
+    return await _people_page(request, db, "ko")
 
 @app.get("/en/people", response_class=HTMLResponse)
-async def people_page_en(request: Request):
-    return await _people_page(request, "en")
+async def people_page_en(request: Request, db: ConnectionPool = Depends(get_db)):
+    return await _people_page(request, db, "en")
 
-async def _pastoral_list(request: Request, lang: str = "ko", page: int = 1, q: str = ""):
+async def _pastoral_list(request: Request, db: ConnectionPool, lang: str = "ko", page: int = 1, q: str = "",
+                         after: Optional[str] = None, before: Optional[str] = None):
     t = get_t(lang)
     lp = get_lang_prefix(lang)
     per_page = 20
-    offset = (page - 1) * per_page
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    if q.strip():
-        search = f"%{q.strip()}%"
-        cursor.execute("SELECT COUNT(*) FROM pastoral_posts WHERE title LIKE ? OR content LIKE ?", (search, search))
-        total = cursor.fetchone()[0]
-        cursor.execute("SELECT * FROM pastoral_posts WHERE title LIKE ? OR content LIKE ? ORDER BY created_at DESC LIMIT ? OFFSET ?",
-                        (search, search, per_page, offset))
-    else:
-        cursor.execute("SELECT COUNT(*) FROM pastoral_posts")
-        total = cursor.fetchone()[0]
-        cursor.execute("SELECT * FROM pastoral_posts ORDER BY created_at DESC LIMIT ? OFFSET ?", (per_page, offset))
-    posts = [{"id": row[0], "title": row[1], "content": row[2], "image_path": row[3],
-              "author": row[4], "views": row[5], "created_at": row[6]}
-             for row in cursor.fetchall()]
-    conn.close()
+    user = await get_current_user(request)
+    validators = await _validators(request, db, ("pastoral_posts",), user, personalized=True)
+    if validators.is_fresh(request):
+        return validators.not_modified()
+    data = await db.run(queries.pastoral_page, page, per_page, q, after, before)
+    total = data["total"]
     total_pages = max(1, (total + per_page - 1) // per_page)
-    user = get_current_user(request)
-    return templates.TemplateResponse("pastoral_list.html", {
-        "request": request, "posts": posts, "user": user, "t": t, "lp": lp,
-        "page": page, "total_pages": total_pages, "total": total, "q": q
-    })
+    if page > total_pages and not (after or before):
+        raise HTTPException(status_code=404, detail="Page not found")
+    return validators.apply(templates.TemplateResponse("pastoral_list.html", {
+        "request": request, "posts": data["posts"], "user": user, "t": t, "lp": lp,
+        "page": data["page"], "total_pages": total_pages, "total": total, "q": q,
+        "has_prev": data["has_prev"], "has_next": data["has_next"],
+        "prev_cursor": data["prev_cursor"], "next_cursor": data["next_cursor"]
+    }))
 
 @app.get("/pastoral", response_class=HTMLResponse)
-async def pastoral_list(request: Request, page: int = 1, q: str = ""):
-    return await _pastoral_list(request, "ko", page, q)
+async def pastoral_list(request: Request, page: int = 1, q: str = "", after: Optional[str] = None,
+                        before: Optional[str] = None, db: ConnectionPool = Depends(get_db)):
+    return await _pastoral_list(request, db, "ko", page, q, after, before)
 
 @app.get("/en/pastoral", response_class=HTMLResponse)
-async def pastoral_list_en(request: Request, page: int = 1, q: str = ""):
-    return await _pastoral_list(request, "en", page, q)
+async def pastoral_list_en(request: Request, page: int = 1, q: str = "", after: Optional[str] = None,
+                           before: Optional[str] = None, db: ConnectionPool = Depends(get_db)):
+    return await _pastoral_list(request, db, "en", page, q, after, before)
 
-async def _pastoral_detail(request: Request, post_id: int, lang: str = "ko"):
+async def _pastoral_detail(request: Request, db: ConnectionPool, post_id: int, lang: str = "ko",
+                           comments_after: Optional[str] = None):
     t = get_t(lang)
     lp = get_lang_prefix(lang)
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("UPDATE pastoral_posts SET views = views + 1 WHERE id=?", (post_id,))
-    conn.commit()
-    cursor.execute("SELECT * FROM pastoral_posts WHERE id=?", (post_id,))
-    row = cursor.fetchone()
-    if not row:
-        conn.close()
+    user = await get_current_user(request)
+    validators = await _validators(request, db, ("pastoral_posts", "comments"), user, personalized=True)
+    if validators.is_fresh(request):
+        await db.run(queries.count_view, "pastoral_posts", post_id)
+        return validators.not_modified()
+    data = await db.run(queries.view_pastoral_post, post_id, comments_after)
+    if not data:
         raise HTTPException(status_code=404, detail="Post not found")
-    post = {"id": row[0], "title": row[1], "content": row[2], "image_path": row[3],
-            "author": row[4], "views": row[5], "created_at": row[6]}
-    cursor.execute("""
-        SELECT c.id, c.content, c.created_at, u.username, u.name, c.user_id
-        FROM comments c JOIN users u ON c.user_id = u.id
-        WHERE c.post_type='pastoral' AND c.post_id=?
-        ORDER BY c.created_at ASC
-    """, (post_id,))
-    comments = [{"id": r[0], "content": r[1], "created_at": r[2],
-                 "username": r[3], "name": r[4], "user_id": r[5]}
-                for r in cursor.fetchall()]
-    conn.close()
-    user = get_current_user(request)
-    return templates.TemplateResponse("pastoral_detail.html", {
-        "request": request, "post": post, "comments": comments, "user": user, "t": t, "lp": lp
-    })
+    return validators.apply(templates.TemplateResponse("pastoral_detail.html", {
+        "request": request, "post": data["post"], "comments": data["comments"], "user": user, "t": t, "lp": lp,
+        "comments_after": comments_after, "next_comments": data["next_cursor"]
+    }))
 
 @app.get("/pastoral/{post_id}", response_class=HTMLResponse)
-async def pastoral_detail(request: Request, post_id: int):
-    return await _pastoral_detail(request, post_id, "ko")
+async def pastoral_detail(request: Request, post_id: int, comments: Optional[str] = None,
+                          db: ConnectionPool = Depends(get_db)):
+    return await _pastoral_detail(request, db, post_id, "ko", comments)
 
 @app.get("/en/pastoral/{post_id}", response_class=HTMLResponse)
-async def pastoral_detail_en(request: Request, post_id: int):
-    return await _pastoral_detail(request, post_id, "en")
+async def pastoral_detail_en(request: Request, post_id: int, comments: Optional[str] = None,
+                             db: ConnectionPool = Depends(get_db)):
+    return await _pastoral_detail(request, db, post_id, "en", comments)
 
 @app.get("/login", response_class=HTMLResponse)
 async def login_page(request: Request):
@@ -882,7 +832,7 @@ async def register_page_en(request: Request):
     t = get_t("en")
     return templates.TemplateResponse("register.html", {"request": request, "t": t, "lp": "/en"})
 
-async def _register_post(request: Request, lang: str, name: str, email: str, username: str, password: str, password_confirm: str):
+async def _register_post(request: Request, db: ConnectionPool, lang: str, name: str, email: str, username: str, password: str, password_confirm: str):
     t = get_t(lang)
     lp = get_lang_prefix(lang)
     errors = []
@@ -901,29 +851,17 @@ async def _register_post(request: Request, lang: str, name: str, email: str, use
             "request": request, "errors": errors, "t": t, "lp": lp,
             "name": name, "email": email, "username": username
         })
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT id FROM users WHERE username=?", (username,))
-    if cursor.fetchone():
-        conn.close()
-        return templates.TemplateResponse("register.html", {
-            "request": request, "errors": [t["err_username_taken"]], "t": t, "lp": lp,
-            "name": name, "email": email, "username": username
-        })
-    cursor.execute("SELECT id FROM users WHERE email=?", (email,))
-    if cursor.fetchone():
-        conn.close()
+    conflict = await db.run(queries.registration_conflict, username, email)
+    if conflict:
         return templates.TemplateResponse("register.html", {
-            "request": request, "errors": [t["err_email_taken"]], "t": t, "lp": lp,
+            "request": request, "errors": [t[f"err_{conflict}_taken"]], "t": t, "lp": lp,
             "name": name, "email": email, "username": username
         })
-    hashed = hash_password(password)
-    cursor.execute("""
+    hashed = await password_hasher.hash(password)
+    await db.execute("""
         INSERT INTO users (username, password, role, created_at, name, email)
         VALUES (?, ?, 'user', ?, ?, ?)
     """, (username, hashed, datetime.now().isoformat(), name.strip(), email))
-    conn.commit()
-    conn.close()
     return templates.TemplateResponse("login.html", {
         "request": request, "t": t, "lp": lp,
         "success": t["register_success"]
@@ -931,263 +869,201 @@ async def _register_post(request: Request, lang: str, name: str, email: str, use
 
 @app.post("/register")
 async def register(request: Request, name: str = Form(...), email: str = Form(...),
-                   username: str = Form(...), password: str = Form(...), password_confirm: str = Form(...)):
-    return await _register_post(request, "ko", name, email, username, password, password_confirm)
+                   username: str = Form(...), password: str = Form(...), password_confirm: str = Form(...), db: ConnectionPool = Depends(get_db)):
+    return await _register_post(request, db, "ko", name, email, username, password, password_confirm)
 
 @app.post("/en/register")
 async def register_en(request: Request, name: str = Form(...), email: str = Form(...),
-                      username: str = Form(...), password: str = Form(...), password_confirm: str = Form(...)):
-    return await _register_post(request, "en", name, email, username, password, password_confirm)
+                      username: str = Form(...), password: str = Form(...), password_confirm: str = Form(...), db: ConnectionPool = Depends(get_db)):
+    return await _register_post(request, db, "en", name, email, username, password, password_confirm)
 
-async def _login_post(request: Request, lang: str, username: str, password: str):
+async def _login_post(request: Request, db: ConnectionPool, lang: str, username: str, password: str):
     t = get_t(lang)
     lp = get_lang_prefix(lang)
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, username, password, role FROM users WHERE username=?", (username,))
-    user = cursor.fetchone()
+    user = await db.run(queries.login_user, username)
     if not user:
-        conn.close()
         return templates.TemplateResponse("login.html", {"request": request, "error": t["login_error"], "t": t, "lp": lp})
     stored_hash = user[2]
     password_valid = False
     if stored_hash.startswith('$2b$') or stored_hash.startswith('$2a$'):
-        password_valid = verify_password(password, stored_hash)
+        password_valid = await password_hasher.verify(password, stored_hash)
     elif is_sha256_hash(stored_hash) and verify_sha256(password, stored_hash):
         password_valid = True
-        new_hash = hash_password(password)
-        cursor.execute("UPDATE users SET password=? WHERE id=?", (new_hash, user[0]))
-        conn.commit()
+        new_hash = await password_hasher.hash(password)
+        await db.execute("UPDATE users SET password=? WHERE id=?", (new_hash, user[0]))
     if not password_valid:
-        conn.close()
         return templates.TemplateResponse("login.html", {"request": request, "error": t["login_error"], "t": t, "lp": lp})
-    session_token = secrets.token_urlsafe(32)
-    sessions[session_token] = {"id": user[0], "username": user[1], "role": user[3]}
-    conn.close()
+    session_token = await session_store.create({"id": user[0], "username": user[1], "role": user[3]})
     response = RedirectResponse(url="/admin" if user[3] == "admin" else f"{lp}/", status_code=303)
-    response.set_cookie(key="session_token", value=session_token, httponly=True)
+    response.set_cookie(key=SESSION_COOKIE, value=session_token, max_age=SESSION_TTL, httponly=True, samesite="lax")
     return response
 
 @app.post("/login")
-async def login(request: Request, username: str = Form(...), password: str = Form(...)):
-    return await _login_post(request, "ko", username, password)
+async def login(request: Request, username: str = Form(...), password: str = Form(...), db: ConnectionPool = Depends(get_db)):
+    return await _login_post(request, db, "ko", username, password)
 
 @app.post("/en/login")
-async def login_en(request: Request, username: str = Form(...), password: str = Form(...)):
-    return await _login_post(request, "en", username, password)
+async def login_en(request: Request, username: str = Form(...), password: str = Form(...), db: ConnectionPool = Depends(get_db)):
+    return await _login_post(request, db, "en", username, password)
 
 @app.get("/logout")
 async def logout(request: Request):
     """Handle logout"""
-    session_token = request.cookies.get("session_token")
-    if session_token and session_token in sessions:
-        del sessions[session_token]
+    session_token = request.cookies.get(SESSION_COOKIE)
+    if session_token:
+        await session_store.delete(session_token)
 
     response = RedirectResponse(url="/", status_code=303)
-    response.delete_cookie("session_token")
+    response.delete_cookie(SESSION_COOKIE)
     return response
 
 @app.get("/admin", response_class=HTMLResponse)
-async def admin_dashboard(request: Request, user: dict = Depends(require_admin)):
+async def admin_dashboard(request: Request, user: dict = Depends(require_admin), db: ConnectionPool = Depends(get_db)):
     """Admin dashboard"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    # Get all visions
-    cursor.execute("SELECT * FROM visions ORDER BY date DESC")
-    visions = []
-    for row in cursor.fetchall():
-        video_id = extract_youtube_id(row[2])
-        visions.append({
-            "id": row[0],
-            "title": row[1],
-            "youtube_url": row[2],
-            "youtube_id": video_id,
-            "date": row[3],
-            "author": row[4] if len(row) > 4 else None
-        })
-
-    # Get all sermons
-    cursor.execute("SELECT * FROM sermons ORDER BY date DESC")
-    sermons = []
-    for row in cursor.fetchall():
-        video_id = extract_youtube_id(row[5]) if len(row) > 5 and row[5] else None
-        sermons.append({
-            "id": row[0],
-            "title": row[1],
-            "pastor": row[2],
-            "date": row[3],
-            "description": row[4],
-            "youtube_url": row[5] if len(row) > 5 else None,
-            "youtube_id": video_id
-        })
-
-    # Get all shorts
-    cursor.execute("SELECT * FROM shorts ORDER BY date DESC")
-    shorts = []
-    for row in cursor.fetchall():
-        video_id = extract_youtube_id(row[2])
-        shorts.append({
-            "id": row[0],
-            "title": row[1],
-            "youtube_url": row[2],
-            "youtube_id": video_id,
-            "date": row[3],
-            "author": row[4] if len(row) > 4 else None
-        })
-
-    # Get all QTY (오늘의 큐티)
-    cursor.execute("SELECT * FROM qtys ORDER BY date DESC")
-    qtys = []
-    for row in cursor.fetchall():
-        video_id = extract_youtube_id(row[2])
-        qtys.append({
-            "id": row[0],
-            "title": row[1],
-            "youtube_url": row[2],
-            "youtube_id": video_id,
-            "date": row[3],
-            "author": row[4] if len(row) > 4 else None
-        })
-
-    # Get all news
-    cursor.execute("SELECT * FROM news ORDER BY date DESC")
-    news_list = [{"id": row[0], "title": row[1], "content": row[2], "date": row[3], "views": row[4], "author": row[5], "image_path": row[6]}
-                for row in cursor.fetchall()]
-
-    # Get church info
-    cursor.execute("SELECT content FROM church_info WHERE id=1")
-    result = cursor.fetchone()
-    church_intro = result[0] if result else ""
-
-    # Get church about content
-    cursor.execute("SELECT vision_title, vision_content, mission_content, pastoral_direction, serving_people FROM church_about WHERE id=1")
-    about_row = cursor.fetchone()
-    about = {
-        "vision_title": about_row[0] if about_row else "",
-        "vision_content": about_row[1] if about_row else "",
-        "mission_content": about_row[2] if about_row else "",
-        "pastoral_direction": about_row[3] if about_row else "",
-        "serving_people": about_row[4] if about_row else ""
-    }
-
-    # Get all pastoral posts (목양의 窓)
-    cursor.execute("SELECT * FROM pastoral_posts ORDER BY created_at DESC")
-    pastoral_posts = [{"id": row[0], "title": row[1], "content": row[2], "image_path": row[3],
-                       "author": row[4], "views": row[5], "created_at": row[6]}
-                      for row in cursor.fetchall()]
-
-    # Get all members (섬기는 분들)
-    cursor.execute("SELECT * FROM members ORDER BY display_order ASC, id ASC")
-    members = [{"id": row[0], "name": row[1], "role": row[2], "bio": row[3],
-                "photo_path": row[4], "display_order": row[5]}
-               for row in cursor.fetchall()]
-
-    conn.close()
-
+    data = await db.run(queries.admin_dashboard_data)
     t = get_t("ko")
     return templates.TemplateResponse("admin.html", {
         "request": request, "t": t, "lp": "",
         "user": user,
-        "visions": visions,
-        "sermons": sermons,
-        "shorts": shorts,
-        "qtys": qtys,
-        "news_list": news_list,
-        "church_intro": church_intro,
-        "about": about,
-        "pastoral_posts": pastoral_posts,
-        "members": members
+        **data
     })
 
+@app.get("/admin/api/{section}")
+async def admin_section(section: str, after: Optional[str] = None, limit: int = queries.ADMIN_PAGE_SIZE,
+                        user: dict = Depends(require_admin), db: ConnectionPool = Depends(get_db)):
+    """One page of an admin list (loaded by admin.js when the section is opened)"""
+    if section not in queries.ADMIN_SECTIONS:
+        raise HTTPException(status_code=404, detail="Unknown section")
+    limit = min(max(limit, 1), queries.ADMIN_MAX_PAGE_SIZE)
+    data = await db.run(queries.admin_section_page, section, limit, after)
+    if section == "members":
+        for item in data["items"]:
+            item["photo_html"] = image_processor.picture(
+                item["photo_path"], item["name"], sizes='40px',
+                style='width: 40px; height: 40px; border-radius: 50%; object-fit: cover;') if item["photo_path"] else ""
+    return JSONResponse(data, headers={"Cache-Control": "no-store"})
+
+@app.get("/admin/api/{section}/{item_id}")
+async def admin_item(section: str, item_id: int, user: dict = Depends(require_admin), db: ConnectionPool = Depends(get_db)):
+    """Full row for an admin editor (sermon description, post body)"""
+    if section not in queries.ADMIN_ITEMS:
+        raise HTTPException(status_code=404, detail="Unknown section")
+    item = await db.run(queries.admin_item, section, item_id)
+    if item is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    return JSONResponse(item, headers={"Cache-Control": "no-store"})
+
+@app.get("/admin/cache/stats")
+async def admin_cache_stats(user: dict = Depends(require_admin)):
+    """Page cache hit/miss counters and thumbnail cache usage"""
+    return JSONResponse({**page_cache.stats(), "thumbnails": thumbnail_cache.stats()})
+
+@app.get("/admin/profiles")
+async def admin_profiles(user: dict = Depends(require_admin)):
+    """Kept request profiles, slowest first (take one by adding ?_profile=speedscope to any URL)"""
+    profiles = await asyncio.to_thread(profile_store.list)
+    for profile in profiles:
+        profile["download"] = {fmt: f"/admin/profiles/{profile['id']}?format={fmt}" for fmt in PROFILE_FORMATS}
+    return JSONResponse({"profiles": profiles}, headers={"Cache-Control": "no-store"})
+
+@app.get("/admin/profiles/{profile_id}")
+async def admin_profile(profile_id: str, format: str = "speedscope", user: dict = Depends(require_admin)):
+    """One kept profile as a speedscope file or collapsed stacks (format=flamegraph)"""
+    if format not in PROFILE_FORMATS:
+        raise HTTPException(status_code=400, detail="Unknown format")
+    body = await asyncio.to_thread(profile_store.export, profile_id, format)
+    if body is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile_download(profile_id, format, body)
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus scrape target: every worker's metrics, summed"""
+    body = await asyncio.to_thread(metrics.registry.render, metrics.registry.snapshot())
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+@app.get("/thumbs/{video_id}.webp")
+async def youtube_thumbnail(video_id: str, db: ConnectionPool = Depends(get_db)):
+    """YouTube thumbnail from the local cache (fetched and transcoded on first use, for ids our videos link)"""
+    path = await thumbnail_cache.get(video_id, lambda: db.run(queries.known_video, video_id))
+    if path is None:
+        raise HTTPException(status_code=404, detail="Thumbnail not found")
+    return FileResponse(path, media_type="image/webp" if THUMB_IS_WEBP else "image/jpeg",
+                        headers={"Cache-Control": "public, max-age=31536000, immutable"})
+
 @app.post("/admin/news/create")
 async def create_news(
     request: Request,
     title: str = Form(...),
     content: str = Form(...),
     image: Optional[UploadFile] = File(None),
-    user: dict = Depends(require_admin)
+    user: dict = Depends(require_admin),
+    db: ConnectionPool = Depends(get_db)
 ):
     """Create new news post"""
     image_path = None
 
     if image and image.filename:
         # Save uploaded image
-        file_extension = Path(image.filename).suffix
-        filename = f"{datetime.now().timestamp()}{file_extension}"
-        file_path = UPLOAD_DIR / filename
+        image_path = await upload_store.save(image)
+        image_processor.schedule(image_path)
 
-        with file_path.open("wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
-
-        image_path = f"/uploads/{filename}"
-
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO news (title, content, date, views, author, image_path)
-        VALUES (?, ?, ?, 0, ?, ?)
-    """, (title, content, datetime.now().strftime("%Y-%m-%d"), user['username'], image_path))
-    conn.commit()
-    conn.close()
+    await db.execute("""
+        INSERT INTO news (title, content, date, views, author, image_path, search_body, search_grams)
+        VALUES (?, ?, ?, 0, ?, ?, ?, ?)
+    """, (title, content, datetime.now().strftime("%Y-%m-%d"), user['username'], image_path,
+          *search_columns(title, content)))
 
+    page_cache.invalidate("news")
     return RedirectResponse(url="/admin", status_code=303)
 
 @app.post("/admin/news/delete/{news_id}")
-async def delete_news(news_id: int, user: dict = Depends(require_admin)):
+async def delete_news(news_id: int, user: dict = Depends(require_admin), db: ConnectionPool = Depends(get_db)):
     """Delete news post"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM news WHERE id=?", (news_id,))
-    conn.commit()
-    conn.close()
+    await db.run(queries.delete_news_post, news_id)
 
+    page_cache.invalidate("news", "comments")
     return RedirectResponse(url="/admin", status_code=303)
 
 @app.post("/admin/church-info/update")
 async def update_church_info(
     request: Request,
     content: str = Form(...),
-    user: dict = Depends(require_admin)
+    user: dict = Depends(require_admin),
+    db: ConnectionPool = Depends(get_db)
 ):
     """Update church introduction"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
+    await db.execute("""
         UPDATE church_info SET content=?, updated_at=? WHERE id=1
     """, (content, datetime.now().isoformat()))
-    conn.commit()
-    conn.close()
 
+    page_cache.invalidate("church_info")
     return RedirectResponse(url="/admin", status_code=303)
 
 @app.post("/admin/vision/create")
 async def create_vision(
     title: str = Form(...),
     youtube_url: str = Form(...),
-    user: dict = Depends(require_admin)
+    user: dict = Depends(require_admin),
+    db: ConnectionPool = Depends(get_db)
 ):
     """Create new vision post"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO visions (title, youtube_url, date, author)
-        VALUES (?, ?, ?, ?)
-    """, (title, youtube_url, datetime.now().strftime("%Y-%m-%d"), user['username']))
-    conn.commit()
-    conn.close()
-
+    youtube_id, thumbnail = youtube_fields(youtube_url)
+    await db.execute("""
+        INSERT INTO visions (title, youtube_url, youtube_id, thumbnail, date, author)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (title, youtube_url, youtube_id, thumbnail, datetime.now().strftime("%Y-%m-%d"), user['username']))
+
+    page_cache.invalidate("visions")
+    thumbnail_cache.prime(youtube_id)
     return RedirectResponse(url="/admin", status_code=303)
 
 @app.post("/admin/vision/delete/{vision_id}")
-async def delete_vision(vision_id: int, user: dict = Depends(require_admin)):
+async def delete_vision(vision_id: int, user: dict = Depends(require_admin), db: ConnectionPool = Depends(get_db)):
     """Delete vision post"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM visions WHERE id=?", (vision_id,))
-    conn.commit()
-    conn.close()
+    await db.execute("DELETE FROM visions WHERE id=?", (vision_id,))
 
+    page_cache.invalidate("visions")
     return RedirectResponse(url="/admin", status_code=303)
 
 @app.post("/admin/sermon/create")
@@ -1196,29 +1072,26 @@ async def create_sermon(
     pastor: str = Form(...),
     description: str = Form(...),
     youtube_url: Optional[str] = Form(None),
-    user: dict = Depends(require_admin)
+    user: dict = Depends(require_admin),
+    db: ConnectionPool = Depends(get_db)
 ):
     """Create new sermon"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO sermons (title, pastor, date, description, youtube_url)
-        VALUES (?, ?, ?, ?, ?)
-    """, (title, pastor, datetime.now().strftime("%Y-%m-%d"), description, youtube_url))
-    conn.commit()
-    conn.close()
-
+    youtube_id, thumbnail = youtube_fields(youtube_url)
+    await db.execute("""
+        INSERT INTO sermons (title, pastor, date, description, youtube_url, youtube_id, thumbnail)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, (title, pastor, datetime.now().strftime("%Y-%m-%d"), description, youtube_url, youtube_id, thumbnail))
+
+    page_cache.invalidate("sermons")
+    thumbnail_cache.prime(youtube_id)
     return RedirectResponse(url="/admin", status_code=303)
 
 @app.post("/admin/sermon/delete/{sermon_id}")
-async def delete_sermon(sermon_id: int, user: dict = Depends(require_admin)):
+async def delete_sermon(sermon_id: int, user: dict = Depends(require_admin), db: ConnectionPool = Depends(get_db)):
     """Delete sermon"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM sermons WHERE id=?", (sermon_id,))
-    conn.commit()
-    conn.close()
+    await db.execute("DELETE FROM sermons WHERE id=?", (sermon_id,))
 
+    page_cache.invalidate("sermons")
     return RedirectResponse(url="/admin", status_code=303)
 
 @app.post("/admin/sermon/update/{sermon_id}")
@@ -1229,21 +1102,20 @@ async def update_sermon(
     date: str = Form(...),
     description: str = Form(...),
     youtube_url: Optional[str] = Form(None),
-    user: dict = Depends(require_admin)
+    user: dict = Depends(require_admin),
+    db: ConnectionPool = Depends(get_db)
 ):
     """Update existing sermon"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    cursor.execute("""
+    youtube_id, thumbnail = youtube_fields(youtube_url)
+    await db.execute("""
         UPDATE sermons
-        SET title=?, pastor=?, date=?, description=?, youtube_url=?
+        SET title=?, pastor=?, date=?, description=?, youtube_url=?, youtube_id=?, thumbnail=?
         WHERE id=?
-    """, (title, pastor, date, description, youtube_url, sermon_id))
+    """, (title, pastor, date, description, youtube_url, youtube_id, thumbnail, sermon_id))
 
-    conn.commit()
-    conn.close()
 
+    page_cache.invalidate("sermons")
+    thumbnail_cache.prime(youtube_id)
     return RedirectResponse(url="/admin", status_code=303)
 
 @app.post("/admin/member/create")
@@ -1254,38 +1126,29 @@ async def create_member(
     bio: str = Form(''),
     display_order: int = Form(0),
     photo: Optional[UploadFile] = File(None),
-    user: dict = Depends(require_admin)
+    user: dict = Depends(require_admin),
+    db: ConnectionPool = Depends(get_db)
 ):
     """Create new member"""
     photo_path = None
     if photo and photo.filename:
-        file_extension = Path(photo.filename).suffix
-        filename = f"member_{datetime.now().timestamp()}{file_extension}"
-        file_path = UPLOAD_DIR / filename
-        with file_path.open("wb") as buffer:
-            shutil.copyfileobj(photo.file, buffer)
-        photo_path = f"/uploads/{filename}"
-
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
+        photo_path = await upload_store.save(photo)
+        image_processor.schedule(photo_path)
+
+    await db.execute("""
         INSERT INTO members (name, role, bio, photo_path, display_order)
         VALUES (?, ?, ?, ?, ?)
     """, (name, role, bio, photo_path, display_order))
-    conn.commit()
-    conn.close()
 
+    page_cache.invalidate("members")
     return RedirectResponse(url="/admin", status_code=303)
 
 @app.post("/admin/member/delete/{member_id}")
-async def delete_member(member_id: int, user: dict = Depends(require_admin)):
+async def delete_member(member_id: int, user: dict = Depends(require_admin), db: ConnectionPool = Depends(get_db)):
     """Delete a member"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM members WHERE id = ?", (member_id,))
-    conn.commit()
-    conn.close()
+    await db.execute("DELETE FROM members WHERE id = ?", (member_id,))
 
+    page_cache.invalidate("members")
     return RedirectResponse(url="/admin", status_code=303)
 
 @app.post("/admin/about/update")
@@ -1295,51 +1158,45 @@ async def update_about(
     mission_content: str = Form(...),
     pastoral_direction: str = Form(''),
     serving_people: str = Form(''),
-    user: dict = Depends(require_admin)
+    user: dict = Depends(require_admin),
+    db: ConnectionPool = Depends(get_db)
 ):
     """Update church about content"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    cursor.execute("""
+    await db.execute("""
         UPDATE church_about
         SET vision_title=?, vision_content=?, mission_content=?, pastoral_direction=?, serving_people=?, updated_at=?
         WHERE id=1
     """, (vision_title, vision_content, mission_content, pastoral_direction, serving_people,
           datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
 
-    conn.commit()
-    conn.close()
 
+    page_cache.invalidate("church_about")
     return RedirectResponse(url="/admin", status_code=303)
 
 @app.post("/admin/shorts/create")
 async def create_shorts(
     title: str = Form(...),
     youtube_url: str = Form(...),
-    user: dict = Depends(require_admin)
+    user: dict = Depends(require_admin),
+    db: ConnectionPool = Depends(get_db)
 ):
     """Create new YouTube short"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO shorts (title, youtube_url, date, author)
-        VALUES (?, ?, ?, ?)
-    """, (title, youtube_url, datetime.now().strftime("%Y-%m-%d"), user['username']))
-    conn.commit()
-    conn.close()
-
+    youtube_id, thumbnail = youtube_fields(youtube_url)
+    await db.execute("""
+        INSERT INTO shorts (title, youtube_url, youtube_id, thumbnail, date, author)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (title, youtube_url, youtube_id, thumbnail, datetime.now().strftime("%Y-%m-%d"), user['username']))
+
+    page_cache.invalidate("shorts")
+    thumbnail_cache.prime(youtube_id)
     return RedirectResponse(url="/admin", status_code=303)
 
 @app.post("/admin/shorts/delete/{shorts_id}")
-async def delete_shorts(shorts_id: int, user: dict = Depends(require_admin)):
+async def delete_shorts(shorts_id: int, user: dict = Depends(require_admin), db: ConnectionPool = Depends(get_db)):
     """Delete a YouTube short"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM shorts WHERE id = ?", (shorts_id,))
-    conn.commit()
-    conn.close()
+    await db.execute("DELETE FROM shorts WHERE id = ?", (shorts_id,))
 
+    page_cache.invalidate("shorts")
     return RedirectResponse(url="/admin", status_code=303)
 
 @app.post("/admin/shorts/update/{shorts_id}")
@@ -1348,46 +1205,43 @@ async def update_shorts(
     title: str = Form(...),
     youtube_url: str = Form(...),
     date: str = Form(...),
-    user: dict = Depends(require_admin)
+    user: dict = Depends(require_admin),
+    db: ConnectionPool = Depends(get_db)
 ):
     """Update existing YouTube short"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        UPDATE shorts SET title=?, youtube_url=?, date=? WHERE id=?
-    """, (title, youtube_url, date, shorts_id))
-    conn.commit()
-    conn.close()
+    youtube_id, thumbnail = youtube_fields(youtube_url)
+    await db.execute("""
+        UPDATE shorts SET title=?, youtube_url=?, youtube_id=?, thumbnail=?, date=? WHERE id=?
+    """, (title, youtube_url, youtube_id, thumbnail, date, shorts_id))
 
+    page_cache.invalidate("shorts")
+    thumbnail_cache.prime(youtube_id)
     return RedirectResponse(url="/admin", status_code=303)
 
 @app.post("/admin/qty/create")
 async def create_qty(
     title: str = Form(...),
     youtube_url: str = Form(...),
-    user: dict = Depends(require_admin)
+    user: dict = Depends(require_admin),
+    db: ConnectionPool = Depends(get_db)
 ):
     """Create new QTY (오늘의 큐티)"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO qtys (title, youtube_url, date, author)
-        VALUES (?, ?, ?, ?)
-    """, (title, youtube_url, datetime.now().strftime("%Y-%m-%d"), user['username']))
-    conn.commit()
-    conn.close()
-
+    youtube_id, thumbnail = youtube_fields(youtube_url)
+    await db.execute("""
+        INSERT INTO qtys (title, youtube_url, youtube_id, thumbnail, date, author)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (title, youtube_url, youtube_id, thumbnail, datetime.now().strftime("%Y-%m-%d"), user['username']))
+
+    page_cache.invalidate("qtys")
+    thumbnail_cache.prime(youtube_id)
     return RedirectResponse(url="/admin", status_code=303)
 
 @app.post("/admin/qty/delete/{qty_id}")
-async def delete_qty(qty_id: int, user: dict = Depends(require_admin)):
+async def delete_qty(qty_id: int, user: dict = Depends(require_admin), db: ConnectionPool = Depends(get_db)):
     """Delete a QTY"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM qtys WHERE id = ?", (qty_id,))
-    conn.commit()
-    conn.close()
+    await db.execute("DELETE FROM qtys WHERE id = ?", (qty_id,))
 
+    page_cache.invalidate("qtys")
     return RedirectResponse(url="/admin", status_code=303)
 
 @app.post("/admin/qty/update/{qty_id}")
@@ -1396,17 +1250,17 @@ async def update_qty(
     title: str = Form(...),
     youtube_url: str = Form(...),
     date: str = Form(...),
-    user: dict = Depends(require_admin)
+    user: dict = Depends(require_admin),
+    db: ConnectionPool = Depends(get_db)
 ):
     """Update existing QTY"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        UPDATE qtys SET title=?, youtube_url=?, date=? WHERE id=?
-    """, (title, youtube_url, date, qty_id))
-    conn.commit()
-    conn.close()
+    youtube_id, thumbnail = youtube_fields(youtube_url)
+    await db.execute("""
+        UPDATE qtys SET title=?, youtube_url=?, youtube_id=?, thumbnail=?, date=? WHERE id=?
+    """, (title, youtube_url, youtube_id, thumbnail, date, qty_id))
 
+    page_cache.invalidate("qtys")
+    thumbnail_cache.prime(youtube_id)
     return RedirectResponse(url="/admin", status_code=303)
 
 @app.post("/admin/upload-image")
@@ -1419,16 +1273,13 @@ async def upload_image(
     if not image.filename:
         return JSONResponse({"error": "No file"}, status_code=400)
 
-    file_extension = Path(image.filename).suffix.lower()
-    if file_extension not in ('.jpg', '.jpeg', '.png', '.gif', '.webp'):
-        return JSONResponse({"error": "지원하지 않는 파일 형식입니다."}, status_code=400)
-
-    filename = f"content_{datetime.now().timestamp()}{file_extension}"
-    file_path = UPLOAD_DIR / filename
-    with file_path.open("wb") as buffer:
-        shutil.copyfileobj(image.file, buffer)
+    try:
+        url = await upload_store.save(image)
+    except UploadRejected as e:
+        return JSONResponse({"error": e.message}, status_code=e.status_code)
+    image_processor.schedule(url)
 
-    return JSONResponse({"url": f"/uploads/{filename}"})
+    return JSONResponse({"url": url})
 
 def extract_first_image_from_content(content: str) -> Optional[str]:
     """Extract first <img> src from HTML content"""
@@ -1441,17 +1292,13 @@ async def create_pastoral(
     title: str = Form(...),
     content: str = Form(...),
     image: Optional[UploadFile] = File(None),
-    user: dict = Depends(require_admin)
+    user: dict = Depends(require_admin),
+    db: ConnectionPool = Depends(get_db)
 ):
     """Create new pastoral post"""
     image_path = None
     if image and image.filename:
-        file_extension = Path(image.filename).suffix
-        filename = f"pastoral_{datetime.now().timestamp()}{file_extension}"
-        file_path = UPLOAD_DIR / filename
-        with file_path.open("wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
-        image_path = f"/uploads/{filename}"
+        image_path = await upload_store.save(image)
 
     # Auto-extract thumbnail from content if no image uploaded
     if not image_path:
@@ -1461,15 +1308,16 @@ async def create_pastoral(
         else:
             image_path = "/static/images/logo.png"
 
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO pastoral_posts (title, content, image_path, author, views, created_at)
-        VALUES (?, ?, ?, ?, 0, ?)
-    """, (title, content, image_path, user['username'], datetime.now().strftime("%Y-%m-%d")))
-    conn.commit()
-    conn.close()
+    image_processor.schedule(image_path)
+    await db.execute("""
+        INSERT INTO pastoral_posts (title, content, image_path, author, views, created_at,
+                                    excerpt, text_length, reading_minutes, search_body, search_grams)
+        VALUES (?, ?, ?, ?, 0, ?, ?, ?, ?, ?, ?)
+    """, (title, content, image_path, user['username'], datetime.now().strftime("%Y-%m-%d"), *text_fields(content),
+          *search_columns(title, content)))
 
+    row_counts.adjust("pastoral_posts", 1)
+    page_cache.invalidate("pastoral_posts")
     return RedirectResponse(url="/admin", status_code=303)
 
 @app.post("/admin/pastoral/update/{post_id}")
@@ -1479,152 +1327,129 @@ async def update_pastoral(
     title: str = Form(...),
     content: str = Form(...),
     image: Optional[UploadFile] = File(None),
-    user: dict = Depends(require_admin)
+    user: dict = Depends(require_admin),
+    db: ConnectionPool = Depends(get_db)
 ):
     """Update existing pastoral post"""
     image_path = None
     if image and image.filename:
-        file_extension = Path(image.filename).suffix
-        filename = f"pastoral_{datetime.now().timestamp()}{file_extension}"
-        file_path = UPLOAD_DIR / filename
-        with file_path.open("wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
-        image_path = f"/uploads/{filename}"
-
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+        image_path = await upload_store.save(image)
+
+    if not image_path:
+        # Auto-extract thumbnail from content
+        image_path = extract_first_image_from_content(content)
 
+    excerpt, text_length, reading_minutes = text_fields(content)
+    search_body, search_grams = search_columns(title, content)
     if image_path:
-        cursor.execute("UPDATE pastoral_posts SET title=?, content=?, image_path=? WHERE id=?",
-                        (title, content, image_path, post_id))
+        image_processor.schedule(image_path)
+        await db.execute("""
+            UPDATE pastoral_posts SET title=?, content=?, image_path=?, excerpt=?, text_length=?, reading_minutes=?,
+                                      search_body=?, search_grams=?
+            WHERE id=?
+        """, (title, content, image_path, excerpt, text_length, reading_minutes, search_body, search_grams, post_id))
     else:
-        # Auto-extract thumbnail from content
-        first_img = extract_first_image_from_content(content)
-        if first_img:
-            cursor.execute("UPDATE pastoral_posts SET title=?, content=?, image_path=? WHERE id=?",
-                            (title, content, first_img, post_id))
-        else:
-            cursor.execute("UPDATE pastoral_posts SET title=?, content=? WHERE id=?",
-                            (title, content, post_id))
+        await db.execute("""
+            UPDATE pastoral_posts SET title=?, content=?, excerpt=?, text_length=?, reading_minutes=?, search_body=?,
+                                      search_grams=?
+            WHERE id=?
+        """, (title, content, excerpt, text_length, reading_minutes, search_body, search_grams, post_id))
 
-    conn.commit()
-    conn.close()
+    page_cache.invalidate("pastoral_posts")
     return RedirectResponse(url="/admin", status_code=303)
 
 @app.post("/admin/pastoral/delete/{post_id}")
-async def delete_pastoral(post_id: int, user: dict = Depends(require_admin)):
+async def delete_pastoral(post_id: int, user: dict = Depends(require_admin), db: ConnectionPool = Depends(get_db)):
     """Delete a pastoral post"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM pastoral_posts WHERE id = ?", (post_id,))
-    cursor.execute("DELETE FROM comments WHERE post_type='pastoral' AND post_id=?", (post_id,))
-    conn.commit()
-    conn.close()
+    if await db.run(queries.delete_pastoral_post, post_id):
+        row_counts.adjust("pastoral_posts", -1)
 
+    page_cache.invalidate("pastoral_posts", "comments")
     return RedirectResponse(url="/admin", status_code=303)
 
-async def _view_news(request: Request, news_id: int, lang: str = "ko"):
+async def _view_news(request: Request, db: ConnectionPool, news_id: int, lang: str = "ko",
+                     comments_after: Optional[str] = None):
     t = get_t(lang)
     lp = get_lang_prefix(lang)
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("UPDATE news SET views = views + 1 WHERE id=?", (news_id,))
-    conn.commit()
-    cursor.execute("SELECT * FROM news WHERE id=?", (news_id,))
-    row = cursor.fetchone()
-    if not row:
-        conn.close()
+    user = await get_current_user(request)
+    validators = await _validators(request, db, ("news", "comments"), user, personalized=True)
+    if validators.is_fresh(request):
+        await db.run(queries.count_view, "news", news_id)
+        return validators.not_modified()
+    data = await db.run(queries.view_news, news_id, comments_after)
+    if not data:
         raise HTTPException(status_code=404, detail="Post not found")
-    news = {"id": row[0], "title": row[1], "content": row[2], "date": row[3], "views": row[4], "author": row[5], "image_path": row[6]}
-    cursor.execute("""
-        SELECT c.id, c.content, c.created_at, u.username, u.name, c.user_id
-        FROM comments c JOIN users u ON c.user_id = u.id
-        WHERE c.post_type='news' AND c.post_id=?
-        ORDER BY c.created_at ASC
-    """, (news_id,))
-    comments = [{"id": r[0], "content": r[1], "created_at": r[2],
-                 "username": r[3], "name": r[4], "user_id": r[5]}
-                for r in cursor.fetchall()]
-    conn.close()
-    user = get_current_user(request)
-    return templates.TemplateResponse("news_detail.html", {
-        "request": request, "news": news, "comments": comments, "user": user, "t": t, "lp": lp
-    })
+    return validators.apply(templates.TemplateResponse("news_detail.html", {
+        "request": request, "news": data["news"], "comments": data["comments"], "user": user, "t": t, "lp": lp,
+        "comments_after": comments_after, "next_comments": data["next_cursor"]
+    }))
 
 @app.get("/news/{news_id}", response_class=HTMLResponse)
-async def view_news(request: Request, news_id: int):
-    return await _view_news(request, news_id, "ko")
+async def view_news(request: Request, news_id: int, comments: Optional[str] = None,
+                    db: ConnectionPool = Depends(get_db)):
+    return await _view_news(request, db, news_id, "ko", comments)
 
 @app.get("/en/news/{news_id}", response_class=HTMLResponse)
-async def view_news_en(request: Request, news_id: int):
-    return await _view_news(request, news_id, "en")
+async def view_news_en(request: Request, news_id: int, comments: Optional[str] = None,
+                       db: ConnectionPool = Depends(get_db)):
+    return await _view_news(request, db, news_id, "en", comments)
 
 @app.post("/news/{news_id}/comment")
-async def create_news_comment(request: Request, news_id: int, content: str = Form(...)):
+async def create_news_comment(request: Request, news_id: int, content: str = Form(...), db: ConnectionPool = Depends(get_db)):
     """Add comment to news article (logged-in users only)"""
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user:
         raise HTTPException(status_code=401, detail="로그인이 필요합니다.")
     if not content.strip():
         return RedirectResponse(url=f"/news/{news_id}", status_code=303)
 
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO comments (post_type, post_id, user_id, content, created_at)
-        VALUES ('news', ?, ?, ?, ?)
-    """, (news_id, user['id'], content.strip(), datetime.now().isoformat()))
-    conn.commit()
-    conn.close()
+    if not await db.run(queries.add_comment, "news", news_id, user['id'], content.strip(), datetime.now().isoformat()):
+        raise HTTPException(status_code=404, detail="Post not found")
+
+    page_cache.invalidate(queries.COMMENT_TABLES["news"], "comments")
 
     return RedirectResponse(url=f"/news/{news_id}", status_code=303)
 
 @app.post("/pastoral/{post_id}/comment")
-async def create_pastoral_comment(request: Request, post_id: int, content: str = Form(...)):
+async def create_pastoral_comment(request: Request, post_id: int, content: str = Form(...), db: ConnectionPool = Depends(get_db)):
     """Add comment to pastoral post (logged-in users only)"""
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user:
         raise HTTPException(status_code=401, detail="로그인이 필요합니다.")
     if not content.strip():
         return RedirectResponse(url=f"/pastoral/{post_id}", status_code=303)
 
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO comments (post_type, post_id, user_id, content, created_at)
-        VALUES ('pastoral', ?, ?, ?, ?)
-    """, (post_id, user['id'], content.strip(), datetime.now().isoformat()))
-    conn.commit()
-    conn.close()
+    if not await db.run(queries.add_comment, "pastoral", post_id, user['id'], content.strip(), datetime.now().isoformat()):
+        raise HTTPException(status_code=404, detail="Post not found")
+
+    page_cache.invalidate(queries.COMMENT_TABLES["pastoral"], "comments")
 
     return RedirectResponse(url=f"/pastoral/{post_id}", status_code=303)
 
 @app.post("/comment/{comment_id}/delete")
-async def delete_comment(request: Request, comment_id: int, redirect: str = "/"):
+async def delete_comment(request: Request, comment_id: int, redirect: str = "/", db: ConnectionPool = Depends(get_db)):
     """Delete a comment (owner or admin only)"""
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user:
         raise HTTPException(status_code=401, detail="로그인이 필요합니다.")
 
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    cursor.execute("SELECT user_id FROM comments WHERE id=?", (comment_id,))
-    comment = cursor.fetchone()
-    if not comment:
-        conn.close()
+    owner_id = await db.run(queries.comment_owner, comment_id)
+    if owner_id is None:
         raise HTTPException(status_code=404, detail="댓글을 찾을 수 없습니다.")
 
-    if comment[0] != user['id'] and user['role'] != 'admin':
-        conn.close()
+    if owner_id != user['id'] and user['role'] != 'admin':
         raise HTTPException(status_code=403, detail="삭제 권한이 없습니다.")
 
-    cursor.execute("DELETE FROM comments WHERE id=?", (comment_id,))
-    conn.commit()
-    conn.close()
+    table = await db.run(queries.delete_comment, comment_id)
+
+    if table:
+        page_cache.invalidate(table, "comments")
 
     return RedirectResponse(url=redirect, status_code=303)
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # The workers sum their metrics in this process's directory (metrics.py)
+    os.environ["METRICS_MASTER_PID"] = str(os.getpid())
+    # Sessions live in SESSION_BACKEND, so any worker can serve any request
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, workers=int(os.getenv("WEB_CONCURRENCY", "1")))
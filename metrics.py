@@ -0,0 +1,279 @@
+"""Prometheus metrics at /metrics: request latency, in-flight requests, DB calls, uploads, caches
+
+MetricsMiddleware observes every HTTP request by method, route template
+(`/pastoral/{post_id}`, with the /en variants folded in and labeled
+lang="en"), and status. ConnectionPool.run and UploadStore.save record
+DB call and upload timings. All of it is recorded from the event loop
+thread into plain dicts, so the hot path takes no locks.
+
+With several uvicorn workers each process only sees its own requests.
+So every worker writes a snapshot to <directory>/<pid>.json every
+METRICS_WRITE_INTERVAL seconds and just before it answers a scrape, and
+/metrics adds up every snapshot in the directory. The directory is
+METRICS_DIR when set, which must then be one deployment's own. Otherwise
+it is a temporary directory named after the master process, whose pid
+`python main.py` passes to its workers as METRICS_MASTER_PID (a process
+started any other way is its own master, so `uvicorn --workers N` needs
+METRICS_DIR to sum its workers). Snapshots of processes that have
+exited are deleted at the next scrape, so a restarted worker shows up as
+a counter reset.
+"""
+import bisect
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+METRICS_DIR = os.getenv("METRICS_DIR", "")
+METRICS_MASTER_PID = int(os.getenv("METRICS_MASTER_PID", str(os.getpid())))
+# Without METRICS_DIR: one subdirectory per master under here
+METRICS_TMP_ROOT = Path(tempfile.gettempdir(), "church-metrics")
+METRICS_WRITE_INTERVAL = float(os.getenv("METRICS_WRITE_INTERVAL", "10"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UPLOAD_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Metric:
+    """One metric family: samples keyed by label values, touched only from the event loop"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values = {}
+
+    def merge(self, into: dict, values):
+        for labels, value in values:
+            labels = tuple(labels)
+            into[labels] = into.get(labels, 0) + value
+
+    def lines(self, values: dict) -> list:
+        return [f"{self.name}{_labels(self.labels, key)} {_number(value)}" for key, value in sorted(values.items())]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def set(self, labels: tuple, value: float):
+        """Mirror a count kept elsewhere (cache hit counters)"""
+        self.values[labels] = value
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def dec(self, labels: tuple = (), amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) - amount
+
+    def set(self, labels: tuple, value: float):
+        self.values[labels] = value
+
+
+class Histogram(Metric):
+    """Per-bucket counts (not cumulative until exported), then sum"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = buckets
+
+    def observe(self, labels: tuple, value: float):
+        entry = self.values.get(labels)
+        if entry is None:
+            entry = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        entry[bisect.bisect_left(self.buckets, value)] += 1
+        entry[-1] += value
+
+    def merge(self, into: dict, values):
+        for labels, entry in values:
+            labels = tuple(labels)
+            if labels not in into:
+                into[labels] = list(entry)
+            else:
+                into[labels] = [a + b for a, b in zip(into[labels], entry)]
+
+    def lines(self, values: dict) -> list:
+        lines = []
+        for key, entry in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), entry):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.labels + ('le',), key + (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {_number(entry[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for v in values)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+
+class Registry:
+    """This worker's metrics, its snapshot file, and the sum over all workers"""
+
+    def __init__(self, directory: Optional[Path] = None):
+        self.metrics = {}
+        self.collectors = []
+        self.directory = directory or (Path(METRICS_DIR) if METRICS_DIR else METRICS_TMP_ROOT / str(METRICS_MASTER_PID))
+        self.path = self.directory / f"{os.getpid()}.json"
+
+    def add(self, metric: Metric) -> Metric:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def on_collect(self, callback):
+        """Call `callback()` before each snapshot, to refresh gauges mirrored from elsewhere"""
+        self.collectors.append(callback)
+
+    def snapshot(self) -> dict:
+        """Copy of this worker's samples (on the event loop; writing and rendering can then run elsewhere)"""
+        for callback in self.collectors:
+            callback()
+        return {name: [[list(labels), list(value) if isinstance(value, list) else value]
+                       for labels, value in metric.values.items()]
+                for name, metric in self.metrics.items()}
+
+    def write(self, snapshot: dict):
+        """Publish this worker's snapshot for the others to aggregate"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps({"pid": os.getpid(), "metrics": snapshot}))
+        os.replace(tmp, self.path)
+
+    def _snapshots(self) -> list:
+        """Snapshots of live processes; those of exited ones are deleted"""
+        snapshots = []
+        for path in self.directory.glob("*.json"):
+            if not path.stem.isdigit():
+                continue
+            pid = int(path.stem)
+            if pid != os.getpid() and not _alive(pid):
+                path.unlink(missing_ok=True)
+                continue
+            try:
+                snapshots.append(json.loads(path.read_text()))
+            except (OSError, ValueError):  # replaced or removed mid-read; it'll be there next scrape
+                continue
+        return snapshots
+
+    def render(self, snapshot: dict) -> str:
+        """Prometheus text exposition of every worker's metrics, summed (writes `snapshot` first)"""
+        self.write(snapshot)
+        merged = {name: {} for name in self.metrics}
+        for worker in self._snapshots():
+            for name, values in worker["metrics"].items():
+                metric = self.metrics.get(name)
+                if metric is not None:
+                    metric.merge(merged[name], values)
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric.lines(merged[name]))
+        return "\n".join(lines) + "\n"
+
+    def remove_stale(self):
+        """Drop snapshots of exited processes, and the directories of masters that are gone (earlier deploys)"""
+        self._snapshots()
+        if METRICS_DIR or not METRICS_TMP_ROOT.is_dir():
+            return  # METRICS_DIR's parent isn't ours to sweep
+        for directory in METRICS_TMP_ROOT.iterdir():
+            if directory != self.directory and directory.name.isdigit() and not _alive(int(directory.name)):
+                try:
+                    for path in directory.iterdir():
+                        path.unlink(missing_ok=True)
+                    directory.rmdir()
+                except OSError:  # another worker got there first
+                    continue
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+registry = Registry()
+
+http_requests = registry.add(Histogram(
+    "church_http_request_duration_seconds", "HTTP request latency by route template, language and status",
+    ("method", "route", "lang", "status")))
+http_in_flight = registry.add(Gauge("church_http_requests_in_flight", "HTTP requests being handled"))
+db_calls = registry.add(Histogram(
+    "church_db_call_duration_seconds", "ConnectionPool.run calls, executor queueing included", ("fn",)))
+upload_bytes = registry.add(Counter("church_upload_bytes_total", "Bytes of accepted uploads"))
+uploads = registry.add(Histogram(
+    "church_upload_duration_seconds", "Upload store time by outcome", ("result",), UPLOAD_BUCKETS))
+# Mirrored from the caches and the pool by the collector main.py registers
+page_cache_lookups = registry.add(Counter("church_page_cache_lookups_total", "Page cache lookups", ("result",)))
+page_cache_entries = registry.add(Gauge("church_page_cache_entries", "Pages in the page cache"))
+thumbnail_cache_bytes = registry.add(Gauge("church_thumbnail_cache_bytes", "Bytes of cached YouTube thumbnails"))
+db_connections = registry.add(Gauge("church_db_connections", "SQLite connections open in the pool"))
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status and in-flight count of every HTTP request"""
+
+    def __init__(self, app):
+        self.app = app
+        self._routes = None  # endpoint -> route template, built on first use
+
+    def route_label(self, scope) -> tuple:
+        """(route template, lang) of a handled request; the /en prefix becomes lang="en" """
+        if self._routes is None:
+            self._routes = {}
+            for route in scope["app"].routes:
+                # Routes match with their endpoint, mounts (/static) with their app
+                self._routes.setdefault(getattr(route, "endpoint", None) or route.app, route.path)
+        route = self._routes.get(scope.get("endpoint"))
+        if route is None:
+            return "<unmatched>", "ko"
+        if route == "/en" or route.startswith("/en/"):
+            return route[3:] or "/", "en"
+        return route, "ko"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_in_flight.dec()
+            route, lang = self.route_label(scope)
+            http_requests.observe((scope["method"], route, lang, str(status)), time.perf_counter() - started)
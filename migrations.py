@@ -0,0 +1,470 @@
+"""Versioned schema migrations, recorded in the schema_migrations table
+
+Each migration runs once per database, inside its own transaction, in
+version order. Migrations are written to be safe on databases created by
+the old init_db (which had no version table), so they check before
+altering instead of relying on the ALTER failing.
+
+Usage: python -m migrations [db_path]   (apply pending, then check query plans)
+"""
+import sqlite3
+import sys
+from datetime import datetime
+
+from conditional import CONTENT_TABLES, version_triggers
+from excerpts import fill_text_columns, strip_html
+from search import REBUILD_SEARCH_INDEX, SEARCH_INDEX, SEARCH_TRIGGERS, fill_search_bodies
+from youtube import VIDEO_TABLES, fill_youtube_columns
+
+
+def _statements(script: str):
+    """Split a SQL script into complete statements (trigger bodies included)"""
+    statement = ""
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            yield statement.strip()
+            statement = ""
+    if statement.strip():
+        yield statement.strip()
+
+
+def _run_script(cursor: sqlite3.Cursor, script: str):
+    # Unlike executescript(), this doesn't COMMIT the migration's transaction
+    for statement in _statements(script):
+        cursor.execute(statement)
+
+
+def _add_column(cursor: sqlite3.Cursor, table: str, column: str, ddl: str):
+    cursor.execute(f"PRAGMA table_info({table})")
+    if column not in {row[1] for row in cursor.fetchall()}:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+
+
+def _base_tables(cursor: sqlite3.Cursor):
+    _run_script(cursor, """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            role TEXT NOT NULL DEFAULT 'user',
+            created_at TEXT NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS church_info (
+            id INTEGER PRIMARY KEY,
+            content TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS sermons (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            pastor TEXT NOT NULL,
+            date TEXT NOT NULL,
+            description TEXT,
+            youtube_url TEXT
+        );
+
+        CREATE TABLE IF NOT EXISTS news (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            content TEXT NOT NULL,
+            date TEXT NOT NULL,
+            views INTEGER DEFAULT 0,
+            author TEXT,
+            image_path TEXT
+        );
+
+        -- Vision table for YouTube videos
+        CREATE TABLE IF NOT EXISTS visions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            youtube_url TEXT NOT NULL,
+            date TEXT NOT NULL,
+            author TEXT
+        );
+
+        -- Shorts table for YouTube Shorts
+        CREATE TABLE IF NOT EXISTS shorts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            youtube_url TEXT NOT NULL,
+            date TEXT NOT NULL,
+            author TEXT
+        );
+
+        -- QTY (오늘의 큐티) table for YouTube videos
+        CREATE TABLE IF NOT EXISTS qtys (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            youtube_url TEXT NOT NULL,
+            date TEXT NOT NULL,
+            author TEXT
+        );
+
+        -- 목양의 窓 (Pastoral Window) board
+        CREATE TABLE IF NOT EXISTS pastoral_posts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            content TEXT NOT NULL,
+            image_path TEXT,
+            author TEXT,
+            views INTEGER DEFAULT 0,
+            created_at TEXT NOT NULL
+        );
+
+        -- Church About table for vision and missions
+        CREATE TABLE IF NOT EXISTS church_about (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            vision_title TEXT NOT NULL,
+            vision_content TEXT NOT NULL,
+            mission_content TEXT NOT NULL,
+            pastoral_direction TEXT NOT NULL DEFAULT '',
+            serving_people TEXT NOT NULL DEFAULT '',
+            updated_at TEXT NOT NULL
+        );
+
+        -- Members table (섬기는 분들)
+        CREATE TABLE IF NOT EXISTS members (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            role TEXT NOT NULL,
+            bio TEXT NOT NULL DEFAULT '',
+            photo_path TEXT,
+            display_order INTEGER DEFAULT 0
+        );
+
+        CREATE TABLE IF NOT EXISTS comments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            post_type TEXT NOT NULL,
+            post_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            content TEXT NOT NULL,
+            created_at TEXT NOT NULL
+        );
+    """)
+
+
+def _legacy_columns(cursor: sqlite3.Cursor):
+    """Columns that older databases were created without"""
+    _add_column(cursor, "sermons", "youtube_url", "TEXT")
+    _add_column(cursor, "church_about", "pastoral_direction", "TEXT NOT NULL DEFAULT ''")
+    _add_column(cursor, "church_about", "serving_people", "TEXT NOT NULL DEFAULT ''")
+    _add_column(cursor, "users", "name", "TEXT NOT NULL DEFAULT ''")
+    _add_column(cursor, "users", "email", "TEXT DEFAULT ''")
+
+
+# As first shipped: the triggers call strip_html, which only the pool's
+# connections define (kept for fresh databases; migration 14 replaces them)
+_SEARCH_INDEX_V3 = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+        title, body, kind UNINDEXED, post_id UNINDEXED,
+        tokenize = 'trigram'
+    );
+
+    CREATE TRIGGER IF NOT EXISTS pastoral_posts_search_ai AFTER INSERT ON pastoral_posts BEGIN
+        INSERT INTO search_index (rowid, title, body, kind, post_id)
+        VALUES (new.id * 2, new.title, strip_html(new.content), 'pastoral', new.id);
+    END;
+    CREATE TRIGGER IF NOT EXISTS pastoral_posts_search_au AFTER UPDATE OF title, content ON pastoral_posts BEGIN
+        UPDATE search_index SET title = new.title, body = strip_html(new.content) WHERE rowid = old.id * 2;
+    END;
+    CREATE TRIGGER IF NOT EXISTS pastoral_posts_search_ad AFTER DELETE ON pastoral_posts BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 2;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS news_search_ai AFTER INSERT ON news BEGIN
+        INSERT INTO search_index (rowid, title, body, kind, post_id)
+        VALUES (new.id * 2 + 1, new.title, strip_html(new.content), 'news', new.id);
+    END;
+    CREATE TRIGGER IF NOT EXISTS news_search_au AFTER UPDATE OF title, content ON news BEGIN
+        UPDATE search_index SET title = new.title, body = strip_html(new.content) WHERE rowid = old.id * 2 + 1;
+    END;
+    CREATE TRIGGER IF NOT EXISTS news_search_ad AFTER DELETE ON news BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 2 + 1;
+    END;
+"""
+
+_REBUILD_SEARCH_INDEX_V3 = """
+    DELETE FROM search_index;
+    INSERT INTO search_index (rowid, title, body, kind, post_id)
+        SELECT id * 2, title, strip_html(content), 'pastoral', id FROM pastoral_posts;
+    INSERT INTO search_index (rowid, title, body, kind, post_id)
+        SELECT id * 2 + 1, title, strip_html(content), 'news', id FROM news;
+"""
+
+
+def _search_index(cursor: sqlite3.Cursor):
+    """Full-text search over pastoral posts and news, kept in sync by triggers"""
+    _run_script(cursor, _SEARCH_INDEX_V3)
+    _run_script(cursor, _REBUILD_SEARCH_INDEX_V3)
+
+
+def _pastoral_keyset_index(cursor: sqlite3.Cursor):
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_pastoral_posts_created ON pastoral_posts (created_at, id)")
+
+
+def _hot_path_indexes(cursor: sqlite3.Cursor):
+    _run_script(cursor, """
+        -- Comment threads: filter and order in one index range
+        CREATE INDEX IF NOT EXISTS idx_comments_post ON comments (post_type, post_id, created_at);
+        -- Home page and admin lists, newest first
+        CREATE INDEX IF NOT EXISTS idx_sermons_date ON sermons (date);
+        CREATE INDEX IF NOT EXISTS idx_visions_date ON visions (date);
+        CREATE INDEX IF NOT EXISTS idx_shorts_date ON shorts (date);
+        CREATE INDEX IF NOT EXISTS idx_qtys_date ON qtys (date);
+        CREATE INDEX IF NOT EXISTS idx_news_date ON news (date);
+        CREATE INDEX IF NOT EXISTS idx_members_order ON members (display_order, id);
+        -- Registration checks for an existing email
+        CREATE INDEX IF NOT EXISTS idx_users_email ON users (email);
+    """)
+
+
+def _sessions(cursor: sqlite3.Cursor):
+    """Login sessions for the sqlite session backend (sessions.py)"""
+    _run_script(cursor, """
+        CREATE TABLE IF NOT EXISTS sessions (
+            token_hash TEXT PRIMARY KEY,
+            data TEXT NOT NULL,
+            expires_at INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires_at);
+    """)
+
+
+def _image_variants(cursor: sqlite3.Cursor):
+    """Resized/re-encoded copies of uploaded and static images (images.py)"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS image_variants (
+            source TEXT NOT NULL,
+            width INTEGER NOT NULL,
+            format TEXT NOT NULL,
+            path TEXT NOT NULL,
+            bytes INTEGER NOT NULL,
+            PRIMARY KEY (source, width, format)
+        )
+    """)
+
+
+def _youtube_columns(cursor: sqlite3.Cursor):
+    """Parsed video id and thumbnail, stored instead of re-parsed per request"""
+    for table in VIDEO_TABLES:
+        _add_column(cursor, table, "youtube_id", "TEXT")
+        _add_column(cursor, table, "thumbnail", "TEXT")
+    fill_youtube_columns(cursor)
+
+
+def _local_thumbnails(cursor: sqlite3.Cursor):
+    """Point stored thumbnails at the /thumbs proxy instead of img.youtube.com"""
+    for table in VIDEO_TABLES:
+        cursor.execute(f"UPDATE {table} SET thumbnail = '/thumbs/' || youtube_id || '.webp' WHERE youtube_id IS NOT NULL")
+
+
+def _content_versions(cursor: sqlite3.Cursor):
+    """Per-table content versions behind ETag/Last-Modified (conditional.py)"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS content_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL,
+            updated_at INTEGER NOT NULL
+        )
+    """)
+    cursor.executemany("INSERT OR IGNORE INTO content_versions (name, version, updated_at) "
+                       "VALUES (?, 1, CAST(strftime('%s', 'now') AS INTEGER))",
+                       [(table,) for table in CONTENT_TABLES])
+    for table in CONTENT_TABLES:
+        _run_script(cursor, version_triggers(table))
+
+
+def _pastoral_text_columns(cursor: sqlite3.Cursor):
+    """Stored excerpt, length and reading time, so list pages never read post bodies"""
+    _add_column(cursor, "pastoral_posts", "excerpt", "TEXT")
+    _add_column(cursor, "pastoral_posts", "text_length", "INTEGER")
+    _add_column(cursor, "pastoral_posts", "reading_minutes", "INTEGER")
+    fill_text_columns(cursor)
+
+
+def _comment_counts(cursor: sqlite3.Cursor):
+    """Denormalized comment counts, kept by queries.add_comment / delete_comment"""
+    for table, post_type in (("news", "news"), ("pastoral_posts", "pastoral")):
+        _add_column(cursor, table, "comment_count", "INTEGER NOT NULL DEFAULT 0")
+        cursor.execute(f"""
+            UPDATE {table} SET comment_count = (
+                SELECT COUNT(*) FROM comments WHERE post_type = '{post_type}' AND post_id = {table}.id)
+        """)
+
+
+def _youtube_id_indexes(cursor: sqlite3.Cursor):
+    """/thumbs only fetches ids some video row links (queries.known_video)"""
+    for table in VIDEO_TABLES:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_youtube_id ON {table} (youtube_id)")
+
+
+# As shipped in migration 14 (migration 16 adds the grams column)
+_SEARCH_TRIGGERS_V14 = """
+    DROP TRIGGER IF EXISTS pastoral_posts_search_ai;
+    DROP TRIGGER IF EXISTS pastoral_posts_search_au;
+    DROP TRIGGER IF EXISTS news_search_ai;
+    DROP TRIGGER IF EXISTS news_search_au;
+
+    CREATE TRIGGER pastoral_posts_search_ai AFTER INSERT ON pastoral_posts BEGIN
+        INSERT INTO search_index (rowid, title, body, kind, post_id)
+        VALUES (new.id * 2, new.title, new.search_body, 'pastoral', new.id);
+    END;
+    CREATE TRIGGER pastoral_posts_search_au AFTER UPDATE OF title, search_body ON pastoral_posts BEGIN
+        UPDATE search_index SET title = new.title, body = new.search_body WHERE rowid = old.id * 2;
+    END;
+
+    CREATE TRIGGER news_search_ai AFTER INSERT ON news BEGIN
+        INSERT INTO search_index (rowid, title, body, kind, post_id)
+        VALUES (new.id * 2 + 1, new.title, new.search_body, 'news', new.id);
+    END;
+    CREATE TRIGGER news_search_au AFTER UPDATE OF title, search_body ON news BEGIN
+        UPDATE search_index SET title = new.title, body = new.search_body WHERE rowid = old.id * 2 + 1;
+    END;
+"""
+
+_REBUILD_SEARCH_INDEX_V14 = """
+    DELETE FROM search_index;
+    INSERT INTO search_index (rowid, title, body, kind, post_id)
+        SELECT id * 2, title, search_body, 'pastoral', id FROM pastoral_posts;
+    INSERT INTO search_index (rowid, title, body, kind, post_id)
+        SELECT id * 2 + 1, title, search_body, 'news', id FROM news;
+"""
+
+
+def _search_body_column(cursor: sqlite3.Cursor):
+    """Index stored plain text, so the search triggers need no custom SQL function"""
+    for table in ("pastoral_posts", "news"):
+        _add_column(cursor, table, "search_body", "TEXT")
+        cursor.execute(f"SELECT id, content FROM {table} WHERE search_body IS NULL")
+        cursor.executemany(f"UPDATE {table} SET search_body = ? WHERE id = ?",
+                           [(strip_html(content), row_id) for row_id, content in cursor.fetchall()])
+    _run_script(cursor, _SEARCH_TRIGGERS_V14)
+    _run_script(cursor, _REBUILD_SEARCH_INDEX_V14)
+
+
+def _variant_names(cursor: sqlite3.Cursor):
+    """Forget variants named by stem alone: same-named images overwrote each other's (`python -m images` remakes them)"""
+    cursor.execute("DELETE FROM image_variants")
+
+
+def _search_grams(cursor: sqlite3.Cursor):
+    """Index 2-character grams, so two-syllable terms (사랑, 기도) don't fall back to LIKE"""
+    for table in ("pastoral_posts", "news"):
+        _add_column(cursor, table, "search_grams", "TEXT")
+    # An FTS5 table can't gain a column; it is rebuilt from the stored columns
+    cursor.execute("DROP TABLE IF EXISTS search_index")
+    _run_script(cursor, SEARCH_INDEX)
+    _run_script(cursor, SEARCH_TRIGGERS)
+    fill_search_bodies(cursor)
+    _run_script(cursor, REBUILD_SEARCH_INDEX)
+
+
+def _image_variant_versions(cursor: sqlite3.Cursor):
+    """Version image_variants like content: every page's <picture> markup depends on it (images.VARIANTS_VERSION)"""
+    cursor.execute("INSERT OR IGNORE INTO content_versions (name, version, updated_at) "
+                   "VALUES ('image_variants', 1, CAST(strftime('%s', 'now') AS INTEGER))")
+    _run_script(cursor, version_triggers("image_variants"))
+
+
+# (version, name, apply(cursor)). Append only; never renumber or edit an
+# applied migration, add a new one instead.
+MIGRATIONS = [
+    (1, "base tables", _base_tables),
+    (2, "legacy columns", _legacy_columns),
+    (3, "search index", _search_index),
+    (4, "pastoral keyset index", _pastoral_keyset_index),
+    (5, "hot path indexes", _hot_path_indexes),
+    (6, "sessions", _sessions),
+    (7, "image variants", _image_variants),
+    (8, "youtube columns", _youtube_columns),
+    (9, "local thumbnails", _local_thumbnails),
+    (10, "content versions", _content_versions),
+    (11, "pastoral text columns", _pastoral_text_columns),
+    (12, "comment counts", _comment_counts),
+    (13, "youtube id indexes", _youtube_id_indexes),
+    (14, "search body column", _search_body_column),
+    (15, "variant names", _variant_names),
+    (16, "search grams", _search_grams),
+    (17, "image variant versions", _image_variant_versions),
+]
+
+
+def applied_versions(conn: sqlite3.Connection) -> set:
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+    """)
+    conn.commit()
+    return {row[0] for row in conn.execute("SELECT version FROM schema_migrations")}
+
+
+def migrate(conn: sqlite3.Connection) -> list:
+    """Apply pending migrations in order; returns the versions applied.
+
+    Each one takes the write lock up front (BEGIN IMMEDIATE) and re-checks
+    the version table, so workers starting together apply it only once.
+    """
+    applied = []
+    pending = [m for m in MIGRATIONS if m[0] not in applied_versions(conn)]
+    for version, name, apply in pending:
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            cursor.execute("SELECT 1 FROM schema_migrations WHERE version = ?", (version,))
+            if cursor.fetchone() is None:
+                apply(cursor)
+                cursor.execute("INSERT INTO schema_migrations (version, name, applied_at) VALUES (?, ?, ?)",
+                               (version, name, datetime.now().isoformat()))
+                applied.append(version)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    return applied
+
+
+def full_scans(conn: sqlite3.Connection, sql: str, params=()) -> list:
+    """EXPLAIN QUERY PLAN steps that scan a whole table or sort in a temp b-tree"""
+    problems = []
+    for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params):
+        detail = row[-1]
+        if detail.startswith("SCAN ") and " USING " not in detail and "VIRTUAL TABLE" not in detail:
+            problems.append(detail)
+        elif detail.startswith("USE TEMP B-TREE"):
+            problems.append(detail)
+    return problems
+
+
+def check_query_plans(conn: sqlite3.Connection, statements=None) -> dict:
+    """Map each hot query that needs a full scan to the offending plan steps.
+
+    An empty result means every statement is index-backed. Defaults to
+    queries.HOT_QUERIES.
+    """
+    if statements is None:
+        from queries import HOT_QUERIES
+        statements = HOT_QUERIES
+    report = {}
+    for sql, params in statements:
+        problems = full_scans(conn, sql, params)
+        if problems:
+            report[" ".join(sql.split())] = problems
+    return report
+
+
+if __name__ == "__main__":
+    from db import DB_PATH, ConnectionPool
+
+    conn = ConnectionPool(sys.argv[1] if len(sys.argv) > 1 else DB_PATH).connect()
+    print("applied:", migrate(conn) or "nothing pending")
+    problems = check_query_plans(conn)
+    for sql, steps in problems.items():
+        print(f"FULL SCAN: {sql}\n    {'; '.join(steps)}")
+    conn.close()
+    sys.exit(1 if problems else 0)
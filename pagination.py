@@ -0,0 +1,24 @@
+"""Keyset pagination: opaque cursors over an index on (sort key, id), e.g. (created_at, id)"""
+import base64
+import json
+from typing import Optional, Tuple, Union
+
+
+def encode_cursor(created_at: Union[str, int], row_id: int) -> str:
+    """Opaque, URL-safe token for the position of a row"""
+    raw = json.dumps([created_at, row_id], ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: Optional[str]) -> Optional[Tuple[Union[str, int], int]]:
+    """(sort key, id) from a token, or None if it is missing or malformed"""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        created_at, row_id = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(created_at, (str, int)) or not isinstance(row_id, int):
+        return None
+    return created_at, row_id
@@ -0,0 +1,281 @@
+"""On-demand profiles of live requests, for admins: ?_profile=speedscope
+
+An admin adds `_profile=speedscope` (or `_profile=flamegraph`) to any
+URL. ProfilerMiddleware then runs that one request under a sampling
+profiler and answers with the profile as a download instead of the page:
+a speedscope.app file, or collapsed stacks for flamegraph.pl (which
+speedscope opens too). The flag is stripped before the app sees the
+request, and ignored for anyone but an admin.
+
+The sampler wakes every PROFILE_INTERVAL_MS and records the stacks of
+the event loop thread and of the DB threads running this request's
+ConnectionPool.run calls, weighted by wall time. The event loop is
+shared, so its stacks also show what other requests did meanwhile.
+
+Every profile is also written to PROFILE_DIR, shared by the workers,
+which keeps the PROFILE_KEEP slowest of the last PROFILE_MAX_AGE seconds
+for /admin/profiles. Without the flag a request costs one substring test
+of its query string.
+"""
+import asyncio
+import contextvars
+import itertools
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "church-profiles")))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "2"))
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "30"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "20"))
+PROFILE_MAX_AGE = int(os.getenv("PROFILE_MAX_AGE", str(24 * 3600)))
+
+PROFILE_PARAM = "_profile"
+# format -> (media type, file suffix)
+FORMATS = {
+    "speedscope": ("application/json", ".speedscope.json"),
+    "flamegraph": ("text/plain; charset=utf-8", ".folded.txt"),
+}
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+_current = contextvars.ContextVar("profile", default=None)
+_profile_id = re.compile(r"^\d+-\d+-\d+$")
+
+
+def _stack(frame) -> tuple:
+    """(function, file, line) from the outermost frame in"""
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append((code.co_qualname, code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+class Profile:
+    """Wall-clock stack samples of one request, taken by a background thread"""
+
+    running = 0  # profiles in progress in this worker; ConnectionPool.run only looks for one when > 0
+
+    def __init__(self, label: str, interval: float = PROFILE_INTERVAL_MS / 1000):
+        self.label = label
+        self.interval = interval
+        self.loop_thread = threading.get_ident()
+        self.threads = set()  # DB threads running one of this request's calls
+        self.samples = {}  # thread ident -> [(stack, seconds)]
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, name="profiler", daemon=True)
+
+    def start(self):
+        Profile.running += 1
+        self._started = time.perf_counter()
+        self._sampler.start()
+
+    def stop(self):
+        self._stop.set()
+        self._sampler.join()
+        self.seconds = time.perf_counter() - self._started
+        Profile.running -= 1
+
+    def _sample(self):
+        last = self._started
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            weight, last = now - last, now
+            frames = sys._current_frames()
+            with self._lock:
+                threads = (self.loop_thread, *self.threads)
+            for ident in threads:
+                frame = frames.get(ident)
+                if frame is not None:
+                    self.samples.setdefault(ident, []).append((_stack(frame), weight))
+            del frames
+            if now - self._started > PROFILE_MAX_SECONDS:
+                break
+
+    def on_thread(self, call):
+        """Wrap a DB executor call so the sampler follows the thread running it"""
+        def sampled():
+            ident = threading.get_ident()
+            with self._lock:
+                self.threads.add(ident)
+            try:
+                return call()
+            finally:
+                with self._lock:
+                    self.threads.discard(ident)
+        return sampled
+
+    def speedscope(self) -> dict:
+        """speedscope file: one sampled profile per thread, sharing one frame table"""
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        index = {}
+        profiles = []
+        for ident, samples in self.samples.items():
+            profiles.append({
+                "type": "sampled",
+                "name": "event loop" if ident == self.loop_thread else names.get(ident, f"thread {ident}"),
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": round(sum(weight for _, weight in samples) * 1000, 3),
+                "samples": [[index.setdefault(key, len(index)) for key in stack] for stack, _ in samples],
+                "weights": [round(weight * 1000, 3) for _, weight in samples],
+            })
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": self.label,
+            "exporter": "church-website",
+            "activeProfileIndex": 0,
+            "shared": {"frames": [{"name": name, "file": file, "line": line} for name, file, line in index]},
+            "profiles": profiles,
+        }
+
+
+def collapsed(document: dict) -> str:
+    """Collapsed stacks (`thread;outer;inner microseconds`) from a speedscope document"""
+    frames = [f"{frame['name']} ({os.path.basename(frame['file'])}:{frame['line']})"
+              for frame in document["shared"]["frames"]]
+    totals = Counter()
+    for profile in document["profiles"]:
+        thread = profile["name"].replace(";", ":")
+        for stack, weight in zip(profile["samples"], profile["weights"]):
+            totals[";".join([thread, *(frames[i].replace(";", ":") for i in stack)])] += weight * 1000
+    return "".join(f"{stack} {round(us)}\n" for stack, us in totals.items() if round(us))
+
+
+def render(document: dict, fmt: str) -> bytes:
+    return (json.dumps(document) if fmt == "speedscope" else collapsed(document)).encode()
+
+
+def current() -> Optional[Profile]:
+    """The profile of the request being handled, if it is being profiled"""
+    return _current.get() if Profile.running else None
+
+
+class ProfileStore:
+    """Profiles on disk, shared by the workers: the slowest PROFILE_KEEP of the last PROFILE_MAX_AGE seconds"""
+
+    def __init__(self, directory: Path = PROFILE_DIR, keep: int = PROFILE_KEEP, max_age: int = PROFILE_MAX_AGE):
+        self.directory = directory
+        self.keep = keep
+        self.max_age = max_age
+        self._ids = itertools.count()
+
+    def save(self, meta: dict, document: dict) -> str:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        profile_id = f"{int(time.time() * 1000)}-{os.getpid()}-{next(self._ids)}"
+        (self.directory / f"{profile_id}.json").write_text(json.dumps(document))
+        # The index entry goes last: list() only shows profiles that are complete
+        (self.directory / f"{profile_id}.meta.json").write_text(json.dumps({"id": profile_id, **meta}))
+        self.prune()
+        return profile_id
+
+    def list(self) -> list:
+        """Index entries, slowest first"""
+        entries = []
+        for path in self.directory.glob("*.meta.json"):
+            try:
+                entries.append(json.loads(path.read_text()))
+            except (OSError, ValueError):  # pruned by another worker meanwhile
+                continue
+        return sorted(entries, key=lambda entry: entry["ms"], reverse=True)
+
+    def load(self, profile_id: str) -> Optional[dict]:
+        if not _profile_id.match(profile_id):
+            return None
+        try:
+            return json.loads((self.directory / f"{profile_id}.json").read_text())
+        except (OSError, ValueError):
+            return None
+
+    def export(self, profile_id: str, fmt: str) -> Optional[bytes]:
+        document = self.load(profile_id)
+        if document is None:
+            return None
+        return render(document, fmt)
+
+    def prune(self):
+        entries = self.list()
+        cutoff = time.time() - self.max_age
+        fresh = [entry for entry in entries if entry["at"] >= cutoff]
+        kept = {entry["id"] for entry in fresh[:self.keep]}
+        for entry in entries:
+            if entry["id"] not in kept:
+                (self.directory / f"{entry['id']}.meta.json").unlink(missing_ok=True)
+                (self.directory / f"{entry['id']}.json").unlink(missing_ok=True)
+
+
+profile_store = ProfileStore()
+
+
+def download(profile_id: str, fmt: str, body: bytes, headers: Optional[dict] = None) -> Response:
+    media_type, suffix = FORMATS[fmt]
+    return Response(body, media_type=media_type, headers={
+        "Content-Disposition": f'attachment; filename="profile-{profile_id}{suffix}"',
+        "Cache-Control": "no-store",
+        **(headers or {}),
+    })
+
+
+class ProfilerMiddleware:
+    """ASGI middleware answering an admin's ?_profile=<format> request with its profile.
+
+    `authorize(request)` decides whether the flag is honoured (main.py
+    passes an admin check); otherwise the request runs as usual.
+    """
+
+    def __init__(self, app, authorize):
+        self.app = app
+        self.authorize = authorize
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or PROFILE_PARAM.encode() not in scope["query_string"]:
+            await self.app(scope, receive, send)
+            return
+        query = parse_qsl(scope["query_string"].decode("latin-1"), keep_blank_values=True)
+        requested = [value for name, value in query if name == PROFILE_PARAM]
+        fmt = (requested[-1] if requested else "") or "speedscope"
+        if not requested or fmt not in FORMATS or not await self.authorize(Request(scope)):
+            await self.app(scope, receive, send)
+            return
+
+        # The app sees the request without the flag, and its response is dropped for the profile
+        scope = {**scope, "query_string": urlencode([(n, v) for n, v in query if n != PROFILE_PARAM]).encode()}
+        status = 500
+
+        async def discard(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        profile = Profile(f"{scope['method']} {scope['path']}")
+        token = _current.set(profile)
+        profile.start()
+        try:
+            await self.app(scope, receive, discard)
+        finally:
+            profile.stop()
+            _current.reset(token)
+            meta = {"at": round(time.time(), 3), "method": scope["method"], "path": scope["path"],
+                    "query": scope["query_string"].decode("latin-1"), "status": status,
+                    "ms": round(profile.seconds * 1000, 1),
+                    "samples": sum(len(samples) for samples in profile.samples.values())}
+            document = await asyncio.to_thread(profile.speedscope)
+            profile_id = await asyncio.to_thread(profile_store.save, meta, document)
+        body = await asyncio.to_thread(render, document, fmt)
+        response = download(profile_id, fmt, body, {"X-Profiled-Status": str(status)})
+        await response(scope, receive, send)
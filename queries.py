@@ -0,0 +1,519 @@
+"""Data-access layer: blocking SQLite work, run off the event loop via ConnectionPool.run"""
+import os
+from typing import Optional
+
+from cache import row_counts
+from counters import COUNTED_TABLES, view_counter
+from db import ConnectionPool
+from pagination import decode_cursor, encode_cursor
+from search import search_filter
+from youtube import VIDEO_TABLES
+
+DEFAULT_CHURCH_INTRO = "더하는 교회는 하나님의 사랑과 예수 그리스도의 복음을 전하는 믿음의 공동체입니다."
+
+# youtube_id and thumbnail are parsed from youtube_url when the row is written
+VIDEO_COLUMNS = "id, title, youtube_url, youtube_id, thumbnail, date, author"
+SERMON_COLUMNS = "id, title, pastor, date, description, youtube_url, youtube_id, thumbnail"
+NEWS_LIST_COLUMNS = "id, title, date, views, author, image_path, comment_count"
+NEWS_COLUMNS = "id, title, content, date, views, author, image_path, comment_count"
+PASTORAL_COLUMNS = "id, title, content, image_path, author, views, created_at, comment_count"
+
+COMMENTS_PER_PAGE = int(os.getenv("COMMENTS_PER_PAGE", "50"))
+# comments.post_type -> the table whose comment_count it keeps
+COMMENT_TABLES = {"news": "news", "pastoral": "pastoral_posts"}
+COMMENTS_SQL = """
+    SELECT c.id, c.content, c.created_at, u.username, u.name, c.user_id
+    FROM comments c JOIN users u ON c.user_id = u.id
+    WHERE c.post_type=? AND c.post_id=? {keyset}
+    ORDER BY c.created_at ASC, c.id ASC LIMIT ?
+"""
+
+
+def _video(row) -> dict:
+    return {"id": row[0], "title": row[1], "youtube_url": row[2], "youtube_id": row[3],
+            "thumbnail": row[4], "date": row[5], "author": row[6]}
+
+
+def _sermon(row) -> dict:
+    return {"id": row[0], "title": row[1], "pastor": row[2], "date": row[3], "description": row[4],
+            "youtube_url": row[5], "youtube_id": row[6], "thumbnail": row[7]}
+
+
+# Tables the homepage is built from (drives page cache invalidation and validators)
+HOME_TABLES = ("church_info", "visions", "sermons", "shorts", "qtys", "news")
+
+
+def home_data(db: ConnectionPool) -> dict:
+    """Everything the homepage renders"""
+    cursor = db.reader().cursor()
+
+    cursor.execute("SELECT content FROM church_info WHERE id=1")
+    result = cursor.fetchone()
+    church_intro = result[0] if result else DEFAULT_CHURCH_INTRO
+
+    cursor.execute(f"SELECT {VIDEO_COLUMNS} FROM visions ORDER BY date DESC LIMIT 5")
+    visions = [_video(row) for row in cursor.fetchall()]
+
+    cursor.execute(f"SELECT {SERMON_COLUMNS} FROM sermons ORDER BY date DESC LIMIT 5")
+    sermons = [_sermon(row) for row in cursor.fetchall()]
+
+    cursor.execute(f"SELECT {VIDEO_COLUMNS} FROM shorts ORDER BY date DESC LIMIT 10")
+    shorts = [_video(row) for row in cursor.fetchall()]
+
+    cursor.execute(f"SELECT {VIDEO_COLUMNS} FROM qtys ORDER BY date DESC LIMIT 10")
+    qtys = [_video(row) for row in cursor.fetchall()]
+
+    cursor.execute(f"SELECT {NEWS_LIST_COLUMNS} FROM news ORDER BY date DESC LIMIT 5")
+    news_list = [{"id": row[0], "title": row[1], "date": row[2], "views": row[3] + view_counter.pending("news", row[0]),
+                  "author": row[4], "image_path": row[5], "comment_count": row[6]}
+                 for row in cursor.fetchall()]
+
+    return {
+        "visions": visions, "sermons": sermons, "shorts": shorts,
+        "qtys": qtys, "news_list": news_list, "church_intro": church_intro
+    }
+
+
+def about_data(db: ConnectionPool) -> dict:
+    cursor = db.reader().cursor()
+    cursor.execute("SELECT vision_title, vision_content, mission_content, pastoral_direction, serving_people FROM church_about WHERE id=1")
+    row = cursor.fetchone()
+    return {
+        "vision_title": row[0] if row else "더하는교회의 비전",
+        "vision_content": row[1] if row else "",
+        "mission_content": row[2] if row else "",
+        "pastoral_direction": row[3] if row else "",
+        "serving_people": row[4] if row else ""
+    }
+
+
+def pastoral_direction(db: ConnectionPool) -> str:
+    cursor = db.reader().cursor()
+    cursor.execute("SELECT pastoral_direction FROM church_about WHERE id=1")
+    row = cursor.fetchone()
+    return row[0] if row and row[0] else ""
+
+
+def people_data(db: ConnectionPool) -> dict:
+    cursor = db.reader().cursor()
+    cursor.execute("SELECT * FROM members ORDER BY display_order ASC, id ASC")
+    members = [{"id": row[0], "name": row[1], "role": row[2], "bio": row[3],
+                "photo_path": row[4], "display_order": row[5]}
+               for row in cursor.fetchall()]
+    cursor.execute("SELECT serving_people FROM church_about WHERE id=1")
+    row = cursor.fetchone()
+    intro = row[0] if row and row[0] else ""
+    return {"members": members, "intro": intro}
+
+
+PASTORAL_COUNT_SQL = "SELECT COUNT(*) FROM pastoral_posts"
+
+
+# What the board list shows; the body stays out of list queries (excerpt is stored)
+PASTORAL_LIST_COLUMNS = ("id", "title", "image_path", "author", "views", "created_at", "excerpt", "reading_minutes",
+                         "comment_count")
+PASTORAL_LIST_SELECT = ", ".join(PASTORAL_LIST_COLUMNS)
+
+
+def _pastoral_post(row) -> dict:
+    post = dict(zip(PASTORAL_LIST_COLUMNS, row))
+    post["views"] += view_counter.pending("pastoral_posts", post["id"])
+    return post
+
+
+def pastoral_page(db: ConnectionPool, page: int, per_page: int, q: str = "",
+                  after: Optional[str] = None, before: Optional[str] = None) -> dict:
+    """One page of the pastoral board, optionally filtered by a search term.
+
+    The unfiltered board is paged by keyset on (created_at, id): `after`
+    and `before` are cursors from a previous page, and a bare `page` is
+    turned into a cursor with an index-only seek, so deep pages don't read
+    and discard OFFSET full rows. Search results come from search_index
+    (see search_filter), are ordered by rank and keep plain OFFSET paging.
+    A `page` past the last one (it comes straight from ?page=N) returns no
+    posts without querying, so no OFFSET runs beyond the rows there are.
+    """
+    page = max(page, 1)
+    past_end = {"posts": [], "page": page, "has_prev": False, "has_next": False,
+                "prev_cursor": None, "next_cursor": None}
+    cursor = db.reader().cursor()
+    if q.strip():
+        match, likes, params, ranked = search_filter(q)
+        if match:
+            # search_index rowids are id * 2 for pastoral posts (search.py)
+            source = "search_index JOIN pastoral_posts p ON p.id = search_index.rowid / 2"
+            where = " AND ".join(filter(None, ("search_index MATCH ? AND search_index.rowid % 2 = 0", likes)))
+            params = [match, *params]
+        else:
+            source, where = "pastoral_posts p", likes
+        if likes:
+            cursor.execute(f"SELECT COUNT(*) FROM {source} WHERE {where}", params)
+        else:  # the index alone can count
+            cursor.execute("SELECT COUNT(*) FROM search_index WHERE search_index MATCH ? AND rowid % 2 = 0", params)
+        total = cursor.fetchone()[0]
+        if page > 1 and (page - 1) * per_page >= total:
+            return {**past_end, "total": total}
+        cursor.execute(f"""
+            SELECT {", ".join("p." + c for c in PASTORAL_LIST_COLUMNS)} FROM {source} WHERE {where}
+            ORDER BY {"search_index.rank" if ranked else "p.created_at DESC, p.id DESC"} LIMIT ? OFFSET ?
+        """, (*params, per_page, (page - 1) * per_page))
+        posts = [_pastoral_post(row) for row in cursor.fetchall()]
+        return {"posts": posts, "total": total, "page": page,
+                "has_prev": page > 1, "has_next": page * per_page < total,
+                "prev_cursor": None, "next_cursor": None}
+
+    total = row_counts.get("pastoral_posts", lambda: cursor.execute(PASTORAL_COUNT_SQL).fetchone()[0])
+    after_key, before_key = decode_cursor(after), decode_cursor(before)
+    if not after_key and not before_key and page > 1 and (page - 1) * per_page >= total:
+        return {**past_end, "total": total}
+    if before_key:
+        cursor.execute(f"""
+            SELECT {PASTORAL_LIST_SELECT} FROM pastoral_posts WHERE (created_at, id) > (?, ?)
+            ORDER BY created_at ASC, id ASC LIMIT ?
+        """, (*before_key, per_page + 1))
+        rows = cursor.fetchall()
+        has_prev, has_next = len(rows) > per_page, True
+        rows = rows[:per_page][::-1]
+    else:
+        if not after_key and page > 1:
+            # Seek to the page start on the covering index alone
+            cursor.execute("""
+                SELECT created_at, id FROM pastoral_posts
+                ORDER BY created_at DESC, id DESC LIMIT 1 OFFSET ?
+            """, ((page - 1) * per_page - 1,))
+            after_key = cursor.fetchone() or (None, None)  # past the end: NULLs match nothing
+        if after_key:
+            cursor.execute(f"""
+                SELECT {PASTORAL_LIST_SELECT} FROM pastoral_posts WHERE (created_at, id) < (?, ?)
+                ORDER BY created_at DESC, id DESC LIMIT ?
+            """, (*after_key, per_page + 1))
+        else:
+            cursor.execute(f"SELECT {PASTORAL_LIST_SELECT} FROM pastoral_posts ORDER BY created_at DESC, id DESC LIMIT ?",
+                           (per_page + 1,))
+        rows = cursor.fetchall()
+        has_prev, has_next = page > 1, len(rows) > per_page
+        rows = rows[:per_page]
+    posts = [_pastoral_post(row) for row in rows]
+    return {"posts": posts, "total": total, "page": page,
+            "has_prev": has_prev and bool(posts), "has_next": has_next and bool(posts),
+            "prev_cursor": encode_cursor(posts[0]["created_at"], posts[0]["id"]) if posts else None,
+            "next_cursor": encode_cursor(posts[-1]["created_at"], posts[-1]["id"]) if posts else None}
+
+
+def post_comments(db: ConnectionPool, post_type: str, post_id: int, after: Optional[str] = None,
+                  limit: int = COMMENTS_PER_PAGE) -> dict:
+    """One page of a comment thread, oldest first, keyset-paged on (created_at, id)"""
+    cursor = db.reader().cursor()
+    after_key = decode_cursor(after)
+    keyset = "AND (c.created_at, c.id) > (?, ?)" if after_key else ""
+    cursor.execute(COMMENTS_SQL.format(keyset=keyset), (post_type, post_id, *(after_key or ()), limit + 1))
+    comments = [{"id": r[0], "content": r[1], "created_at": r[2],
+                 "username": r[3], "name": r[4], "user_id": r[5]}
+                for r in cursor.fetchall()]
+    has_next = len(comments) > limit
+    comments = comments[:limit]
+    last = comments[-1] if comments else None
+    return {"comments": comments,
+            "next_cursor": encode_cursor(last["created_at"], last["id"]) if has_next else None}
+
+
+def view_pastoral_post(db: ConnectionPool, post_id: int, comments_after: Optional[str] = None) -> Optional[dict]:
+    """Load the post with a page of its comments and count a buffered view (None if missing)"""
+    cursor = db.reader().cursor()
+    with view_counter.lock:
+        cursor.execute(f"SELECT {PASTORAL_COLUMNS} FROM pastoral_posts WHERE id=?", (post_id,))
+        row = cursor.fetchone()
+        if not row:
+            return None
+        views = row[5] + view_counter.add("pastoral_posts", post_id)
+    view_counter.flush_if_due(db)
+    post = {"id": row[0], "title": row[1], "content": row[2], "image_path": row[3],
+            "author": row[4], "views": views, "created_at": row[6], "comment_count": row[7]}
+    return {"post": post, **post_comments(db, "pastoral", post_id, comments_after)}
+
+
+def view_news(db: ConnectionPool, news_id: int, comments_after: Optional[str] = None) -> Optional[dict]:
+    """Load the news item with a page of its comments and count a buffered view (None if missing)"""
+    cursor = db.reader().cursor()
+    with view_counter.lock:
+        cursor.execute(f"SELECT {NEWS_COLUMNS} FROM news WHERE id=?", (news_id,))
+        row = cursor.fetchone()
+        if not row:
+            return None
+        views = row[4] + view_counter.add("news", news_id)
+    view_counter.flush_if_due(db)
+    news = {"id": row[0], "title": row[1], "content": row[2], "date": row[3], "views": views, "author": row[5],
+            "image_path": row[6], "comment_count": row[7]}
+    return {"news": news, **post_comments(db, "news", news_id, comments_after)}
+
+
+def count_view(db: ConnectionPool, table: str, row_id: int):
+    """Count a buffered view without loading the row (for a 304 revalidation)"""
+    with view_counter.lock:
+        view_counter.add(table, row_id)
+    view_counter.flush_if_due(db)
+
+
+KNOWN_VIDEO_SQL = " UNION ALL ".join(f"SELECT 1 FROM {table} WHERE youtube_id = ?" for table in VIDEO_TABLES) + " LIMIT 1"
+
+
+def known_video(db: ConnectionPool, video_id: str) -> bool:
+    """Whether a vision, sermon, short or QT links this YouTube id (the only ones /thumbs fetches)"""
+    return db.reader().execute(KNOWN_VIDEO_SQL, (video_id,) * len(VIDEO_TABLES)).fetchone() is not None
+
+
+def content_versions(db: ConnectionPool, tables) -> list:
+    """(name, version, updated_at) for each of the given content tables"""
+    return db.reader().execute(
+        f"SELECT name, version, updated_at FROM content_versions WHERE name IN ({', '.join('?' * len(tables))})",
+        tuple(tables)).fetchall()
+
+
+def registration_conflict(db: ConnectionPool, username: str, email: str) -> Optional[str]:
+    """Return "username" or "email" if either is already registered"""
+    cursor = db.reader().cursor()
+    cursor.execute("SELECT id FROM users WHERE username=?", (username,))
+    if cursor.fetchone():
+        return "username"
+    cursor.execute("SELECT id FROM users WHERE email=?", (email,))
+    if cursor.fetchone():
+        return "email"
+    return None
+
+
+def login_user(db: ConnectionPool, username: str) -> Optional[tuple]:
+    cursor = db.reader().cursor()
+    cursor.execute("SELECT id, username, password, role FROM users WHERE username=?", (username,))
+    return cursor.fetchone()
+
+
+def comment_owner(db: ConnectionPool, comment_id: int) -> Optional[int]:
+    cursor = db.reader().cursor()
+    cursor.execute("SELECT user_id FROM comments WHERE id=?", (comment_id,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def add_comment(db: ConnectionPool, post_type: str, post_id: int, user_id: int, content: str,
+                created_at: str) -> bool:
+    """Insert a comment and bump the post's comment_count; False if there is no such post"""
+    with db.write() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"UPDATE {COMMENT_TABLES[post_type]} SET comment_count = comment_count + 1 WHERE id=?",
+                       (post_id,))
+        if cursor.rowcount == 0:
+            return False
+        cursor.execute("""
+            INSERT INTO comments (post_type, post_id, user_id, content, created_at)
+            VALUES (?, ?, ?, ?, ?)
+        """, (post_type, post_id, user_id, content, created_at))
+    return True
+
+
+def delete_comment(db: ConnectionPool, comment_id: int) -> Optional[str]:
+    """Delete a comment and decrement its post's comment_count; the post's table, if any"""
+    with db.write() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT post_type, post_id FROM comments WHERE id=?", (comment_id,))
+        row = cursor.fetchone()
+        cursor.execute("DELETE FROM comments WHERE id=?", (comment_id,))
+        if row and row[0] in COMMENT_TABLES:
+            cursor.execute(f"UPDATE {COMMENT_TABLES[row[0]]} SET comment_count = max(comment_count - 1, 0) WHERE id=?",
+                           (row[1],))
+            return COMMENT_TABLES[row[0]]
+    return None
+
+
+def delete_pastoral_post(db: ConnectionPool, post_id: int) -> bool:
+    """Delete a post and its comments; False if there was no such post"""
+    with db.write() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM pastoral_posts WHERE id = ?", (post_id,))
+        deleted = cursor.rowcount > 0
+        cursor.execute("DELETE FROM comments WHERE post_type='pastoral' AND post_id=?", (post_id,))
+    return deleted
+
+
+def delete_news_post(db: ConnectionPool, news_id: int):
+    """Delete a news item and its comments"""
+    with db.write() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM news WHERE id = ?", (news_id,))
+        cursor.execute("DELETE FROM comments WHERE post_type='news' AND post_id=?", (news_id,))
+
+
+def admin_dashboard_data(db: ConnectionPool) -> dict:
+    """The single-row forms of /admin; the lists load through admin_section_page"""
+    cursor = db.reader().cursor()
+
+    # Get church info
+    cursor.execute("SELECT content FROM church_info WHERE id=1")
+    result = cursor.fetchone()
+    church_intro = result[0] if result else ""
+
+    # Get church about content
+    cursor.execute("SELECT vision_title, vision_content, mission_content, pastoral_direction, serving_people FROM church_about WHERE id=1")
+    about_row = cursor.fetchone()
+    about = {
+        "vision_title": about_row[0] if about_row else "",
+        "vision_content": about_row[1] if about_row else "",
+        "mission_content": about_row[2] if about_row else "",
+        "pastoral_direction": about_row[3] if about_row else "",
+        "serving_people": about_row[4] if about_row else ""
+    }
+
+    return {"church_intro": church_intro, "about": about}
+
+
+ADMIN_PAGE_SIZE = 50
+ADMIN_MAX_PAGE_SIZE = 200
+
+# Admin list sections: (table, list columns, sort column, newest first).
+# Lists carry what the table row and its inline editor show; long text
+# (sermon descriptions, post bodies) comes from admin_item when an
+# editor opens.
+ADMIN_SECTIONS = {
+    "visions": ("visions", "id, title, author, date, youtube_id", "date", True),
+    "sermons": ("sermons", "id, title, pastor, date, substr(description, 1, 100) AS excerpt", "date", True),
+    "shorts": ("shorts", "id, title, date, youtube_url", "date", True),
+    "qtys": ("qtys", "id, title, date, youtube_url", "date", True),
+    "pastoral": ("pastoral_posts", "id, title, author, created_at, views, image_path IS NOT NULL AS has_image",
+                 "created_at", True),
+    "news": ("news", "id, title, author, date, views, image_path IS NOT NULL AS has_image", "date", True),
+    "members": ("members", "id, name, role, display_order, photo_path", "display_order", False),
+}
+
+# Full rows for the sections whose editors need more than the list has
+ADMIN_ITEMS = {
+    "sermons": ("sermons", "id, title, pastor, date, description, youtube_url"),
+    "pastoral": ("pastoral_posts", "id, title, content"),
+}
+
+
+def _keyset_sql(table: str, columns: str, key: str, newest_first: bool, keyset: bool) -> str:
+    """SELECT one page of `table` ordered by (key, id); with `keyset`, starting after a (key, id) cursor"""
+    direction, op = ("DESC", "<") if newest_first else ("ASC", ">")
+    where = f"WHERE ({key}, id) {op} (?, ?) " if keyset else ""
+    return f"SELECT {columns} FROM {table} {where}ORDER BY {key} {direction}, id {direction} LIMIT ?"
+
+
+def _admin_section_sql(section: str, keyset: bool) -> str:
+    table, columns, key, newest_first = ADMIN_SECTIONS[section]
+    return _keyset_sql(table, columns, key, newest_first, keyset)
+
+
+def admin_section_page(db: ConnectionPool, section: str, limit: int = ADMIN_PAGE_SIZE,
+                       after: Optional[str] = None) -> dict:
+    """One page of an admin list, keyset-paged on (sort column, id)"""
+    table, _, key, _ = ADMIN_SECTIONS[section]
+    cursor = db.reader().cursor()
+    after_key = decode_cursor(after)
+    cursor.execute(_admin_section_sql(section, bool(after_key)), (*(after_key or ()), limit + 1))
+    names = [d[0] for d in cursor.description]
+    items = [dict(zip(names, row)) for row in cursor.fetchall()]
+    has_next = len(items) > limit
+    items = items[:limit]
+    if table in COUNTED_TABLES:
+        for item in items:
+            item["views"] += view_counter.pending(table, item["id"])
+    last = items[-1] if items else None
+    return {"items": items, "next_cursor": encode_cursor(last[key], last["id"]) if has_next else None}
+
+
+def admin_item(db: ConnectionPool, section: str, item_id: int) -> Optional[dict]:
+    """Everything an admin editor needs for one row (None if missing)"""
+    table, columns = ADMIN_ITEMS[section]
+    cursor = db.reader().cursor()
+    cursor.execute(f"SELECT {columns} FROM {table} WHERE id=?", (item_id,))
+    row = cursor.fetchone()
+    return dict(zip([d[0] for d in cursor.description], row)) if row else None
+
+
+# Public JSON API resources (api.py): (table, selectable fields, default
+# fields, sort column, newest first). Bodies (sermon descriptions, post
+# content) are only sent when asked for with ?fields=.
+_VIDEO_FIELDS = ("id", "title", "youtube_url", "youtube_id", "thumbnail", "date", "author")
+API_RESOURCES = {
+    "sermons": ("sermons", ("id", "title", "pastor", "date", "description", "youtube_url", "youtube_id", "thumbnail"),
+                ("id", "title", "pastor", "date", "youtube_url", "youtube_id", "thumbnail"), "date", True),
+    "visions": ("visions", _VIDEO_FIELDS, _VIDEO_FIELDS, "date", True),
+    "shorts": ("shorts", _VIDEO_FIELDS, _VIDEO_FIELDS, "date", True),
+    "qts": ("qtys", _VIDEO_FIELDS, _VIDEO_FIELDS, "date", True),
+    "news": ("news", ("id", "title", "content", "date", "views", "author", "image_path", "comment_count"),
+             ("id", "title", "date", "views", "author", "image_path", "comment_count"), "date", True),
+    "pastoral": ("pastoral_posts", PASTORAL_LIST_COLUMNS + ("content", "text_length"), PASTORAL_LIST_COLUMNS,
+                 "created_at", True),
+    "members": ("members", ("id", "name", "role", "bio", "photo_path", "display_order"),
+                ("id", "name", "role", "bio", "photo_path", "display_order"), "display_order", False),
+}
+
+
+def _api_rows(cursor, table: str, columns: list, fields: tuple) -> list:
+    rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    if table in COUNTED_TABLES and "views" in fields:
+        for row in rows:
+            row["views"] += view_counter.pending(table, row["id"])
+    return rows
+
+
+def api_page(db: ConnectionPool, resource: str, fields: tuple, limit: int, after: Optional[str] = None) -> dict:
+    """One page of an API resource with only `fields`, keyset-paged on (sort column, id)"""
+    table, _, _, key, newest_first = API_RESOURCES[resource]
+    columns = list(dict.fromkeys(("id", key, *fields)))  # the cursor needs id and the sort key
+    after_key = decode_cursor(after)
+    cursor = db.reader().cursor()
+    cursor.execute(_keyset_sql(table, ", ".join(columns), key, newest_first, bool(after_key)),
+                   (*(after_key or ()), limit + 1))
+    rows = _api_rows(cursor, table, columns, fields)
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+    last = rows[-1] if rows else None
+    return {"items": [{field: row[field] for field in fields} for row in rows],
+            "next_cursor": encode_cursor(last[key], last["id"]) if has_next else None}
+
+
+def api_item(db: ConnectionPool, resource: str, item_id: int, fields: tuple) -> Optional[dict]:
+    """One row of an API resource (None if missing)"""
+    table = API_RESOURCES[resource][0]
+    columns = list(dict.fromkeys(("id", *fields)))
+    cursor = db.reader().cursor()
+    cursor.execute(f"SELECT {', '.join(columns)} FROM {table} WHERE id=?", (item_id,))
+    rows = _api_rows(cursor, table, columns, fields)
+    return {field: rows[0][field] for field in fields} if rows else None
+
+
+# Statements on public request paths, with representative parameters, for
+# migrations.check_query_plans: none of them should need a full table scan.
+HOT_QUERIES = [
+    (f"SELECT {VIDEO_COLUMNS} FROM visions ORDER BY date DESC LIMIT 5", ()),
+    (f"SELECT {SERMON_COLUMNS} FROM sermons ORDER BY date DESC LIMIT 5", ()),
+    (f"SELECT {VIDEO_COLUMNS} FROM shorts ORDER BY date DESC LIMIT 10", ()),
+    (f"SELECT {VIDEO_COLUMNS} FROM qtys ORDER BY date DESC LIMIT 10", ()),
+    (f"SELECT {NEWS_LIST_COLUMNS} FROM news ORDER BY date DESC LIMIT 5", ()),
+    ("SELECT * FROM members ORDER BY display_order ASC, id ASC", ()),
+    (f"SELECT {PASTORAL_LIST_SELECT} FROM pastoral_posts ORDER BY created_at DESC, id DESC LIMIT ?", (21,)),
+    (f"SELECT {PASTORAL_LIST_SELECT} FROM pastoral_posts WHERE (created_at, id) < (?, ?) "
+     "ORDER BY created_at DESC, id DESC LIMIT ?", ("2026-01-01", 1, 21)),
+    (f"SELECT {PASTORAL_LIST_SELECT} FROM pastoral_posts WHERE (created_at, id) > (?, ?) "
+     "ORDER BY created_at ASC, id ASC LIMIT ?", ("2026-01-01", 1, 21)),
+    ("SELECT created_at, id FROM pastoral_posts ORDER BY created_at DESC, id DESC LIMIT 1 OFFSET ?", (20,)),
+    (f"SELECT {PASTORAL_COLUMNS} FROM pastoral_posts WHERE id=?", (1,)),
+    (f"SELECT {NEWS_COLUMNS} FROM news WHERE id=?", (1,)),
+    (COMMENTS_SQL.format(keyset=""), ("pastoral", 1, 51)),
+    (COMMENTS_SQL.format(keyset="AND (c.created_at, c.id) > (?, ?)"), ("pastoral", 1, "2026-01-01", 1, 51)),
+    ("UPDATE pastoral_posts SET comment_count = comment_count + 1 WHERE id=?", (1,)),
+    ("SELECT post_type, post_id FROM comments WHERE id=?", (1,)),
+    ("SELECT id FROM users WHERE username=?", ("admin",)),
+    ("SELECT id FROM users WHERE email=?", ("admin@example.com",)),
+    ("SELECT user_id FROM comments WHERE id=?", (1,)),
+    ("DELETE FROM comments WHERE post_type='pastoral' AND post_id=?", (1,)),
+    ("DELETE FROM comments WHERE post_type='news' AND post_id=?", (1,)),
+    ("SELECT name, version, updated_at FROM content_versions WHERE name IN (?, ?)", ("news", "comments")),
+    (KNOWN_VIDEO_SQL, ("abcdefghijk",) * len(VIDEO_TABLES)),
+]
+HOT_QUERIES += [(_admin_section_sql(section, keyset), ("2026-01-01", 1, 51) if keyset else (51,))
+                for section in ADMIN_SECTIONS for keyset in (False, True)]
+HOT_QUERIES += [(f"SELECT {columns} FROM {table} WHERE id=?", (1,)) for table, columns in ADMIN_ITEMS.values()]
+HOT_QUERIES += [(_keyset_sql(table, ", ".join(("id", key, *fields)), key, newest_first, keyset),
+                 ("2026-01-01", 1, 21) if keyset else (21,))
+                for table, _, fields, key, newest_first in API_RESOURCES.values() for keyset in (False, True)]
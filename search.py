@@ -0,0 +1,133 @@
+"""Full-text search over pastoral posts and news (SQLite FTS5, trigram tokenizer)"""
+from excerpts import strip_html
+
+# The trigram tokenizer indexes every 3-character window, so it matches
+# Korean (and any other script) by substring without a word segmenter.
+# Two-character terms (most Korean words: 사랑, 기도, 은혜) are too short
+# for it, so the grams column lists every distinct 2-character window of
+# the title and body, each followed by GRAM_END: "사랑" is then found as
+# the trigram "사랑|" instead of by scanning. Rows are keyed by rowid =
+# id * 2 for pastoral posts and id * 2 + 1 for news so the triggers (and
+# queries) can find their row without reading it.
+#
+# Bodies are indexed from the search_body and search_grams columns (the
+# post's text without markup, and its grams), which writers fill in
+# Python with search_columns; the triggers only use built-in SQL, so any
+# connection (the sqlite3 CLI, backup scripts) can write these tables. A
+# row written without them is indexed by title alone until
+# fill_search_bodies runs.
+SEARCH_INDEX = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+        title, body, grams, kind UNINDEXED, post_id UNINDEXED,
+        tokenize = 'trigram'
+    );
+    -- ORDER BY rank: title matches weigh more than body matches, grams don't count
+    INSERT INTO search_index (search_index, rank) VALUES ('rank', 'bm25(10.0, 1.0, 0.0)');
+"""
+
+SEARCH_TRIGGERS = """
+    DROP TRIGGER IF EXISTS pastoral_posts_search_ai;
+    DROP TRIGGER IF EXISTS pastoral_posts_search_au;
+    DROP TRIGGER IF EXISTS news_search_ai;
+    DROP TRIGGER IF EXISTS news_search_au;
+
+    CREATE TRIGGER pastoral_posts_search_ai AFTER INSERT ON pastoral_posts BEGIN
+        INSERT INTO search_index (rowid, title, body, grams, kind, post_id)
+        VALUES (new.id * 2, new.title, new.search_body, new.search_grams, 'pastoral', new.id);
+    END;
+    CREATE TRIGGER pastoral_posts_search_au AFTER UPDATE OF title, search_body, search_grams ON pastoral_posts BEGIN
+        UPDATE search_index SET title = new.title, body = new.search_body, grams = new.search_grams
+        WHERE rowid = old.id * 2;
+    END;
+
+    CREATE TRIGGER news_search_ai AFTER INSERT ON news BEGIN
+        INSERT INTO search_index (rowid, title, body, grams, kind, post_id)
+        VALUES (new.id * 2 + 1, new.title, new.search_body, new.search_grams, 'news', new.id);
+    END;
+    CREATE TRIGGER news_search_au AFTER UPDATE OF title, search_body, search_grams ON news BEGIN
+        UPDATE search_index SET title = new.title, body = new.search_body, grams = new.search_grams
+        WHERE rowid = old.id * 2 + 1;
+    END;
+"""
+
+REBUILD_SEARCH_INDEX = """
+    DELETE FROM search_index;
+    INSERT INTO search_index (rowid, title, body, grams, kind, post_id)
+        SELECT id * 2, title, search_body, search_grams, 'pastoral', id FROM pastoral_posts;
+    INSERT INTO search_index (rowid, title, body, grams, kind, post_id)
+        SELECT id * 2 + 1, title, search_body, search_grams, 'news', id FROM news;
+"""
+
+TRIGRAM = 3
+GRAM = 2
+GRAM_END = "|"
+
+def search_grams(*texts) -> str:
+    """Distinct 2-character windows of texts, each followed by GRAM_END (the grams column).
+
+    Windows with a space or punctuation are left out; terms containing
+    those fall back to LIKE.
+    """
+    grams = dict.fromkeys(
+        word[i:i + GRAM].lower()
+        for text in texts if text
+        for word in text.split()
+        for i in range(len(word) - GRAM + 1)
+        if word[i:i + GRAM].isalnum())
+    return "".join(gram + GRAM_END for gram in grams)
+
+
+def search_columns(title: str, content) -> tuple:
+    """(search_body, search_grams) for a post"""
+    body = strip_html(content)
+    return body, search_grams(title, body)
+
+
+def fill_search_bodies(cursor):
+    """Compute search_body and search_grams for posts and news written without them (the triggers reindex them)"""
+    for table in ("pastoral_posts", "news"):
+        cursor.execute(f"SELECT id, title, content FROM {table} WHERE search_body IS NULL OR search_grams IS NULL")
+        cursor.executemany(f"UPDATE {table} SET search_body = ?, search_grams = ? WHERE id = ?",
+                           [(*search_columns(title, content), row_id) for row_id, title, content in cursor.fetchall()])
+
+
+def _like(term: str) -> str:
+    return "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def search_filter(q: str, alias: str = "p"):
+    """FTS5 MATCH expression, LIKE clauses over `alias` and their parameters, and whether to rank.
+
+    Every whitespace-separated term must match. Terms of three or more
+    characters are phrases on the title and body; two-character ones
+    look up their gram. Anything shorter, or a pair with punctuation,
+    falls back to LIKE on the row's title and search_body. Results are
+    ranked only when there is a phrase to rank by.
+    """
+    match = []
+    likes = []
+    params = []
+    ranked = False
+    for term in q.split():
+        if len(term) >= TRIGRAM:
+            ranked = True
+            match.append('{title body}: "' + term.replace('"', '""') + '"')
+        elif len(term) == GRAM and term.isalnum():
+            match.append(f'grams: "{term}{GRAM_END}"')
+        else:
+            likes.append(f"({alias}.title LIKE ? ESCAPE '\\' OR {alias}.search_body LIKE ? ESCAPE '\\')")
+            params.extend([_like(term)] * 2)
+    return " AND ".join(match), " AND ".join(likes), params, ranked
+
+
+if __name__ == "__main__":
+    import sqlite3
+    import sys
+
+    from db import DB_PATH
+
+    # Usage: python -m search [db_path]   (after editing post bodies outside the app)
+    conn = sqlite3.connect(sys.argv[1] if len(sys.argv) > 1 else DB_PATH)
+    fill_search_bodies(conn.cursor())
+    conn.commit()
+    conn.close()
@@ -0,0 +1,149 @@
+"""Login sessions shared by every worker: SQLite table, signed cookie or Redis
+
+SESSION_BACKEND picks the store:
+  sqlite  (default) rows in the `sessions` table of the site database
+  cookie  the user is signed into the cookie itself; nothing is stored,
+          so logout only clears the cookie and can't revoke a copied one
+  redis   keys with a TTL on SESSION_REDIS_URL (needs the redis package)
+"""
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import time
+from typing import Optional
+
+from db import ConnectionPool, get_db
+
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "sqlite")
+SESSION_TTL = int(os.getenv("SESSION_TTL", str(7 * 24 * 3600)))
+SESSION_SWEEP_INTERVAL = float(os.getenv("SESSION_SWEEP_INTERVAL", "600"))
+SESSION_REDIS_URL = os.getenv("SESSION_REDIS_URL", "redis://localhost:6379/0")
+SESSION_COOKIE = "session_token"
+
+logger = logging.getLogger(__name__)
+
+
+def _token_key(token: str) -> str:
+    # Only a digest is stored, so a leaked table or keyspace can't be replayed
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class SqliteSessionStore:
+    """Sessions as rows keyed by token digest, with an expiry sweep"""
+
+    def __init__(self, ttl: int = SESSION_TTL):
+        self.ttl = ttl
+
+    async def create(self, user: dict) -> str:
+        token = secrets.token_urlsafe(32)
+        await get_db().execute("INSERT INTO sessions (token_hash, data, expires_at) VALUES (?, ?, ?)",
+                               (_token_key(token), json.dumps(user), int(time.time()) + self.ttl))
+        return token
+
+    async def get(self, token: str) -> Optional[dict]:
+        return await get_db().run(self._get, _token_key(token))
+
+    @staticmethod
+    def _get(db: ConnectionPool, key: str) -> Optional[dict]:
+        row = db.reader().execute("SELECT data FROM sessions WHERE token_hash = ? AND expires_at > ?",
+                                  (key, int(time.time()))).fetchone()
+        return json.loads(row[0]) if row else None
+
+    async def delete(self, token: str):
+        await get_db().execute("DELETE FROM sessions WHERE token_hash = ?", (_token_key(token),))
+
+    async def sweep(self) -> int:
+        return await get_db().run(self._sweep)
+
+    @staticmethod
+    def _sweep(db: ConnectionPool) -> int:
+        with db.write() as conn:
+            return conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (int(time.time()),)).rowcount
+
+
+class CookieSessionStore:
+    """Stateless sessions: base64url(JSON user + expiry) "." HMAC-SHA256.
+
+    Every worker must share SESSION_SECRET; with the per-process fallback,
+    a restart or another worker logs everyone out.
+    """
+
+    def __init__(self, secret: Optional[str] = None, ttl: int = SESSION_TTL):
+        secret = secret or os.getenv("SESSION_SECRET")
+        if not secret:
+            logger.warning("SESSION_SECRET is not set; cookie sessions will not survive a restart")
+            secret = secrets.token_hex(32)
+        self._secret = secret.encode()
+        self.ttl = ttl
+
+    def _sign(self, payload: str) -> str:
+        return base64.urlsafe_b64encode(hmac.new(self._secret, payload.encode(), hashlib.sha256).digest()).decode().rstrip("=")
+
+    async def create(self, user: dict) -> str:
+        raw = json.dumps({"user": user, "exp": int(time.time()) + self.ttl}, separators=(",", ":"))
+        payload = base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+        return f"{payload}.{self._sign(payload)}"
+
+    async def get(self, token: str) -> Optional[dict]:
+        payload, _, signature = token.partition(".")
+        # As bytes: compare_digest rejects non-ASCII str, and a cookie can hold anything
+        if not signature or not hmac.compare_digest(signature.encode(), self._sign(payload).encode()):
+            return None
+        try:
+            data = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        except ValueError:
+            return None
+        return data["user"] if data.get("exp", 0) > time.time() else None
+
+    async def delete(self, token: str):
+        pass
+
+    async def sweep(self) -> int:
+        return 0
+
+
+class RedisSessionStore:
+    """Sessions as Redis keys that expire on their own (sweep is a no-op)"""
+
+    def __init__(self, url: str = SESSION_REDIS_URL, ttl: int = SESSION_TTL):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("SESSION_BACKEND=redis requires the redis package") from e
+        self._redis = redis.from_url(url)
+        self.ttl = ttl
+
+    async def create(self, user: dict) -> str:
+        token = secrets.token_urlsafe(32)
+        await self._redis.set(f"session:{_token_key(token)}", json.dumps(user), ex=self.ttl)
+        return token
+
+    async def get(self, token: str) -> Optional[dict]:
+        data = await self._redis.get(f"session:{_token_key(token)}")
+        return json.loads(data) if data else None
+
+    async def delete(self, token: str):
+        await self._redis.delete(f"session:{_token_key(token)}")
+
+    async def sweep(self) -> int:
+        return 0
+
+
+BACKENDS = {
+    "sqlite": SqliteSessionStore,
+    "cookie": CookieSessionStore,
+    "redis": RedisSessionStore,
+}
+
+
+def create_session_store(backend: str = SESSION_BACKEND):
+    if backend not in BACKENDS:
+        raise RuntimeError(f"Unknown SESSION_BACKEND {backend!r}; expected one of {', '.join(BACKENDS)}")
+    return BACKENDS[backend]()
+
+
+session_store = create_session_store()
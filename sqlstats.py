@@ -0,0 +1,246 @@
+"""Per-request SQL instrumentation: statement count, DB time, slowest statement, slow-query log
+
+Off unless SQL_INSTRUMENT=1. When on, the pool opens its connections
+with InstrumentedConnection, whose cursors time every statement from
+execute() until its rows are fetched. SQLTimingMiddleware gives each
+request a RequestStats (a context variable that ConnectionPool.run
+carries into the DB threads) and reports it as a Server-Timing header:
+
+    Server-Timing: db;dur=4.2;desc="6 queries", db-slowest;dur=1.9
+
+The header goes to every client, so the slowest statement's SQL is only
+added (as desc="SELECT ...") for requests `authorize` accepts; main.py
+passes its admin check.
+
+Statements slower than SQL_SLOW_MS are written as JSON lines, with their
+EXPLAIN QUERY PLAN, to SQL_SLOW_LOG (stderr when unset). When off, the
+pool uses plain sqlite3 connections and no middleware is installed.
+"""
+import contextvars
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+
+SQL_INSTRUMENT = os.getenv("SQL_INSTRUMENT", "0") == "1"
+SQL_SLOW_MS = float(os.getenv("SQL_SLOW_MS", "100"))
+SQL_SLOW_LOG = os.getenv("SQL_SLOW_LOG", "")
+
+# Statements EXPLAIN QUERY PLAN can describe (not PRAGMA or DDL)
+_EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "REPLACE", "WITH")
+
+_current = contextvars.ContextVar("sql_stats", default=None)
+_log_lock = threading.Lock()
+
+
+class RequestStats:
+    """Statements one request ran; updated from the DB threads"""
+
+    def __init__(self, label: str = ""):
+        self.label = label
+        self.count = 0
+        self.seconds = 0.0
+        self.slowest = ("", 0.0)
+        self._lock = threading.Lock()
+
+    def started(self):
+        with self._lock:
+            self.count += 1
+
+    def add(self, seconds: float):
+        with self._lock:
+            self.seconds += seconds
+
+    def finished(self, sql: str, seconds: float):
+        with self._lock:
+            if seconds > self.slowest[1]:
+                self.slowest = (sql, seconds)
+
+    def server_timing(self, with_sql: bool = False) -> str:
+        """Counts and durations; with_sql adds the start of the slowest statement (admins only)"""
+        timing = f'db;dur={self.seconds * 1000:.1f};desc="{self.count} queries"'
+        sql, seconds = self.slowest
+        if sql:
+            timing += f", db-slowest;dur={seconds * 1000:.1f}"
+            if with_sql:
+                desc = " ".join(sql.split())[:80].replace("\\", "\\\\").replace('"', '\\"')
+                desc = desc.encode("latin-1", "replace").decode("latin-1")
+                timing += f';desc="{desc}"'
+        return timing
+
+
+def query_plan(conn: sqlite3.Connection, sql: str, params=()) -> list:
+    """EXPLAIN QUERY PLAN detail lines, on a plain cursor so they aren't counted themselves"""
+    return [row[-1] for row in sqlite3.Cursor(conn).execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+def log_slow(conn: sqlite3.Connection, sql: str, params, seconds: float, stats: Optional[RequestStats]):
+    record = {"ts": round(time.time(), 3), "ms": round(seconds * 1000, 2), "request": stats.label if stats else None,
+              "sql": " ".join(sql.split())}
+    if params is not None and record["sql"].upper().startswith(_EXPLAINABLE):
+        try:
+            record["plan"] = query_plan(conn, sql, params)
+        except (sqlite3.Error, ValueError) as e:  # e.g. the connection is already closed
+            record["plan_error"] = str(e)
+    line = json.dumps(record, ensure_ascii=False)
+    with _log_lock:
+        if SQL_SLOW_LOG:
+            with open(SQL_SLOW_LOG, "a", encoding="utf-8") as log:
+                log.write(line + "\n")
+        else:
+            print(line, file=sys.stderr, flush=True)
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that times each statement across execute() and the fetches that follow it.
+
+    A statement ends when its rows run out, the cursor runs another
+    statement or is closed (or collected); that is when it is compared
+    against the slowest and the slow-query threshold.
+    """
+
+    _sql = None
+
+    def _start(self, sql: str, params):
+        self._finish()
+        self._sql, self._params, self._elapsed = sql, params, 0.0
+        self._stats = _current.get()
+        if self._stats is not None:
+            self._stats.started()
+
+    def _timed(self, started: float):
+        if self._sql is None:
+            return
+        elapsed = time.perf_counter() - started
+        self._elapsed += elapsed
+        if self._stats is not None:
+            self._stats.add(elapsed)
+
+    def _finish(self):
+        if self._sql is None:
+            return
+        sql, elapsed = self._sql, self._elapsed
+        self._sql = None
+        if self._stats is not None:
+            self._stats.finished(sql, elapsed)
+        if elapsed * 1000 >= SQL_SLOW_MS:
+            log_slow(self.connection, sql, self._params, elapsed, self._stats)
+
+    def execute(self, sql, parameters=()):
+        self._start(sql, parameters)
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._timed(started)
+
+    def executemany(self, sql, seq_of_parameters):
+        self._start(sql, None)  # no single parameter set to explain
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._timed(started)
+            self._finish()
+
+    def executescript(self, sql_script):
+        self._start(sql_script, None)
+        started = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            self._timed(started)
+            self._finish()
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._timed(started)
+        if row is None:
+            self._finish()
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._timed(started)
+        if not rows:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._timed(started)
+        self._finish()
+        return rows
+
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._timed(started)
+            self._finish()
+            raise
+        self._timed(started)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        self._finish()
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors (including those from execute()) are InstrumentedCursors"""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+
+class SQLTimingMiddleware:
+    """ASGI middleware collecting each request's SQL stats into a Server-Timing header.
+
+    `authorize(request)` decides whether the header may show SQL text;
+    without it no request gets any.
+    """
+
+    def __init__(self, app, authorize=None):
+        self.app = app
+        self.authorize = authorize
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats(f"{scope['method']} {scope['path']}")
+        token = _current.set(stats)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                with_sql = bool(stats.slowest[0]) and self.authorize is not None and await self.authorize(Request(scope))
+                MutableHeaders(scope=message).append("Server-Timing", stats.server_timing(with_sql))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
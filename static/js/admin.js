@@ -15,6 +15,10 @@ function editSermon(sermonId) {
     if (displayRow && editRow) {
         displayRow.style.display = 'none';
         editRow.style.display = '';
+        loadEditor('sermons', sermonId, {
+            description: `sermon-edit-description-${sermonId}`,
+            youtube_url: `sermon-edit-youtube_url-${sermonId}`,
+        });
     }
 }
 
@@ -83,3 +87,217 @@ function cancelEditQty(qtyId) {
         editRow.style.display = 'none';
     }
 }
+
+// ─── Lazily loaded admin lists ─────────────────────────────────────────
+// Each <details class="admin-lazy" data-section="..."> fetches its rows
+// from /admin/api/<section> the first time it is opened, a page at a
+// time ("더 보기" loads the next). Long text (sermon descriptions, post
+// bodies) is fetched by loadEditor only when an inline editor opens.
+
+function esc(value) {
+    return String(value ?? '').replace(/[&<>"']/g, ch => ({
+        '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+    })[ch]);
+}
+
+function deleteForm(action, buttonClass = 'btn-delete') {
+    return `<form method="POST" action="${action}" style="display: inline;">
+        <button type="submit" class="${buttonClass}" onclick="return confirm('정말 삭제하시겠습니까?')">삭제</button>
+    </form>`;
+}
+
+function videoEditRow(kind, item, editId, cancel) {
+    return `<tr class="${kind}-edit-row" id="${editId}" style="display: none;">
+        <td colspan="3">
+            <form method="POST" action="/admin/${kind}/update/${item.id}" class="inline-edit-form">
+                <div class="form-row">
+                    <input type="text" name="title" value="${esc(item.title)}" placeholder="제목" required>
+                    <input type="date" name="date" value="${esc(item.date)}" required>
+                </div>
+                <input type="url" name="youtube_url" value="${esc(item.youtube_url)}" placeholder="YouTube URL" required
+                    style="width:100%;margin-bottom:10px;">
+                <div class="form-actions">
+                    <button type="submit" class="btn btn-primary">저장</button>
+                    <button type="button" class="btn btn-secondary" onclick="${cancel}(${item.id})">취소</button>
+                </div>
+            </form>
+        </td>
+    </tr>`;
+}
+
+const ADMIN_ROWS = {
+    visions: item => `<tr>
+        <td>${item.id}</td>
+        <td>${esc(item.title)}</td>
+        <td>${esc(item.author)}</td>
+        <td>${esc(item.date)}</td>
+        <td><code>${esc(item.youtube_id)}</code></td>
+        <td>${deleteForm(`/admin/vision/delete/${item.id}`)}</td>
+    </tr>`,
+
+    sermons: item => `<tr class="sermon-row" data-sermon-id="${item.id}">
+        <td class="sermon-display">
+            <div class="sermon-info">
+                <strong>${esc(item.title)}</strong>
+                <span>${esc(item.pastor)} | ${esc(item.date)}</span>
+            </div>
+            <div class="sermon-description">${esc(item.excerpt)}...</div>
+        </td>
+        <td>
+            <button class="btn-edit" onclick="editSermon(${item.id})">수정</button>
+            ${deleteForm(`/admin/sermon/delete/${item.id}`)}
+        </td>
+    </tr>
+    <tr class="sermon-edit-row" id="edit-${item.id}" style="display: none;">
+        <td colspan="2">
+            <form method="POST" action="/admin/sermon/update/${item.id}" class="inline-edit-form">
+                <div class="form-row">
+                    <input type="text" name="title" value="${esc(item.title)}" placeholder="설교 제목" required>
+                    <input type="text" name="pastor" value="${esc(item.pastor)}" placeholder="설교자" required>
+                    <input type="date" name="date" value="${esc(item.date)}" required>
+                </div>
+                <input type="url" name="youtube_url" id="sermon-edit-youtube_url-${item.id}" placeholder="YouTube 링크 (선택)">
+                <textarea name="description" id="sermon-edit-description-${item.id}" rows="4" required
+                    placeholder="설교 요약"></textarea>
+                <div class="form-actions">
+                    <button type="submit" class="btn btn-primary">저장</button>
+                    <button type="button" class="btn btn-secondary" onclick="cancelEdit(${item.id})">취소</button>
+                </div>
+            </form>
+        </td>
+    </tr>`,
+
+    shorts: item => `<tr class="shorts-row" data-shorts-id="${item.id}">
+        <td>${esc(item.title)}</td>
+        <td>${esc(item.date)}</td>
+        <td>
+            <button class="btn-edit" onclick="editShorts(${item.id})">수정</button>
+            ${deleteForm(`/admin/shorts/delete/${item.id}`)}
+        </td>
+    </tr>` + videoEditRow('shorts', item, `shorts-edit-${item.id}`, 'cancelEditShorts'),
+
+    qtys: item => `<tr class="qty-row" data-qty-id="${item.id}">
+        <td>${esc(item.title)}</td>
+        <td>${esc(item.date)}</td>
+        <td>
+            <button class="btn-edit" onclick="editQty(${item.id})">수정</button>
+            ${deleteForm(`/admin/qty/delete/${item.id}`)}
+        </td>
+    </tr>` + videoEditRow('qty', item, `qty-edit-${item.id}`, 'cancelEditQty'),
+
+    pastoral: item => `<tr class="pastoral-row" data-pastoral-id="${item.id}">
+        <td>${item.id}</td>
+        <td><a href="/pastoral/${item.id}" target="_blank">${esc(item.title)}</a></td>
+        <td>${esc(item.author)}</td>
+        <td>${esc(item.created_at)}</td>
+        <td>${item.views}</td>
+        <td>${item.has_image ? '✅' : '❌'}</td>
+        <td>
+            <button class="btn-edit" onclick="editPastoral(${item.id})">수정</button>
+            ${deleteForm(`/admin/pastoral/delete/${item.id}`, 'btn btn-danger btn-sm')}
+        </td>
+    </tr>
+    <tr class="pastoral-edit-row" id="pastoral-edit-${item.id}" style="display: none;">
+        <td colspan="7">
+            <form method="POST" action="/admin/pastoral/update/${item.id}" enctype="multipart/form-data" class="inline-edit-form">
+                <div class="form-group">
+                    <label>제목</label>
+                    <input type="text" name="title" value="${esc(item.title)}" required>
+                </div>
+                <div class="form-group">
+                    <label>내용</label>
+                    <div class="editor-toolbar" style="display: flex; gap: 8px; margin-bottom: 8px; flex-wrap: wrap;">
+                        <button type="button" onclick="insertBoldEdit(${item.id})" class="btn btn-sm" style="padding: 4px 10px; font-size: 0.85rem; background: #f0f0f0; border: 1px solid #ccc; border-radius: 4px; cursor: pointer;"><b>B</b></button>
+                        <button type="button" onclick="insertHeadingEdit(${item.id})" class="btn btn-sm" style="padding: 4px 10px; font-size: 0.85rem; background: #f0f0f0; border: 1px solid #ccc; border-radius: 4px; cursor: pointer;">H2</button>
+                        <label style="padding: 4px 10px; font-size: 0.85rem; background: #4CAF50; color: white; border-radius: 4px; cursor: pointer; display: inline-flex; align-items: center; gap: 4px;">
+                            &#128247; 이미지
+                            <input type="file" accept="image/*" onchange="insertInlineImageEdit(this, ${item.id})" style="display: none;">
+                        </label>
+                    </div>
+                    <textarea id="pastoral-edit-content-${item.id}" name="content" rows="12" required style="font-family: monospace; font-size: 0.95rem; width: 100%;"></textarea>
+                </div>
+                <div class="form-group">
+                    <label>대표 이미지 변경 (선택)</label>
+                    <input type="file" name="image" accept="image/*">
+                    <small class="form-hint">변경하지 않으려면 비워두세요.</small>
+                </div>
+                <div class="form-actions">
+                    <button type="submit" class="btn btn-primary">저장</button>
+                    <button type="button" class="btn btn-secondary" onclick="cancelEditPastoral(${item.id})">취소</button>
+                </div>
+            </form>
+        </td>
+    </tr>`,
+
+    news: item => `<tr>
+        <td>${item.id}</td>
+        <td>${esc(item.title)}</td>
+        <td>${esc(item.author)}</td>
+        <td>${esc(item.date)}</td>
+        <td>${item.views}</td>
+        <td>${item.has_image
+            ? '<span class="badge badge-success">있음</span>'
+            : '<span class="badge badge-secondary">없음</span>'}</td>
+        <td>${deleteForm(`/admin/news/delete/${item.id}`)}</td>
+    </tr>`,
+
+    // photo_html is <picture> markup rendered (and escaped) by the server
+    members: item => `<tr>
+        <td>${item.display_order}</td>
+        <td>${item.photo_html || '-'}</td>
+        <td>${esc(item.name)}</td>
+        <td>${esc(item.role)}</td>
+        <td>${deleteForm(`/admin/member/delete/${item.id}`, 'btn btn-danger btn-sm')}</td>
+    </tr>`,
+};
+
+async function loadSection(details) {
+    const more = details.querySelector('.admin-more');
+    more.disabled = true;
+    const params = new URLSearchParams();
+    if (details.dataset.cursor) params.set('after', details.dataset.cursor);
+    try {
+        const response = await fetch(`/admin/api/${details.dataset.section}?${params}`, {credentials: 'same-origin'});
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        const page = await response.json();
+        const table = details.querySelector('table');
+        table.tBodies[0].insertAdjacentHTML('beforeend', page.items.map(ADMIN_ROWS[details.dataset.section]).join(''));
+        const empty = !table.tBodies[0].rows.length;
+        table.hidden = empty;
+        details.querySelector('.empty-message').hidden = !empty;
+        details.dataset.cursor = page.next_cursor || '';
+        more.hidden = !page.next_cursor;
+        details.dataset.loaded = '1';
+    } catch (err) {
+        alert('목록을 불러오지 못했습니다: ' + err.message);
+    } finally {
+        more.disabled = false;
+    }
+}
+
+// Fill an inline editor's fields from /admin/api/<section>/<id> (once per row)
+async function loadEditor(section, id, fields) {
+    const elements = Object.entries(fields).map(([name, elementId]) => [name, document.getElementById(elementId)]);
+    if (elements.every(([, el]) => !el || el.dataset.loaded)) return;
+    const form = elements[0][1].form;
+    form.querySelectorAll('button[type="submit"]').forEach(button => button.disabled = true);
+    try {
+        const response = await fetch(`/admin/api/${section}/${id}`, {credentials: 'same-origin'});
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        const item = await response.json();
+        for (const [name, el] of elements) {
+            el.value = item[name] ?? '';
+            el.dataset.loaded = '1';
+        }
+        form.querySelectorAll('button[type="submit"]').forEach(button => button.disabled = false);
+    } catch (err) {
+        alert('내용을 불러오지 못했습니다: ' + err.message);
+    }
+}
+
+document.querySelectorAll('details.admin-lazy').forEach(details => {
+    details.addEventListener('toggle', () => {
+        if (details.open && !details.dataset.loaded) loadSection(details);
+    });
+    details.querySelector('.admin-more').addEventListener('click', () => loadSection(details));
+});
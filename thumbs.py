@@ -0,0 +1,201 @@
+"""Local cache of YouTube thumbnails, served as small WebP from /thumbs/<id>.webp"""
+import asyncio
+import io
+import logging
+import os
+import re
+import time
+import urllib.error
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+from uploads import UPLOAD_DIR
+
+try:
+    from PIL import Image
+except ImportError:  # thumbnails are cached as fetched (JPEG)
+    Image = None
+
+THUMB_IS_WEBP = Image is not None
+
+THUMB_CACHE_DIR = Path(os.getenv("THUMB_CACHE_DIR", str(UPLOAD_DIR / "thumbs")))
+THUMB_CACHE_MAX_BYTES = int(float(os.getenv("THUMB_CACHE_MAX_MB", "50")) * 1024 * 1024)
+THUMB_WIDTH = int(os.getenv("THUMB_WIDTH", "480"))
+THUMB_QUALITY = int(os.getenv("THUMB_QUALITY", "75"))
+THUMB_UPSTREAM = os.getenv("THUMB_UPSTREAM", "https://img.youtube.com/vi")
+THUMB_FETCH_TIMEOUT = float(os.getenv("THUMB_FETCH_TIMEOUT", "5"))
+# How long an id with no thumbnail at all is remembered before asking again, and how many are
+THUMB_MISSING_TTL = float(os.getenv("THUMB_MISSING_TTL", "3600"))
+THUMB_MISSING_MAX = int(os.getenv("THUMB_MISSING_MAX", "10000"))
+
+# Best first; YouTube only has maxres for HD uploads
+RESOLUTIONS = ("maxresdefault", "sddefault", "hqdefault", "mqdefault", "default")
+VIDEO_ID_RE = re.compile(r"^[A-Za-z0-9_-]{6,20}$")
+
+logger = logging.getLogger(__name__)
+
+Fetcher = Callable[[str], Optional[bytes]]
+
+
+def fetch_url(url: str) -> Optional[bytes]:
+    """GET url; None on a 404 or any network error"""
+    try:
+        with urllib.request.urlopen(url, timeout=THUMB_FETCH_TIMEOUT) as response:
+            return response.read()
+    except (urllib.error.URLError, OSError):
+        return None
+
+
+def transcode(data: bytes) -> bytes:
+    """Downscale to THUMB_WIDTH and re-encode as WebP"""
+    if Image is None:
+        return data
+    with Image.open(io.BytesIO(data)) as image:
+        image = image.convert("RGB")
+        if image.width > THUMB_WIDTH:
+            image = image.resize((THUMB_WIDTH, round(image.height * THUMB_WIDTH / image.width)), Image.LANCZOS)
+        out = io.BytesIO()
+        image.save(out, "WEBP", quality=THUMB_QUALITY)
+        return out.getvalue()
+
+
+class ThumbnailCache:
+    """On-disk, size-bounded LRU of transcoded thumbnails.
+
+    Recency lives in an OrderedDict rebuilt from file mtimes at startup
+    (hits touch the file), so the order survives restarts. Concurrent
+    requests for the same uncached id share one upstream fetch. `fetcher`
+    takes a URL and returns bytes or None, and can be replaced to run
+    against a local fake.
+
+    Ids YouTube has no thumbnail for are remembered for THUMB_MISSING_TTL
+    seconds, oldest dropped first past THUMB_MISSING_MAX.
+    """
+
+    def __init__(self, directory: Path = THUMB_CACHE_DIR, max_bytes: int = THUMB_CACHE_MAX_BYTES,
+                 fetcher: Fetcher = fetch_url, upstream: str = THUMB_UPSTREAM):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.fetcher = fetcher
+        self.upstream = upstream
+        self.evictions = 0
+        self._entries = None  # video id -> size, least recently used first
+        self._size = 0
+        self._inflight = {}
+        self._missing = OrderedDict()  # video id -> expiry, soonest first (the TTL is fixed)
+        self._tasks = set()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="thumbs")
+
+    def path(self, video_id: str) -> Path:
+        return self.directory / f"{video_id}.webp"
+
+    def _load(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        files = sorted((p.stat().st_mtime, p) for p in self.directory.glob("*.webp"))
+        self._entries = OrderedDict((p.stem, p.stat().st_size) for _, p in files)
+        self._size = sum(self._entries.values())
+
+    async def get(self, video_id: str, known: Optional[Callable[[], Awaitable[bool]]] = None) -> Optional[Path]:
+        """Path of the cached thumbnail, fetching it on first use (None if YouTube has none).
+
+        `known()` is awaited before an upstream fetch, and None is returned
+        when it says no; /thumbs passes a check that a video row links the
+        id, so random ids can't make the server fetch anything.
+        """
+        if not VIDEO_ID_RE.match(video_id):
+            return None
+        if self._entries is None:
+            self._load()
+        if video_id in self._entries:
+            self._entries.move_to_end(video_id)
+            path = self.path(video_id)
+            try:
+                os.utime(path)
+                return path
+            except FileNotFoundError:  # removed behind our back; fetch again
+                self._size -= self._entries.pop(video_id)
+        if self._missing.get(video_id, 0) > time.monotonic():
+            return None
+        if video_id not in self._inflight and known is not None and not await known():
+            return None
+        if video_id not in self._inflight:
+            self._inflight[video_id] = asyncio.ensure_future(self._fill(video_id))
+        return await asyncio.shield(self._inflight[video_id])
+
+    async def _fill(self, video_id: str) -> Optional[Path]:
+        try:
+            loop = asyncio.get_running_loop()
+            try:
+                size = await loop.run_in_executor(self._executor, self._fetch_and_store, video_id)
+            except Exception:
+                logger.exception("thumbnail fetch failed for %s", video_id)
+                size = None
+            if size is None:
+                self._remember_missing(video_id)
+                return None
+            self._entries[video_id] = size
+            self._size += size
+            self._evict()
+            return self.path(video_id)
+        finally:
+            del self._inflight[video_id]
+
+    def _remember_missing(self, video_id: str):
+        now = time.monotonic()
+        self._missing.pop(video_id, None)
+        self._missing[video_id] = now + THUMB_MISSING_TTL
+        while self._missing:
+            oldest, expires = next(iter(self._missing.items()))
+            if expires > now and len(self._missing) <= THUMB_MISSING_MAX:
+                break
+            del self._missing[oldest]
+
+    def _fetch_and_store(self, video_id: str) -> Optional[int]:
+        for resolution in RESOLUTIONS:
+            data = self.fetcher(f"{self.upstream}/{video_id}/{resolution}.jpg")
+            if data:
+                break
+        else:
+            return None
+        data = transcode(data)
+        tmp = self.directory / f".{video_id}.{os.getpid()}.tmp"
+        tmp.write_bytes(data)
+        os.replace(tmp, self.path(video_id))
+        return len(data)
+
+    def _evict(self):
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            video_id, size = self._entries.popitem(last=False)
+            self._size -= size
+            self.evictions += 1
+            try:
+                os.unlink(self.path(video_id))
+            except FileNotFoundError:
+                pass
+
+    def prime(self, video_id: Optional[str]):
+        """Fetch a thumbnail in the background (on admin create/update)"""
+        if not video_id:
+            return
+        task = asyncio.create_task(self.get(video_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def close(self):
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._executor.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries or ()),
+            "bytes": self._size,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+        }
+
+
+thumbnail_cache = ThumbnailCache()
@@ -0,0 +1,110 @@
+"""Upload storage: chunked copy off the event loop, size limits, content-hash names"""
+import asyncio
+import hashlib
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from fastapi import UploadFile
+
+from metrics import upload_bytes, uploads
+
+UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", "uploads"))
+UPLOAD_URL_PREFIX = "/uploads/"
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "2"))
+
+_MB = 1024 * 1024
+IMAGE_MAX_BYTES = int(float(os.getenv("UPLOAD_IMAGE_MAX_MB", "10")) * _MB)
+GIF_MAX_BYTES = int(float(os.getenv("UPLOAD_GIF_MAX_MB", "20")) * _MB)
+
+# Accepted extensions and the largest file each may be
+UPLOAD_LIMITS = {
+    ".jpg": IMAGE_MAX_BYTES,
+    ".jpeg": IMAGE_MAX_BYTES,
+    ".png": IMAGE_MAX_BYTES,
+    ".webp": IMAGE_MAX_BYTES,
+    ".gif": GIF_MAX_BYTES,
+}
+
+
+class UploadRejected(Exception):
+    """An upload with an unsupported type or over its size limit"""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+class UploadStore:
+    """Writes uploads into `directory` under the SHA-256 of their content.
+
+    The copy runs on a small dedicated thread pool, so a large image never
+    blocks the event loop. Bytes go to a temporary file in the same
+    directory and are counted as they are read. The file is renamed into
+    place only once it is complete and within its limit, so readers never
+    see a partial file. Identical content maps to the same name and is
+    stored once.
+    """
+
+    def __init__(self, directory: Path = UPLOAD_DIR, max_workers: int = UPLOAD_WORKERS):
+        self.directory = directory
+        self.directory.mkdir(exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="upload")
+
+    async def save(self, upload: UploadFile) -> str:
+        """Store an upload and return its public URL (raises UploadRejected)"""
+        extension = Path(upload.filename or "").suffix.lower()
+        limit = UPLOAD_LIMITS.get(extension)
+        if limit is None:
+            raise UploadRejected("지원하지 않는 파일 형식입니다.")
+        if upload.size is not None and upload.size > limit:
+            raise UploadRejected(self._too_large(limit), status_code=413)
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            filename, size = await loop.run_in_executor(self._executor, self._store, upload.file, extension, limit)
+        except UploadRejected:
+            uploads.observe(("rejected",), time.perf_counter() - started)
+            raise
+        uploads.observe(("stored",), time.perf_counter() - started)
+        upload_bytes.inc((), size)
+        return UPLOAD_URL_PREFIX + filename
+
+    @staticmethod
+    def _too_large(limit: int) -> str:
+        return f"파일이 너무 큽니다 (최대 {limit / _MB:g}MB)."
+
+    def _store(self, source, extension: str, limit: int) -> tuple:
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                while chunk := source.read(UPLOAD_CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > limit:
+                        raise UploadRejected(self._too_large(limit), status_code=413)
+                    digest.update(chunk)
+                    out.write(chunk)
+            filename = digest.hexdigest()[:32] + extension
+            final_path = self.directory / filename
+            if final_path.exists():
+                os.unlink(tmp_path)
+            else:
+                os.chmod(tmp_path, 0o644)
+                os.replace(tmp_path, final_path)
+            return filename, size
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+
+upload_store = UploadStore()
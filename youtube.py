@@ -0,0 +1,46 @@
+"""YouTube URL parsing, done once when a video row is written"""
+import re
+from typing import Optional, Tuple
+
+# watch?v=, youtu.be/, embed/, shorts/ (any length id) and live/ links
+YOUTUBE_PATTERNS = [re.compile(pattern) for pattern in (
+    r'(?:https?:\/\/)?(?:www\.)?youtube\.com\/watch\?v=([a-zA-Z0-9_-]{11})',
+    r'(?:https?:\/\/)?(?:www\.)?youtu\.be\/([a-zA-Z0-9_-]{11})',
+    r'(?:https?:\/\/)?(?:www\.)?youtube\.com\/embed\/([a-zA-Z0-9_-]{11})',
+    r'(?:https?:\/\/)?(?:www\.)?youtube\.com\/shorts\/([a-zA-Z0-9_-]+)',
+    r'(?:https?:\/\/)?(?:www\.)?youtube\.com\/live\/([a-zA-Z0-9_-]{11})',
+)]
+
+# Tables with youtube_url, youtube_id and thumbnail columns
+VIDEO_TABLES = ("visions", "sermons", "shorts", "qtys")
+
+
+def extract_youtube_id(url: Optional[str]) -> Optional[str]:
+    """Extract YouTube video ID from URL (including Shorts and Live)"""
+    if not url:
+        return None
+    for pattern in YOUTUBE_PATTERNS:
+        match = pattern.search(url)
+        if match:
+            return match.group(1)
+    return None
+
+
+def thumbnail_url(video_id: Optional[str]) -> Optional[str]:
+    """Local thumbnail proxy URL (see thumbs.py)"""
+    return f"/thumbs/{video_id}.webp" if video_id else None
+
+
+def youtube_fields(url: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """(youtube_id, thumbnail) to store alongside a youtube_url"""
+    video_id = extract_youtube_id(url)
+    return video_id, thumbnail_url(video_id)
+
+
+def fill_youtube_columns(cursor, tables=VIDEO_TABLES):
+    """Compute youtube_id/thumbnail for rows written without them"""
+    for table in tables:
+        rows = cursor.execute(f"SELECT id, youtube_url FROM {table} WHERE youtube_id IS NULL").fetchall()
+        updates = [(*youtube_fields(url), row_id) for row_id, url in rows]
+        cursor.executemany(f"UPDATE {table} SET youtube_id=?, thumbnail=? WHERE id=?",
+                           [row for row in updates if row[0]])